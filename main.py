@@ -9,6 +9,7 @@ Email: ballales1984@gmail.com
 import sys
 import os
 import time
+import queue
 import numpy as np
 
 
@@ -58,6 +59,9 @@ from src.zone_detector import ZoneDetector
 from src.calibration import CalibrationSystem
 from src.ui_menu import UIMenu
 from src.reaper_connector import ReaperConnector, ConnectionType
+from src.pipeline import Pipeline, PipelineStage
+from src.keypoints import joint_speeds
+from src.strike_predictor import StrikePredictor
 
 # Audio engine - try FluidSynth first, fallback to drum_machine
 USE_FLUIDSYNTH = True
@@ -91,6 +95,7 @@ from src.config import (
     CAMERA_INDEX,
     CAMERA_WIDTH,
     CAMERA_HEIGHT,
+    POSE_FILTER,
     WINDOW_WIDTH,
     WINDOW_HEIGHT,
     REAPER_ENABLED,
@@ -102,9 +107,58 @@ from src.config import (
     SOUND_LIBRARY_PATH,
     USE_VIDEO_OVERLAY,
     BEATBOX_MODE,
+    PREDICTIVE_TRIGGERS,
 )
 
 
+LIMBS = [
+    "left_wrist",
+    "right_wrist",
+    "left_knee",
+    "right_knee",
+    "left_ankle",
+    "right_ankle",
+]
+
+
+def hit_intensity(zone_name, key_points, velocities, zone_detector):
+    """Intensità del colpo (0.3-1.0) dalla posizione nella zona e dalla velocità"""
+    velocity = 1.0
+    zone = zone_detector.drum_zones.get(zone_name, {})
+
+    if zone_name == "kick":
+        # Per il kick, usa la velocità della caviglia
+        for foot in ["left_ankle", "right_ankle"]:
+            if foot in key_points:
+                velocity = zone_detector.get_zone_velocity(key_points[foot], zone)
+                # Combina con velocità di movimento
+                velocity = max(velocity, velocities.get(foot, 0) * 0.5)
+                break
+    else:
+        # Per gli altri, usa la velocità del polso
+        for hand in ["left_wrist", "right_wrist"]:
+            if hand in key_points:
+                dist = zone_detector.distance_to_zone(
+                    key_points[hand], zone.get("center", np.array([0.5, 0.5, 0]))
+                )
+                if dist <= zone.get("trigger_distance", 0.2):
+                    velocity = zone_detector.get_zone_velocity(key_points[hand], zone)
+                    # Combina con velocità di movimento
+                    velocity = max(velocity, velocities.get(hand, 0) * 0.3)
+                    break
+
+    # Normalizza la velocità
+    return min(1.0, max(0.3, velocity))
+
+
+def strike_intensity(strike, zone_detector):
+    """Intensità (0.3-1.0) di un colpo predittivo dal punto nel pad e dalla velocità dell'arto"""
+    zone = zone_detector.drum_zones.get(strike.zone, {})
+    weight = 0.5 if strike.zone == "kick" else 0.3
+    velocity = max(zone_detector.get_zone_velocity(strike.point, zone), strike.speed * weight)
+    return min(1.0, max(0.3, velocity))
+
+
 def main():
     """Funzione principale"""
     print("=" * 60)
@@ -115,7 +169,10 @@ def main():
 
     # Inizializza i componenti
     motion_tracker = MotionTracker(
-        camera_index=CAMERA_INDEX, width=CAMERA_WIDTH, height=CAMERA_HEIGHT
+        camera_index=CAMERA_INDEX,
+        width=CAMERA_WIDTH,
+        height=CAMERA_HEIGHT,
+        pose_filter=POSE_FILTER,
     )
 
     drum_machine = DrumMachine(
@@ -137,6 +194,8 @@ def main():
         screen = virtual_env.screen
 
     zone_detector = ZoneDetector()
+    # Colpi anticipati sulla traiettoria prevista (compensa la latenza della posa)
+    strike_predictor = StrikePredictor(zone_detector) if PREDICTIVE_TRIGGERS else None
     calibration_system = CalibrationSystem(motion_tracker)
 
     # Sistema di rilevamento altezza automatico (DISABILITATO per configurazione batterista seduto)
@@ -213,9 +272,22 @@ def main():
     ui_menu.register_callback(
         "set_master_volume", lambda vol: drum_machine.set_master_volume(vol)
     )
-    ui_menu.register_callback(
-        "start_calibration", lambda: calibration_system.calibrate()
-    )
+    # Pipeline live: cattura (thread del MotionTracker) -> posa -> colpi e
+    # trigger -> rendering (thread principale, richiesto da pygame)
+    pipeline = Pipeline()
+
+    def run_calibration():
+        """La calibrazione legge la videocamera: sospende la pipeline"""
+        pipeline.pause()
+        try:
+            return calibration_system.calibrate()
+        finally:
+            # Nuovo spazio di coordinate: nessuna predizione in sospeso
+            if strike_predictor is not None:
+                strike_predictor.reset()
+            pipeline.resume()
+
+    ui_menu.register_callback("start_calibration", run_calibration)
 
     # Inizializza la videocamera
     print("Inizializzazione videocamera...")
@@ -249,19 +321,126 @@ def main():
     print("=" * 60)
     print("\nAvvio applicazione...\n")
 
-    # Loop principale
+    # Stato per migliorare il tracking
+    use_calibration = False
+
+    def capture_frame():
+        """Sorgente: frame più recente dal thread di cattura"""
+        frame = motion_tracker.get_frame()
+        if frame is None:
+            return None
+        return {"frame": frame, "timestamp": motion_tracker.frame_timestamp}
+
+    def detect_pose(item):
+        """Stadio posa: inferenza MediaPipe"""
+        item["pose"] = motion_tracker.detect_pose(item["frame"], item["timestamp"])
+        return item
+
+    def dispatch_hits(item):
+        """Stadio colpi: velocità, zone colpite e trigger audio (mai in attesa del rendering)"""
+        key_points = None
+        active_zones = set()
+        pose_data = item["pose"]
+
+        if pose_data is not None:
+            key_points = pose_data["key_points"]
+            joint_velocity = pose_data["velocity"]
+            joint_acceleration = pose_data["acceleration"]
+
+            # Applica calibrazione se disponibile
+            if use_calibration and calibration_system.calibration_complete:
+                # Tutte le articolazioni in un passaggio sull'array
+                key_points = calibration_system.normalize_keypoints(key_points)
+                joint_velocity = calibration_system.normalize_keypoints(
+                    joint_velocity, derivative=True
+                )
+                joint_acceleration = calibration_system.normalize_keypoints(
+                    joint_acceleration, derivative=True
+                )
+
+            # Rileva i colpi: (zona, intensità) da suonare
+            if strike_predictor is not None:
+                strikes, cancelled = strike_predictor.update(
+                    key_points, joint_velocity, joint_acceleration, item["timestamp"]
+                )
+                hits = [
+                    (strike.zone, strike_intensity(strike, zone_detector))
+                    for strike in strikes
+                ]
+
+                # Predizioni false: smorza il suono già partito (Reaper ha già ricevuto la nota)
+                for zone_name in cancelled:
+                    choke = getattr(audio_engine or drum_machine, "choke", None)
+                    if choke is not None:
+                        choke(zone_name)
+            else:
+                # Velocità stimate dal filtro della posa (nessuna differenza finita)
+                velocities = joint_speeds(joint_velocity, LIMBS)
+                hits = [
+                    (zone_name, hit_intensity(zone_name, key_points, velocities, zone_detector))
+                    for zone_name in zone_detector.detect_hits(key_points, velocities)
+                ]
+
+            # Suona le zone colpite
+            for zone_name, velocity in hits:
+                # Suona localmente (FluidSynth if available, else drum_machine)
+                if audio_engine:
+                    audio_engine.play(zone_name, velocity)
+                else:
+                    drum_machine.play_sound(zone_name, velocity)
+
+                # Invia a Reaper se abilitato
+                if reaper_connector and reaper_connector.enabled:
+                    reaper_connector.send_trigger(zone_name, velocity)
+
+                active_zones.add(zone_name)
+
+        item["key_points"] = key_points
+        item["active_zones"] = active_zones
+        return item
+
+    frame_timestamp = lambda item: item["timestamp"]
+
+    # Code limitate: la posa non perde frame verso i colpi (velocità continue),
+    # il rendering riceve solo lo stato più recente
+    pose_queue = queue.Queue(maxsize=2)
+    render_queue = queue.Queue(maxsize=1)
+    pipeline.add_stage(
+        PipelineStage(
+            "pose",
+            detect_pose,
+            source=capture_frame,
+            output_queue=pose_queue,
+            drop_oldest=False,
+            timestamp=frame_timestamp,
+        )
+    )
+    pipeline.add_stage(
+        PipelineStage(
+            "hits",
+            dispatch_hits,
+            input_queue=pose_queue,
+            output_queue=render_queue,
+            timestamp=frame_timestamp,
+        )
+    )
+
+    # In modalità beatbox non c'è tracking: il video si legge nel loop
+    if not BEATBOX_MODE:
+        pipeline.start()
+
+    # Loop principale (eventi e rendering)
     running = True
     frame_count = 0
     last_fps_time = time.time()
     current_fps = 0.0
-    calibration_requested = False
-
-    # Stato per migliorare il tracking
-    use_calibration = False
+    render_time = 0.0
+    last_state = None  # Ultimo stato ricevuto dalla pipeline
 
     try:
         while running:
             # Controlla eventi
+            all_events = []
             if virtual_env:
                 continue_running, key_pressed = virtual_env.check_events()
             else:
@@ -316,184 +495,84 @@ def main():
                     # Gestisci input nel menu
                     ui_menu.handle_key(key_pressed)
 
-            # Aggiorna metronomo
-            drum_machine.update_metronome()
-
-            # Ottieni frame dalla videocamera (solo se non in modalità beatbox)
-            frame = None
-            pose_data = None
-
-            if not BEATBOX_MODE:
-                frame = motion_tracker.get_frame()
-                if frame is None:
-                    continue
-
-                # Rileva la posa
-                pose_data = motion_tracker.detect_pose(frame)
-
-                # Calibrazione automatica altezza (DISABILITATA per configurazione batterista seduto)
-            elif USE_VIDEO_OVERLAY and video_overlay:
-                # In modalità beatbox, mostra solo video senza tracking
-                frame = motion_tracker.get_frame()
-                if frame is not None:
-                    video_overlay.clear()
-                    video_overlay.update_frame(frame)
-                    video_overlay.draw_all_pads(None, None)
-                    stats = (
-                        beatbox_detector.get_statistics() if beatbox_detector else {}
-                    )
-                    video_overlay.draw_info(
-                        current_fps, stats.get("total_detections", 0)
-                    )
-                    pygame.display.flip()
-
             active_zones = set()
 
-            if pose_data is not None:
-                key_points = pose_data["key_points"]
-
-                # Applica calibrazione se disponibile
-                if use_calibration and calibration_system.calibration_complete:
-                    normalized_key_points = {}
-                    for point_name, point_3d in key_points.items():
-                        point_type = (
-                            "wrist"
-                            if "wrist" in point_name
-                            else ("ankle" if "ankle" in point_name else "nose")
+            if BEATBOX_MODE:
+                if USE_VIDEO_OVERLAY and video_overlay:
+                    # In modalità beatbox, mostra solo video senza tracking
+                    frame = motion_tracker.get_frame()
+                    if frame is not None:
+                        video_overlay.clear()
+                        video_overlay.update_frame(frame)
+                        video_overlay.draw_all_pads(None, None)
+                        stats = (
+                            beatbox_detector.get_statistics() if beatbox_detector else {}
                         )
-                        normalized_key_points[point_name] = (
-                            calibration_system.normalize_position(point_3d, point_type)
+                        video_overlay.draw_info(
+                            current_fps, stats.get("total_detections", 0)
                         )
-                    key_points = normalized_key_points
-
-                # Calcola velocità per tutte le articolazioni
-                # FIX: usa un timestamp comune per evitare dt quasi zero
-                current_time = time.time()
-
-                # Prima calcola tutte le velocità con lo stesso dt
-                velocities = {}
-                for limb in [
-                    "left_wrist",
-                    "right_wrist",
-                    "left_knee",
-                    "right_knee",
-                    "left_ankle",
-                    "right_ankle",
-                ]:
-                    if limb in key_points and limb in motion_tracker.last_positions:
-                        dt = current_time - motion_tracker.last_time
-                        if dt > 0:
-                            velocities[limb] = motion_tracker.calculate_velocity(
-                                key_points[limb],
-                                motion_tracker.last_positions[limb],
-                                dt,
-                            )
-                        else:
-                            velocities[limb] = 0.0
-                    else:
-                        velocities[limb] = 0.0
-                    motion_tracker.last_positions[limb] = key_points[limb]
-
-                # Aggiorna timestamp alla fine
-                motion_tracker.last_time = current_time
-
-                # Rileva i colpi
-                hit_zones = zone_detector.detect_hits(key_points, velocities)
-
-                # Suona i suoni per le zone colpite
-                for zone_name in hit_zones:
-                    # Calcola la velocità relativa per l'intensità
-                    velocity = 1.0
-
-                    # Trova quale articolazione ha colpito
-                    if zone_name == "kick":
-                        # Per il kick, usa la velocità della caviglia
-                        for foot in ["left_ankle", "right_ankle"]:
-                            if foot in key_points:
-                                velocity = zone_detector.get_zone_velocity(
-                                    key_points[foot],
-                                    zone_detector.drum_zones.get(zone_name, {}),
-                                )
-                                # Combina con velocità di movimento
-                                velocity = max(velocity, velocities.get(foot, 0) * 0.5)
-                                break
-                    else:
-                        # Per gli altri, usa la velocità del polso
-                        for hand in ["left_wrist", "right_wrist"]:
-                            if hand in key_points:
-                                dist = zone_detector.distance_to_zone(
-                                    key_points[hand],
-                                    zone_detector.drum_zones.get(zone_name, {}).get(
-                                        "center", np.array([0.5, 0.5, 0])
-                                    ),
-                                )
-                                if dist <= zone_detector.drum_zones.get(
-                                    zone_name, {}
-                                ).get("trigger_distance", 0.2):
-                                    velocity = zone_detector.get_zone_velocity(
-                                        key_points[hand],
-                                        zone_detector.drum_zones.get(zone_name, {}),
-                                    )
-                                    # Combina con velocità di movimento
-                                    velocity = max(
-                                        velocity, velocities.get(hand, 0) * 0.3
-                                    )
-                                    break
-
-                    # Normalizza la velocità
-                    velocity = min(1.0, max(0.3, velocity))
-
-                    # Suona localmente (FluidSynth if available, else drum_machine)
-                    if audio_engine:
-                        audio_engine.play(zone_name, velocity)
-                    else:
-                        drum_machine.play_sound(zone_name, velocity)
-
-                    # Invia a Reaper se abilitato
-                    if reaper_connector and reaper_connector.enabled:
-                        reaper_connector.send_trigger(zone_name, velocity)
-
-                    active_zones.add(zone_name)
-
-                # Aggiorna visualizzazione
-                if USE_VIDEO_OVERLAY and video_overlay:
-                    # Modalità video overlay
-                    video_overlay.clear()
-                    video_overlay.update_frame(frame)
-
-                    # Aggiorna pad attivi
-                    for zone_name in active_zones:
-                        video_overlay.set_active_pad(zone_name, True, 1.0)
-
-                    # Disegna pad (configurazione fissa per batterista seduto)
-                    video_overlay.draw_all_pads(key_points, None)
-
-                    # Disegna calibrazione se attiva
-                    if pad_calibrator.is_calibrating():
-                        pad_calibrator.draw_calibration()
-
-                    video_overlay.draw_info(current_fps, len(active_zones))
-                    pygame.display.flip()
-                elif virtual_env:
-                    # Modalità 3D tradizionale
-                    virtual_env.update(
-                        key_points=key_points,
-                        active_zones=active_zones,
-                        fps=current_fps,
-                        show_info=not ui_menu.is_active(),
-                    )
-            else:
-                # Nessuna posa rilevata
-                if USE_VIDEO_OVERLAY and video_overlay and frame is not None:
-                    video_overlay.clear()
-                    video_overlay.update_frame(frame)
-                    video_overlay.draw_all_pads(None, None)
-                    video_overlay.draw_info(current_fps, 0)
-                    pygame.display.flip()
+                        pygame.display.flip()
                 elif virtual_env:
                     virtual_env.update(
                         fps=current_fps, show_info=not ui_menu.is_active()
                     )
+            else:
+                # Stato più recente prodotto dalla pipeline (attesa breve: gli eventi restano reattivi)
+                try:
+                    state = render_queue.get(timeout=0.02)
+                    last_state = state
+                except queue.Empty:
+                    # Nessun risultato nuovo (videocamera ferma, pipeline in pausa):
+                    # ridisegna l'ultimo stato, il menu e l'FPS restano aggiornati
+                    state = last_state and dict(last_state, active_zones=set())
+
+                if state is not None:
+                    render_start = time.perf_counter()
+                    frame = state["frame"]
+                    key_points = state["key_points"]
+                    active_zones = state["active_zones"]
+
+                    if key_points is not None:
+                        # Aggiorna visualizzazione
+                        if USE_VIDEO_OVERLAY and video_overlay:
+                            # Modalità video overlay
+                            video_overlay.clear()
+                            video_overlay.update_frame(frame)
+
+                            # Aggiorna pad attivi
+                            for zone_name in active_zones:
+                                video_overlay.set_active_pad(zone_name, True, 1.0)
+
+                            # Disegna pad (configurazione fissa per batterista seduto)
+                            video_overlay.draw_all_pads(key_points, None)
+
+                            # Disegna calibrazione se attiva
+                            if pad_calibrator.is_calibrating():
+                                pad_calibrator.draw_calibration()
+
+                            video_overlay.draw_info(current_fps, len(active_zones))
+                            pygame.display.flip()
+                        elif virtual_env:
+                            # Modalità 3D tradizionale
+                            virtual_env.update(
+                                key_points=key_points,
+                                active_zones=active_zones,
+                                fps=current_fps,
+                                show_info=not ui_menu.is_active(),
+                            )
+                    else:
+                        # Nessuna posa rilevata
+                        if USE_VIDEO_OVERLAY and video_overlay:
+                            video_overlay.clear()
+                            video_overlay.update_frame(frame)
+                            video_overlay.draw_all_pads(None, None)
+                            video_overlay.draw_info(current_fps, 0)
+                            pygame.display.flip()
+                        elif virtual_env:
+                            virtual_env.update(
+                                fps=current_fps, show_info=not ui_menu.is_active()
+                            )
+                    render_time = time.perf_counter() - render_start
 
             # Disegna il menu se attivo
             if ui_menu.is_active():
@@ -506,7 +585,8 @@ def main():
                 current_fps = frame_count / (current_time - last_fps_time)
                 if not ui_menu.is_active():
                     print(
-                        f"FPS: {current_fps:.1f} | Zone attive: {len(active_zones)}",
+                        f"FPS: {current_fps:.1f} | Zone attive: {len(active_zones)} | "
+                        f"{pipeline.summary()} | render {render_time * 1000:.1f}ms",
                         end="\r",
                     )
                 frame_count = 0
@@ -522,6 +602,7 @@ def main():
     finally:
         # Cleanup
         print("\nChiusura applicazione...")
+        pipeline.stop()
         motion_tracker.release()
         drum_machine.stop_all()
         if reaper_connector:
@@ -0,0 +1,95 @@
+"""
+Compila i kit di sounds/ e la libreria (library.json) in sample bank
+memory-mapped, caricabili in pochi millisecondi.
+
+Uso:
+    python scripts/build_sample_bank.py
+    python scripts/build_sample_bank.py --sounds sounds --output sounds/banks --sample-rate 48000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Aggiungi percorso progetto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.dsp_utils import read_audio, resample
+from src.low_latency_audio import LowLatencyAudioEngine
+from src.sample_bank import write_sample_bank
+
+
+def build_kit_banks(kits_dir: Path, output_dir: Path, sample_rate: int, channels: int):
+    """Un bank per ogni cartella in sounds/kits"""
+    if not kits_dir.exists():
+        print(f"⚠️  Cartella kit non trovata: {kits_dir}")
+        return
+
+    for kit_dir in sorted(p for p in kits_dir.iterdir() if p.is_dir()):
+        layouts = LowLatencyAudioEngine.scan_kit(str(kit_dir))
+        if not layouts:
+            continue
+
+        sounds = {}
+        for drum, layer_paths in layouts.items():
+            try:
+                sounds[drum] = [[read_audio(path, sample_rate) for path in paths] for paths in layer_paths]
+            except Exception as e:
+                print(f"  ⚠️  {kit_dir.name}/{drum}: {e}")
+
+        bank_path = output_dir / f"{kit_dir.name}.bank"
+        size = write_sample_bank(str(bank_path), sounds, sample_rate, channels)
+        print(f"  [OK] {bank_path} ({len(sounds)} suoni, {size / 1e6:.1f} MB)")
+
+
+def build_library_bank(library_dir: Path, output_dir: Path, sample_rate: int, channels: int):
+    """Bank della libreria con le modifiche dei parametri già applicate"""
+    if not (library_dir / "library.json").exists():
+        print(f"⚠️  library.json non trovato in: {library_dir}")
+        return
+
+    from src.sound_library import SoundLibrary
+
+    library = SoundLibrary(str(library_dir))
+
+    sounds = {}
+    for name in library.list_samples():
+        sample = library.get_sample(name)
+        audio = library.get_audio(name, apply_mods=True)
+        if audio is None or len(audio) == 0:
+            print(f"  ⚠️  {name}: audio mancante")
+            continue
+        sounds[name] = [[resample(audio, sample.sample_rate, sample_rate)]]
+
+    bank_path = output_dir / "library.bank"
+    size = write_sample_bank(str(bank_path), sounds, sample_rate, channels)
+    print(f"  [OK] {bank_path} ({len(sounds)} suoni, {size / 1e6:.1f} MB)")
+
+
+def main():
+    """Funzione principale"""
+    parser = argparse.ArgumentParser(description="Compila sample bank memory-mapped")
+    parser.add_argument("--sounds", default="sounds", help="Cartella suoni (con kits/ e library.json)")
+    parser.add_argument("--output", default=None, help="Cartella di destinazione (default: <sounds>/banks)")
+    parser.add_argument("--sample-rate", type=int, default=44100, help="Sample rate del motore")
+    parser.add_argument("--channels", type=int, default=2, help="Canali del motore")
+    args = parser.parse_args()
+
+    sounds_dir = Path(args.sounds)
+    output_dir = Path(args.output) if args.output else sounds_dir / "banks"
+
+    print("=" * 60)
+    print("Compilazione Sample Bank")
+    print("=" * 60)
+
+    print("\nKit:")
+    build_kit_banks(sounds_dir / "kits", output_dir, args.sample_rate, args.channels)
+
+    print("\nLibreria:")
+    build_library_bank(sounds_dir, output_dir, args.sample_rate, args.channels)
+
+    print(f"\n[OK] Bank salvati in: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ import cv2
 import time
 from typing import Dict, Optional, Tuple
 from src.motion_tracker import MotionTracker
+from src.keypoints import JOINT_INDEX, JOINTS, KeypointFrame, as_keypoint_array
 from src.config import CAMERA_INDEX, CAMERA_WIDTH, CAMERA_HEIGHT
 
 class CalibrationSystem:
@@ -48,13 +49,8 @@ class CalibrationSystem:
         print("Muoviti naturalmente per 5 secondi...")
         print("=" * 50)
         
-        positions = {
-            'left_wrist': [],
-            'right_wrist': [],
-            'left_ankle': [],
-            'right_ankle': [],
-            'nose': []
-        }
+        tracked = ['left_wrist', 'right_wrist', 'left_ankle', 'right_ankle', 'nose']
+        samples = []  # Un array (articolazioni × 3) per frame
         
         start_time = time.time()
         frame_count = 0
@@ -67,11 +63,8 @@ class CalibrationSystem:
             pose_data = self.motion_tracker.detect_pose(frame)
             
             if pose_data:
-                key_points = pose_data['key_points']
-                
-                for point_name in positions.keys():
-                    if point_name in key_points:
-                        positions[point_name].append(key_points[point_name].copy())
+                # Array nuovo a ogni frame: nessuna copia necessaria
+                samples.append(as_keypoint_array(pose_data['key_points']))
             
             frame_count += 1
             elapsed = time.time() - start_time
@@ -80,11 +73,13 @@ class CalibrationSystem:
         
         print("\nElaborazione dati calibrazione...")
         
-        # Calcola i range di movimento
+        # Calcola i range di movimento (tutti i frame insieme)
         self.calibration_points = {}
-        for point_name, point_list in positions.items():
-            if len(point_list) > 10:  # Almeno 10 campioni
-                points_array = np.array(point_list)
+        stack = np.stack(samples) if samples else np.zeros((0, len(JOINTS), 3))
+        for point_name in tracked:
+            points_array = stack[:, JOINT_INDEX[point_name]]
+            points_array = points_array[~np.isnan(points_array).any(axis=1)]
+            if len(points_array) > 10:  # Almeno 10 campioni
                 self.calibration_points[point_name] = {
                     'min': np.min(points_array, axis=0),
                     'max': np.max(points_array, axis=0),
@@ -103,28 +98,15 @@ class CalibrationSystem:
             print("  Assicurati di essere visibile nella camera e muoviti di più")
             return False
     
-    def normalize_position(self, point: np.ndarray, point_type: str = 'wrist') -> np.ndarray:
-        """
-        Normalizza una posizione basandosi sulla calibrazione
-        
-        Args:
-            point: Punto 3D da normalizzare
-            point_type: Tipo di punto ('wrist', 'ankle', 'nose')
-        
-        Returns:
-            Punto normalizzato nello spazio della batteria
-        """
+    def _calibration_range(self, point_type: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Minimo e ampiezza del range calibrato per un tipo di punto (None = nessuno)"""
         if not self.calibration_complete:
-            return point  # Restituisce il punto originale se non calibrato
+            return None
         
         # Trova il punto di calibrazione più appropriato
-        calib_key = None
         if point_type == 'wrist':
             # Usa la media dei polsi
             if 'left_wrist' in self.calibration_points and 'right_wrist' in self.calibration_points:
-                left_center = self.calibration_points['left_wrist']['center']
-                right_center = self.calibration_points['right_wrist']['center']
-                calib_center = (left_center + right_center) / 2
                 calib_min = np.minimum(
                     self.calibration_points['left_wrist']['min'],
                     self.calibration_points['right_wrist']['min']
@@ -134,32 +116,84 @@ class CalibrationSystem:
                     self.calibration_points['right_wrist']['max']
                 )
             else:
-                return point
+                return None
         elif point_type == 'ankle':
             if 'left_ankle' in self.calibration_points:
-                calib_center = self.calibration_points['left_ankle']['center']
                 calib_min = self.calibration_points['left_ankle']['min']
                 calib_max = self.calibration_points['left_ankle']['max']
             else:
-                return point
+                return None
         else:
-            return point
+            return None
         
-        # Normalizza rispetto al range di calibrazione
         range_size = calib_max - calib_min
         range_size = np.where(range_size < 0.01, 0.01, range_size)  # Evita divisione per zero
+        return calib_min, range_size
+    
+    @staticmethod
+    def _to_drum_space(normalized: np.ndarray, offset: bool = True) -> np.ndarray:
+        """
+        Centra e scala per lo spazio della batteria (ultimo asse = x, y, z)
+        X: 0.2 - 0.8 (lati)
+        Y: 0.3 - 0.7 (alto-basso)
+        Z: mantieni originale
+        Senza offset solo la scala (per velocità e accelerazioni)
+        """
+        normalized[..., 0] *= 0.6  # X
+        normalized[..., 1] *= 0.4  # Y
+        if offset:
+            normalized[..., 0] += 0.2
+            normalized[..., 1] += 0.3
+        return normalized
+    
+    def normalize_position(self, point: np.ndarray, point_type: str = 'wrist') -> np.ndarray:
+        """
+        Normalizza una posizione basandosi sulla calibrazione
         
-        normalized = (point - calib_min) / range_size
+        Args:
+            point: Punto 3D da normalizzare
+            point_type: Tipo di punto ('wrist', 'ankle', 'nose')
         
-        # Centra e scala per lo spazio della batteria
-        # X: 0.2 - 0.8 (lati)
-        # Y: 0.3 - 0.7 (alto-basso)
-        # Z: mantieni originale
-        normalized[0] = 0.2 + normalized[0] * 0.6  # X
-        normalized[1] = 0.3 + normalized[1] * 0.4  # Y
-        # normalized[2] rimane invariato
+        Returns:
+            Punto normalizzato nello spazio della batteria
+        """
+        calibration = self._calibration_range(point_type)
+        if calibration is None:
+            return point  # Restituisce il punto originale se non calibrato
         
-        return normalized
+        calib_min, range_size = calibration
+        return self._to_drum_space((point - calib_min) / range_size)
+    
+    def normalize_keypoints(self, key_points, derivative: bool = False):
+        """
+        Normalizza tutti i punti chiave in un solo passaggio
+        
+        Polsi e caviglie usano il proprio range calibrato, gli altri
+        punti restano invariati (come normalize_position).
+        
+        Args:
+            key_points: Array (articolazioni × 3), KeypointFrame o dizionario
+            derivative: True per velocità/accelerazioni (solo scala, senza offset)
+        
+        Returns:
+            Nuovo array normalizzato (KeypointFrame se l'ingresso non era un array)
+        """
+        array = as_keypoint_array(key_points)
+        normalized = array.copy()
+        
+        for point_type in ('wrist', 'ankle'):
+            calibration = self._calibration_range(point_type)
+            if calibration is None:
+                continue
+            calib_min, range_size = calibration
+            rows = [JOINT_INDEX[f'left_{point_type}'], JOINT_INDEX[f'right_{point_type}']]
+            origin = 0.0 if derivative else calib_min
+            normalized[rows] = self._to_drum_space((array[rows] - origin) / range_size,
+                                                   offset=not derivative)
+        
+        if isinstance(key_points, np.ndarray):
+            return normalized
+        return KeypointFrame(normalized)
     
     def get_calibration_info(self) -> Dict:
         """Restituisce informazioni sulla calibrazione"""
@@ -12,6 +12,7 @@ FPS = 30
 # Configurazione Motion Tracking
 MIN_DETECTION_CONFIDENCE = 0.5
 MIN_TRACKING_CONFIDENCE = 0.5
+POSE_FILTER = 'average'  # Filtro delle posizioni: 'average' (media mobile), 'one_euro' o 'kalman' (meno ritardo)
 
 # Configurazione Zone Batteria Virtuale
 # Configurazione per batterista SEDUTO:
@@ -69,6 +70,7 @@ COLORS = {
 # Sensibilità
 VELOCITY_THRESHOLD = 0.2  # Velocità minima per triggerare un colpo (ridotta per migliorare sensibilità)
 COOLDOWN_TIME = 0.1  # Secondi tra un colpo e l'altro (per evitare doppi trigger)
+PREDICTIVE_TRIGGERS = False  # Sperimentale: anticipa i colpi estrapolando la traiettoria (le predizioni false smorzano il suono)
 
 # Configurazione Reaper
 REAPER_ENABLED = False  # Abilita connessione a Reaper
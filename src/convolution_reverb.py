@@ -0,0 +1,220 @@
+"""
+Riverbero a Convoluzione
+
+Riverbero basato su convoluzione FFT partizionata:
+- Risposte all'impulso (IR) da file WAV o generate sinteticamente
+- Convoluzione vettorializzata su tutto il buffer (overlap-add a blocchi)
+- Spettri delle partizioni dell'IR in cache per sample rate
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+
+def generate_impulse_response(sample_rate: int = 44100, duration: float = 0.8,
+                              decay: float = 6.0, predelay: float = 0.01,
+                              damping: float = 0.5, seed: int = 0) -> np.ndarray:
+    """
+    Genera una IR sintetica: riflessioni iniziali + coda di rumore
+    con decadimento esponenziale.
+
+    Args:
+        sample_rate: Frequenza di campionamento
+        duration: Durata della coda (secondi)
+        decay: Velocità di decadimento (più alto = coda più corta)
+        predelay: Ritardo prima della prima riflessione (secondi)
+        damping: Attenuazione delle alte frequenze nella coda (0-1)
+        seed: Seed del rumore (IR riproducibile)
+
+    Returns:
+        IR mono normalizzata a energia unitaria
+    """
+    rng = np.random.default_rng(seed)
+    length = int(sample_rate * (predelay + duration))
+    ir = np.zeros(length)
+
+    start = int(sample_rate * predelay)
+    t = np.arange(length - start) / sample_rate
+    tail = rng.standard_normal(len(t)) * np.exp(-t * decay)
+
+    # Smorzamento: la coda diventa progressivamente più scura (media mobile)
+    if damping > 0 and len(tail) > 1:
+        window = 1 + int(damping * 8)
+        dark = np.convolve(tail, np.ones(window) / window, mode='same')
+        fade = np.clip(t / max(duration, 1e-6), 0, 1) * damping
+        tail = tail * (1 - fade) + dark * fade
+
+    ir[start:] = tail
+
+    # Riflessioni iniziali
+    for delay, gain in [(0.007, 0.6), (0.013, 0.45), (0.019, 0.35), (0.029, 0.25)]:
+        index = start + int(sample_rate * delay)
+        if index < length:
+            ir[index] += gain
+
+    energy = np.sqrt(np.sum(ir ** 2))
+    return ir / energy if energy > 0 else ir
+
+
+def load_impulse_response(file_path: str) -> tuple:
+    """
+    Carica una IR da file audio (mono mix se multicanale).
+
+    Returns:
+        Tuple (ir, sample_rate)
+    """
+    if not SOUNDFILE_AVAILABLE:
+        raise ImportError("soundfile non disponibile. Installa con: pip install soundfile")
+
+    data, sr = sf.read(file_path, dtype='float64')
+    if len(data.shape) > 1:
+        data = np.mean(data, axis=1)
+
+    energy = np.sqrt(np.sum(data ** 2))
+    if energy > 0:
+        data = data / energy
+    return data, sr
+
+
+class ConvolutionReverb:
+    """Riverbero a convoluzione FFT partizionata (overlap-add uniforme)"""
+
+    def __init__(self, impulse_response: Optional[np.ndarray] = None,
+                 ir_sample_rate: int = 44100, block_size: int = 4096):
+        """
+        Args:
+            impulse_response: IR mono (None = IR sintetica)
+            ir_sample_rate: Sample rate dell'IR
+            block_size: Dimensione delle partizioni (FFT di 2 * block_size)
+        """
+        if impulse_response is None:
+            impulse_response = generate_impulse_response(ir_sample_rate)
+
+        self.impulse_response = np.asarray(impulse_response, dtype=np.float64)
+        self.ir_sample_rate = ir_sample_rate
+        self.block_size = block_size
+
+        # {sample_rate: spettri (partizioni, block_size + 1)}
+        self._spectra_cache: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_file(cls, file_path: str, block_size: int = 4096) -> 'ConvolutionReverb':
+        """Crea il riverbero da un file IR (WAV)"""
+        ir, sr = load_impulse_response(file_path)
+        return cls(ir, ir_sample_rate=sr, block_size=block_size)
+
+    def _get_spectra(self, sample_rate: int) -> np.ndarray:
+        """Spettri delle partizioni dell'IR al sample rate richiesto (in cache)"""
+        spectra = self._spectra_cache.get(sample_rate)
+        if spectra is not None:
+            return spectra
+
+        ir = self.impulse_response
+        if sample_rate != self.ir_sample_rate:
+            # Ricampionamento lineare dell'IR
+            length = int(len(ir) * sample_rate / self.ir_sample_rate)
+            positions = np.linspace(0, len(ir) - 1, length)
+            ir = np.interp(positions, np.arange(len(ir)), ir)
+
+        block = self.block_size
+        parts = -(-len(ir) // block)
+        padded = np.zeros(parts * block)
+        padded[:len(ir)] = ir
+
+        spectra = np.fft.rfft(padded.reshape(parts, block), n=2 * block, axis=1)
+        self._spectra_cache[sample_rate] = spectra
+        return spectra
+
+    def ir_length(self, sample_rate: int) -> int:
+        """Lunghezza dell'IR in campioni al sample rate richiesto"""
+        return int(len(self.impulse_response) * sample_rate / self.ir_sample_rate)
+
+    def convolve(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Convolve l'audio con l'IR (segnale wet, coda inclusa).
+
+        Args:
+            audio: Audio mono (N,) o multicanale (N, canali)
+            sample_rate: Sample rate dell'audio
+
+        Returns:
+            Segnale wet di lunghezza N + len(IR) - 1
+        """
+        audio = np.asarray(audio, dtype=np.float64)
+        if len(audio) == 0:
+            return audio.copy()
+
+        spectra = self._get_spectra(sample_rate)
+        block = self.block_size
+        parts = len(spectra)
+
+        # Canali come dimensione di batch: (canali, N)
+        signal = audio[np.newaxis, :] if audio.ndim == 1 else audio.T
+        channels, length = signal.shape
+
+        blocks = -(-length // block)
+        padded = np.zeros((channels, blocks * block))
+        padded[:, :length] = signal
+
+        # Spettri dei blocchi di ingresso: (canali, blocchi, bins)
+        x = np.fft.rfft(padded.reshape(channels, blocks, block), n=2 * block, axis=2)
+
+        # Y_k = somma_p X_(k-p) * H_p, vettorializzato su tutti i blocchi
+        out_blocks = blocks + parts - 1
+        y = np.zeros((channels, out_blocks, block + 1), dtype=np.complex128)
+        for p in range(parts):
+            y[:, p:p + blocks] += x * spectra[p]
+
+        time_blocks = np.fft.irfft(y, n=2 * block, axis=2)
+
+        # Overlap-add: prima metà di ogni blocco + seconda metà del precedente
+        wet = np.zeros((channels, (out_blocks + 1) * block))
+        wet[:, :out_blocks * block] += time_blocks[:, :, :block].reshape(channels, -1)
+        wet[:, block:] += time_blocks[:, :, block:].reshape(channels, -1)
+
+        wet = wet[:, :length + self.ir_length(sample_rate) - 1]
+        return wet[0] if audio.ndim == 1 else wet.T
+
+    def process(self, audio: np.ndarray, sample_rate: int, amount: float,
+                keep_length: bool = False) -> np.ndarray:
+        """
+        Applica il riverbero con mix dry/wet.
+
+        Args:
+            audio: Audio mono o multicanale
+            sample_rate: Sample rate dell'audio
+            amount: Quantità di riverbero (0 = dry, 1 = solo wet)
+            keep_length: Se True tronca la coda alla lunghezza originale
+
+        Returns:
+            Audio processato (con coda del riverbero se keep_length=False)
+        """
+        if amount <= 0 or len(audio) == 0:
+            return audio
+
+        wet = self.convolve(audio, sample_rate)
+        if keep_length:
+            wet = wet[:len(audio)]
+
+        dry = np.zeros_like(wet)
+        dry[:len(audio)] = audio
+
+        return dry * (1 - amount) + wet * amount
+
+
+# Riverbero sintetico condiviso (spettri riutilizzati tra i campioni)
+_default_reverb: Optional[ConvolutionReverb] = None
+
+
+def get_default_reverb() -> ConvolutionReverb:
+    """Riverbero con IR sintetica condiviso da tutti i campioni"""
+    global _default_reverb
+    if _default_reverb is None:
+        _default_reverb = ConvolutionReverb()
+    return _default_reverb
@@ -0,0 +1,250 @@
+"""
+Disk Streaming
+
+Voci in streaming per campioni lunghi (piatti, ambienti, multi-microfono):
+- Solo la testa del campione resta in RAM (attacco senza latenza)
+- Un thread di lettura trasferisce la coda dal disco (memory-map o
+  file a blocchi) in un ring buffer per voce, in anticipo sul playhead
+- Slot preallocati: il callback apre e chiude stream senza allocazioni
+- Underrun contati; il lettore salta avanti per restare a tempo
+"""
+
+import threading
+import numpy as np
+from typing import List, Optional
+
+from src.dsp_utils import accumulate
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+
+class ArraySource:
+    """Sorgente da array (tipicamente np.memmap): le pagine si leggono solo quando servono"""
+
+    def __init__(self, data: np.ndarray, channels: int = 2):
+        self.data = data
+        self.channels = channels
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def read(self, start: int, frames: int) -> np.ndarray:
+        """Frame [start, start + frames) come (frames, channels) float32"""
+        chunk = np.asarray(self.data[start : start + frames], dtype=np.float32)
+        if chunk.ndim == 1:
+            chunk = chunk[:, np.newaxis]
+        if chunk.shape[1] != self.channels:
+            chunk = np.repeat(chunk.mean(axis=1, keepdims=True), self.channels, axis=1)
+        return chunk
+
+
+class SoundFileSource:
+    """Sorgente da file audio letto a blocchi (soundfile)"""
+
+    def __init__(self, path: str, channels: int = 2):
+        if not SOUNDFILE_AVAILABLE:
+            raise ImportError("soundfile non disponibile. Installa con: pip install soundfile")
+
+        self.path = path
+        self.channels = channels
+        self._file = sf.SoundFile(path)
+        self.sample_rate = self._file.samplerate
+        self._length = self._file.frames
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, start: int, frames: int) -> np.ndarray:
+        with self._lock:
+            self._file.seek(start)
+            chunk = self._file.read(frames, dtype="float32", always_2d=True)
+        if chunk.shape[1] != self.channels:
+            chunk = np.repeat(chunk.mean(axis=1, keepdims=True), self.channels, axis=1)
+        return chunk
+
+
+class StreamingSample:
+    """Campione lungo: testa in memoria, coda letta dalla sorgente"""
+
+    def __init__(self, source, head_frames: int):
+        """
+        Args:
+            source: ArraySource o SoundFileSource
+            head_frames: Frame tenuti in RAM (devono coprire il tempo di prefetch)
+        """
+        self.source = source
+        self.length = len(source)
+        self.head = np.ascontiguousarray(source.read(0, min(head_frames, self.length)))
+
+    def __len__(self) -> int:
+        return self.length
+
+
+# Stati di uno slot: il callback passa FREE -> ACTIVE -> RELEASED,
+# il thread di lettura riporta RELEASED -> FREE quando non lo usa più
+FREE, ACTIVE, RELEASED = 0, 1, 2
+
+
+class StreamSlot:
+    """Ring buffer di una voce in streaming"""
+
+    def __init__(self, ring_frames: int, channels: int):
+        self.ring = np.zeros((ring_frames, channels), dtype=np.float32)
+        self.ring_frames = ring_frames
+        self.state = FREE
+
+        self.sample: Optional[StreamingSample] = None
+        self.write_count = 0  # Frame scritti (thread di lettura)
+        self.read_count = 0  # Frame letti (callback)
+        self.skipped = 0  # Frame saltati per underrun (callback)
+
+        # Solo thread di lettura
+        self.source_position = 0
+        self._skip_applied = 0
+
+    @property
+    def available(self) -> int:
+        return self.write_count - self.read_count
+
+
+class DiskStreamer:
+    """
+    Thread di prefetch per le voci in streaming.
+
+    Il callback chiama open()/release()/read_into(); il thread di lettura
+    riempie i ring degli slot attivi a blocchi di `chunk_frames`.
+    """
+
+    def __init__(
+        self,
+        channels: int = 2,
+        max_streams: int = 32,
+        ring_frames: int = 32768,
+        chunk_frames: int = 4096,
+        poll_interval: float = 0.005,
+    ):
+        """
+        Args:
+            channels: Canali del motore
+            max_streams: Voci in streaming simultanee
+            ring_frames: Dimensione del ring per voce (anticipo massimo)
+            chunk_frames: Frame letti dal disco per volta
+            poll_interval: Attesa del thread tra due passate (secondi)
+        """
+        self.channels = channels
+        self.chunk_frames = chunk_frames
+        self.poll_interval = poll_interval
+        self.slots: List[StreamSlot] = [StreamSlot(ring_frames, channels) for _ in range(max_streams)]
+
+        self.underruns = 0  # Blocchi con dati non ancora pronti
+        self.exhausted = 0  # Stream non aperti per slot esauriti
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # === Lato callback ===
+
+    def open(self, sample: StreamingSample) -> Optional[StreamSlot]:
+        """Assegna uno slot libero alla coda del campione (None se esauriti)"""
+        for slot in self.slots:
+            if slot.state == FREE:
+                slot.sample = sample
+                slot.read_count = 0
+                slot.write_count = 0
+                slot.skipped = 0
+                slot._skip_applied = 0
+                slot.source_position = len(sample.head)
+                slot.state = ACTIVE  # Pubblica lo slot solo a campi pronti
+                return slot
+
+        self.exhausted += 1
+        return None
+
+    def release(self, slot: StreamSlot):
+        """Restituisce lo slot (lo libera il thread di lettura)"""
+        slot.state = RELEASED
+
+    def read_into(self, slot: StreamSlot, target: np.ndarray, gain: float, scratch=None):
+        """Somma len(target) frame della coda in target, silenzio se non ancora letti"""
+        frames = len(target)
+        take = min(frames, slot.available)
+
+        if take > 0:
+            start = slot.read_count % slot.ring_frames
+            first = min(take, slot.ring_frames - start)
+            accumulate(target[:first], slot.ring[start : start + first], gain, scratch)
+            if take > first:
+                accumulate(target[first:take], slot.ring[: take - first], gain, scratch)
+            slot.read_count += take
+
+        if take < frames:
+            # Il lettore salterà i frame persi per restare allineato al playhead
+            self.underruns += 1
+            slot.skipped += frames - take
+
+    # === Thread di lettura ===
+
+    def fill(self) -> int:
+        """Una passata di prefetch su tutti gli slot. Returns: frame letti"""
+        total = 0
+
+        for slot in self.slots:
+            state = slot.state
+            if state == RELEASED:
+                slot.sample = None
+                slot.state = FREE
+                continue
+            if state != ACTIVE:
+                continue
+
+            skip = slot.skipped - slot._skip_applied
+            if skip:
+                slot.source_position += skip
+                slot._skip_applied += skip
+
+            remaining = slot.sample.length - slot.source_position
+            space = slot.ring_frames - slot.available
+            frames = min(remaining, space, self.chunk_frames)
+            if frames <= 0:
+                continue
+
+            chunk = slot.sample.source.read(slot.source_position, frames)
+            frames = len(chunk)
+
+            start = slot.write_count % slot.ring_frames
+            first = min(frames, slot.ring_frames - start)
+            slot.ring[start : start + first] = chunk[:first]
+            if frames > first:
+                slot.ring[: frames - first] = chunk[first:]
+
+            slot.source_position += frames
+            slot.write_count += frames  # Pubblica i dati solo dopo averli copiati
+            total += frames
+
+        return total
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            # Se ha letto qualcosa riparte subito: i ring si riempiono prima
+            if self.fill() == 0:
+                self._stop_event.wait(self.poll_interval)
+
+    def start(self):
+        """Avvia il thread di lettura"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferma il thread di lettura"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
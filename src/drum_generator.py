@@ -739,6 +739,27 @@ class DrumGenerator:
 
         return True
 
+    def export_to_wav(self, output_path: str, sounds=None) -> bool:
+        """
+        Renderizza il pattern generato in un file WAV (offline).
+
+        Args:
+            output_path: Percorso del file WAV di output
+            sounds: SoundLibrary, PrecomputedDrumPool o dizionario di campioni
+                (None = suoni precalcolati)
+
+        Returns:
+            True se exitoso
+        """
+        if not self.generated_pattern:
+            print("[WARN] Nessun pattern da esportare")
+            return False
+
+        from src.offline_renderer import render_to_wav
+
+        render_to_wav(self.generated_pattern, output_path, sounds, self.sample_rate)
+        return True
+
     def export_to_json(self, output_path: str) -> bool:
         """
         Esporta il pattern generato in formato JSON.
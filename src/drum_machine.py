@@ -3,10 +3,16 @@ Modulo per la generazione audio della drum machine
 """
 import numpy as np
 import pygame
+import threading
 import time
 from typing import Dict, Optional, List, Tuple
 from scipy import signal
 from collections import deque
+from src.metronome import Metronome
+from src.sequencer import PatternSequencer
+from src.sample_bank import SampleBank
+from src.low_latency_audio import CHOKE_GROUPS, VOICE_LIMITS
+from src.synthesis_cache import DEFAULT_CACHE_DIR, SynthesisCache, pitched_drum_batch
 
 # Import condizionale per SoundLibrary
 try:
@@ -20,7 +26,8 @@ class DrumMachine:
     """Classe per generare suoni di batteria avanzata"""
     
     def __init__(self, sample_rate: int = 44100, master_volume: float = 0.7, 
-                 use_sound_library: bool = False, library_path: str = "sounds"):
+                 use_sound_library: bool = False, library_path: str = "sounds",
+                 bank_path: Optional[str] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
         """
         Inizializza la drum machine
         
@@ -29,15 +36,31 @@ class DrumMachine:
             master_volume: Volume master (0-1)
             use_sound_library: Se usare la libreria di suoni invece di sintesi
             library_path: Percorso libreria suoni
+            bank_path: Sample bank compilato da usare al posto della sintesi
+            cache_dir: Cartella della cache dei suoni sintetizzati (default: sounds/cache
+                nel progetto, None = sempre sintesi)
         """
         self.sample_rate = sample_rate
         self.channels = 2  # Stereo
+        self.synthesis_cache = SynthesisCache(cache_dir) if cache_dir else None
         self.master_volume = master_volume
         self.use_sound_library = use_sound_library
         
         # Inizializza Pygame mixer
         pygame.mixer.init(frequency=sample_rate, size=-16, channels=self.channels, buffer=512)
         pygame.mixer.set_num_channels(16)  # Più canali per suoni simultanei
+        pygame.mixer.set_reserved(1)  # Canale 0 riservato al metronomo
+        
+        # Polifonia limitata: voci per suono e gruppi di choke (hi-hat)
+        self.voice_limits = dict(VOICE_LIMITS)
+        self.voices_per_drum = 4  # Suoni non elencati in voice_limits
+        self.choke_groups = dict(CHOKE_GROUPS)
+        self.fade_ms = 5  # Fade delle voci rubate o smorzate
+        self._drum_channels: Dict[str, deque] = {}  # (canale, suono) dal più vecchio
+        
+        # play_sound arriva da più thread (pipeline dei colpi, sequencer,
+        # thread principale): canali, cache dei Sound e cooldown sotto lock
+        self._lock = threading.RLock()
         
         # Dizionario per tracciare i tempi di cooldown
         self.last_hit_times = {}
@@ -63,22 +86,37 @@ class DrumMachine:
                 print(f"[WARN] Errore caricamento libreria: {e}")
                 self.use_sound_library = False
         
-        # Genera i suoni base (se non usando libreria)
-        if not self.use_sound_library:
-            self.sounds = self._generate_drum_sounds()
-        else:
+        # Genera i suoni base (se non usando libreria o sample bank)
+        if self.use_sound_library:
             self.sounds = {}  # Sarà popolato dalla libreria
+        else:
+            self.sounds = self._load_bank(bank_path) if bank_path else {}
+            if not self.sounds:
+                self.sounds = self._generate_drum_sounds()
+        
+        # Cache di pygame.mixer.Sound prebuilt per fasce di velocity:
+        # {drum_name: (audio sorgente, [Sound per fascia])}
+        # Il guadagno fine del colpo si applica con Channel.set_volume
+        self.velocity_buckets = 4
+        self._sound_cache: Dict[str, Tuple[np.ndarray, List]] = {}
+        self._build_sound_cache()
         
         # Sistema di registrazione pattern
         self.recording = False
         self.recorded_pattern = []
         self.recording_start_time = 0
+        self.pattern_sequencer: Optional[PatternSequencer] = None
         
-        # Metronomo
+        # Metronomo: battute pre-renderizzate accodate dal mixer sul canale
+        # riservato, così i click restano a tempo indipendentemente dal loop video
+        self.metronome = Metronome(sample_rate, bpm=120)
         self.metronome_enabled = False
         self.metronome_bpm = 120
-        self.metronome_last_beat = 0
         self.metronome_beat_interval = 60.0 / self.metronome_bpm
+        self._metronome_channel = pygame.mixer.Channel(0)
+        self._metronome_sound: Optional[pygame.mixer.Sound] = None
+        self._metronome_thread: Optional[threading.Thread] = None
+        self._metronome_stop = threading.Event()
     
     def _generate_kick(self, duration: float = 0.4) -> np.ndarray:
         """Genera un suono di kick drum più realistico"""
@@ -214,47 +252,71 @@ class DrumMachine:
         
         return wave
     
-    def _generate_tom(self, pitch: float = 150, duration: float = 0.3) -> np.ndarray:
-        """Genera un suono di tom più realistico"""
-        t = np.linspace(0, duration, int(self.sample_rate * duration))
-        
-        # Frequenza fondamentale che decresce
-        freq_start = pitch
-        freq_end = pitch * 0.65
-        freq = np.linspace(freq_start, freq_end, len(t))
+    def _generate_toms(self, pitches: List[float], decays: float = 7,
+                       duration: float = 0.3) -> np.ndarray:
+        """
+        Genera varianti di tom in un solo passaggio vettorializzato
         
-        # Onda con armoniche
-        wave = np.sin(2 * np.pi * freq * t)
-        wave += 0.4 * np.sin(2 * np.pi * freq * 1.8 * t)  # Seconda armonica
-        wave += 0.2 * np.sin(2 * np.pi * freq * 2.5 * t)  # Terza armonica
+        Args:
+            pitches: Frequenze fondamentali (una variante per pitch)
+            decays: Decadimento dell'inviluppo (scalare o uno per variante)
+            duration: Durata (secondi)
         
-        # Envelope con attacco
-        attack = 0.005
-        attack_samples = int(attack * self.sample_rate)
-        envelope = np.ones(len(t))
-        envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-        envelope[attack_samples:] = np.exp(-(t[attack_samples:] - attack) * 7)
-        wave *= envelope
+        Returns:
+            Array (varianti, frame)
+        """
+        # Fondamentale che decresce, con armoniche e attacco breve
+        waves = pitched_drum_batch(
+            self.sample_rate, duration, pitches, decays, end_ratio=0.65,
+            harmonics=((1.0, 1.0), (1.8, 0.4), (2.5, 0.2)), attack=0.005
+        )
         
         # Aggiungi un po' di rumore per il "thud"
-        noise = np.random.normal(0, 0.08, len(t)) * np.exp(-t * 15)
-        wave += noise
+        t = np.linspace(0, duration, waves.shape[1])
+        waves += np.random.normal(0, 0.08, waves.shape) * np.exp(-t * 15)
         
         # Normalizza
-        wave = np.clip(wave, -1, 1) * 0.75
-        
-        return wave
+        return np.clip(waves, -1, 1) * 0.75
+    
+    def _generate_tom(self, pitch: float = 150, duration: float = 0.3) -> np.ndarray:
+        """Genera un suono di tom più realistico"""
+        return self._generate_toms([pitch], duration=duration)[0]
+    
+    def _synthesize(self, name: str, generator, **params) -> np.ndarray:
+        """Suono dalla cache di sintesi (generato e salvato se manca)"""
+        if self.synthesis_cache is None:
+            return generator(**params)
+        return self.synthesis_cache.get(name, self.sample_rate, generator, params)
     
     def _generate_drum_sounds(self) -> Dict[str, np.ndarray]:
-        """Genera tutti i suoni della batteria"""
-        return {
-            'kick': self._generate_kick(),
-            'snare': self._generate_snare(),
-            'hihat': self._generate_hihat(),
-            'crash': self._generate_crash(),
-            'tom1': self._generate_tom(pitch=180),
-            'tom2': self._generate_tom(pitch=160)
+        """Genera tutti i suoni della batteria (o li carica dalla cache)"""
+        sounds = {
+            'kick': self._synthesize('kick', self._generate_kick),
+            'snare': self._synthesize('snare', self._generate_snare),
+            'hihat': self._synthesize('hihat', self._generate_hihat),
+            'crash': self._synthesize('crash', self._generate_crash),
         }
+        
+        # Tom in un unico batch
+        toms = self._synthesize('toms', self._generate_toms, pitches=[180, 160])
+        sounds['tom1'] = toms[0]
+        sounds['tom2'] = toms[1]
+        return sounds
+    
+    def _load_bank(self, bank_path: str) -> Dict[str, np.ndarray]:
+        """Suoni da un sample bank (layer più forte), senza decodifica"""
+        try:
+            bank = SampleBank(bank_path)
+        except Exception as e:
+            print(f"[WARN] Errore caricamento sample bank: {e}")
+            return {}
+        
+        if bank.sample_rate != self.sample_rate:
+            print(f"[WARN] Sample bank a {bank.sample_rate} Hz, uso la sintesi")
+            return {}
+        
+        print(f"[OK] Sample bank caricato: {bank_path}")
+        return {name: bank.get(name) for name in bank.names()}
     
     def _can_play(self, drum_name: str) -> bool:
         """Verifica se è possibile suonare (cooldown)"""
@@ -266,6 +328,51 @@ class DrumMachine:
         time_since_last = current_time - self.last_hit_times[drum_name]
         return time_since_last >= self.cooldown_time
     
+    def _get_source_audio(self, drum_name: str) -> Optional[np.ndarray]:
+        """Audio sorgente di un componente (da libreria o sintesi)"""
+        if self.use_sound_library and self.sound_library:
+            # Render in cache: stesso oggetto finché i parametri non cambiano
+            return self.sound_library.get_audio(drum_name, apply_mods=True)
+        return self.sounds.get(drum_name)
+    
+    def _build_sound_cache(self, drum_name: Optional[str] = None):
+        """
+        Costruisce i pygame.mixer.Sound per ogni fascia di velocity.
+        
+        Ogni fascia è prescalata al guadagno massimo della fascia: il
+        Channel.set_volume del colpo copre solo il residuo dentro la fascia
+        e i colpi piano non perdono risoluzione int16.
+        
+        Args:
+            drum_name: Componente da ricostruire (None = tutti)
+        """
+        if drum_name is None:
+            if self.use_sound_library and self.sound_library:
+                names = self.sound_library.list_samples()
+            else:
+                names = list(self.sounds.keys())
+            for name in names:
+                self._build_sound_cache(name)
+            return
+        
+        source = self._get_source_audio(drum_name)
+        if source is None or len(source) == 0:
+            self._sound_cache.pop(drum_name, None)
+            return
+        
+        base_gain = self.master_volume * self.volumes.get(drum_name, 1.0)
+        
+        # Converti in formato stereo
+        stereo = source if len(source.shape) > 1 else np.column_stack([source, source])
+        
+        bucket_sounds = []
+        for bucket in range(self.velocity_buckets):
+            gain = base_gain * (bucket + 1) / self.velocity_buckets
+            sound_array = (np.clip(stereo * gain, -1, 1) * 32767).astype(np.int16)
+            bucket_sounds.append(pygame.sndarray.make_sound(sound_array))
+        
+        self._sound_cache[drum_name] = (source, bucket_sounds)
+    
     def play_sound(self, drum_name: str, velocity: float = 1.0) -> bool:
         """
         Suona un suono di batteria
@@ -277,45 +384,37 @@ class DrumMachine:
         Returns:
             True se il suono è stato riprodotto, False altrimenti
         """
+        with self._lock:
+            return self._play_sound(drum_name, velocity)
+    
+    def _play_sound(self, drum_name: str, velocity: float) -> bool:
+        """Corpo di play_sound (chiamato con il lock acquisito)"""
         if not self._can_play(drum_name):
             return False
         
-        # Ottieni audio (da libreria o sintesi)
-        sound_array = None
-        
-        if self.use_sound_library and self.sound_library:
-            # Usa libreria suoni
-            audio = self.sound_library.get_audio(drum_name, apply_mods=True)
-            if audio is not None and len(audio) > 0:
-                sound_array = audio.copy()
-        else:
-            # Usa sintesi
-            if drum_name not in self.sounds:
+        # Ricostruisce la cache solo se il campione è cambiato
+        cached = self._sound_cache.get(drum_name)
+        if cached is None or cached[0] is not self._get_source_audio(drum_name):
+            self._build_sound_cache(drum_name)
+            cached = self._sound_cache.get(drum_name)
+            if cached is None:
                 return False
-            sound_array = self.sounds[drum_name].copy()
-        
-        if sound_array is None or len(sound_array) == 0:
-            return False
         
         # Applica la velocità al volume con curva non lineare per suono più naturale
-        velocity = np.clip(velocity, 0, 1)
+        velocity = min(max(float(velocity), 0.0), 1.0)
         velocity_curve = velocity ** 0.7  # Curva più naturale
         
-        # Volume totale = master * componente * velocity
-        volume = self.master_volume * self.volumes.get(drum_name, 1.0) * velocity_curve
+        # Fascia prebuilt + guadagno residuo sul canale
+        bucket = min(int(velocity_curve * self.velocity_buckets), self.velocity_buckets - 1)
+        bucket_gain = (bucket + 1) / self.velocity_buckets
         
-        sound_array = sound_array * volume
+        self._limit_voices(drum_name)
         
-        # Converti in formato stereo
-        if len(sound_array.shape) == 1:
-            sound_array = np.column_stack([sound_array, sound_array])
-        
-        # Converti in formato Pygame
-        sound_array = (sound_array * 32767).astype(np.int16)
-        
-        # Crea e riproduci il suono
-        sound = pygame.sndarray.make_sound(sound_array)
-        sound.play()
+        sound = cached[1][bucket]
+        channel = pygame.mixer.find_channel(True)  # Pool pieno: ruba il canale più vecchio
+        channel.set_volume(velocity_curve / bucket_gain)
+        channel.play(sound)
+        self._drum_channels.setdefault(drum_name, deque()).append((channel, sound))
         
         # Registra se in modalità recording
         if self.recording:
@@ -331,6 +430,44 @@ class DrumMachine:
         
         return True
     
+    def _playing(self, drum_name: str) -> deque:
+        """Canali che stanno ancora suonando un componente (dal più vecchio)"""
+        playing = self._drum_channels.setdefault(drum_name, deque())
+        
+        # Scarta i canali finiti o riassegnati ad altri suoni
+        for _ in range(len(playing)):
+            channel, sound = playing.popleft()
+            if channel.get_busy() and channel.get_sound() is sound:
+                playing.append((channel, sound))
+        return playing
+    
+    def _limit_voices(self, drum_name: str):
+        """Applica choke e limite di voci prima di un nuovo colpo"""
+        group = self.choke_groups.get(drum_name)
+        if group is not None:
+            for other in list(self._drum_channels.keys()):
+                if other != drum_name and self.choke_groups.get(other) == group:
+                    self.choke(other)
+        
+        playing = self._playing(drum_name)
+        limit = self.voice_limits.get(drum_name, self.voices_per_drum)
+        while len(playing) >= limit:
+            channel, _ = playing.popleft()
+            channel.fadeout(self.fade_ms)
+    
+    def choke(self, drum_name: str):
+        """
+        Smorza con un breve fade un componente (es. presa del crash)
+        
+        Args:
+            drum_name: Nome del componente
+        """
+        with self._lock:
+            playing = self._playing(drum_name)
+            for channel, _ in playing:
+                channel.fadeout(self.fade_ms)
+            playing.clear()
+    
     def start_recording(self):
         """Inizia la registrazione di un pattern"""
         self.recording = True
@@ -342,64 +479,140 @@ class DrumMachine:
         self.recording = False
         return self.recorded_pattern.copy()
     
-    def play_pattern(self, pattern: List[Dict], loop: bool = False):
-        """Riproduce un pattern registrato"""
-        if not pattern:
-            return
+    def play_pattern(self, pattern: List[Dict], loop: bool = False,
+                     bpm: Optional[float] = None) -> Optional[PatternSequencer]:
+        """
+        Riproduce un pattern registrato in background.
+        
+        Il sequencer dorme fino a ogni evento invece di controllare il
+        pattern in un loop continuo; la chiamata ritorna subito.
         
-        start_time = time.time()
-        pattern_duration = pattern[-1]['time'] if pattern else 0
-        
-        while True:
-            current_time = time.time() - start_time
-            
-            for event in pattern:
-                if abs(current_time - event['time']) < 0.01:  # Tolleranza 10ms
-                    self.play_sound(event['drum'], event['velocity'])
-            
-            if current_time > pattern_duration:
-                if not loop:
-                    break
-                start_time = time.time()
+        Args:
+            pattern: Eventi {'time', 'drum', 'velocity'}
+            loop: Ripete il pattern finché non si chiama stop_pattern()
+            bpm: Tempo di riproduzione (None = tempo originale, 120 BPM)
+        
+        Returns:
+            Il sequencer avviato (per wait()/set_tempo()), None se vuoto
+        """
+        if not pattern:
+            return None
+        
+        self.stop_pattern()
+        self.pattern_sequencer = PatternSequencer.from_events(
+            pattern, loop=loop, trigger=self.play_sound, sample_rate=self.sample_rate
+        )
+        if bpm is not None:
+            self.pattern_sequencer.set_tempo(bpm)
+        self.pattern_sequencer.start()
+        return self.pattern_sequencer
+    
+    def stop_pattern(self):
+        """Ferma il pattern in riproduzione"""
+        if self.pattern_sequencer is not None:
+            self.pattern_sequencer.stop()
+            self.pattern_sequencer = None
     
     def set_metronome(self, enabled: bool, bpm: int = 120):
-        """Attiva/disattiva il metronomo"""
+        """
+        Attiva/disattiva il metronomo.
+        
+        Un cambio di BPM non riparte dal primo battito: la nuova battuta
+        viene accodata e suona alla fine di quella in corso.
+        """
+        changed = bpm != self.metronome_bpm or self._metronome_sound is None
         self.metronome_enabled = enabled
         self.metronome_bpm = bpm
         self.metronome_beat_interval = 60.0 / bpm
-        self.metronome_last_beat = time.time()
+        
+        if not enabled:
+            self._stop_metronome()
+            return
+        
+        if changed:
+            # La battuta viene costruita solo quando cambiano i BPM
+            self._render_metronome_bar()
+        self._start_metronome()
     
-    def update_metronome(self):
-        """Aggiorna e suona il metronomo se necessario"""
-        if not self.metronome_enabled:
+    def _render_metronome_bar(self):
+        """Costruisce la battuta e, se il metronomo suona, la accoda a quella in corso"""
+        self.metronome.set_tempo(self.metronome_bpm)
+        bar = self.metronome.render_bar(self.channels)
+        bar = (np.clip(bar, -1, 1) * 32767 * self.master_volume).astype(np.int16)
+        with self._lock:
+            self._metronome_sound = pygame.sndarray.make_sound(bar)
+            if self._metronome_channel.get_busy():
+                self._metronome_channel.queue(self._metronome_sound)
+    
+    def _start_metronome(self):
+        """Avvia la battuta e il thread che ne tiene sempre una in coda"""
+        if self._metronome_thread is not None and self._metronome_thread.is_alive():
             return
         
-        current_time = time.time()
-        if current_time - self.metronome_last_beat >= self.metronome_beat_interval:
-            # Genera un click del metronomo
-            t = np.linspace(0, 0.05, int(self.sample_rate * 0.05))
-            click = np.sin(2 * np.pi * 1000 * t) * np.exp(-t * 50)
-            click = np.clip(click, -1, 1) * 0.3
-            
-            if len(click.shape) == 1:
-                click = np.column_stack([click, click])
-            
-            click = (click * 32767 * self.master_volume).astype(np.int16)
-            sound = pygame.sndarray.make_sound(click)
-            sound.play()
-            
-            self.metronome_last_beat = current_time
+        with self._lock:
+            self._metronome_channel.play(self._metronome_sound)
+            self._metronome_channel.queue(self._metronome_sound)
+        
+        self._metronome_stop = threading.Event()
+        self._metronome_thread = threading.Thread(
+            target=self._keep_metronome, args=(self._metronome_stop,), daemon=True
+        )
+        self._metronome_thread.start()
+    
+    def _keep_metronome(self, stop: threading.Event):
+        """
+        Riaccoda la battuta a ogni battito: il mixer concatena le battute
+        senza buchi, il thread deve solo arrivare prima della fine di quella
+        in corso.
+        """
+        while not stop.wait(self.metronome_beat_interval):
+            with self._lock:
+                if not self._metronome_channel.get_busy():
+                    # Canale fermato dall'esterno (es. pygame.mixer.stop())
+                    self._metronome_channel.play(self._metronome_sound)
+                if self._metronome_channel.get_queue() is None:
+                    self._metronome_channel.queue(self._metronome_sound)
+    
+    def _stop_metronome(self):
+        """Ferma il thread del metronomo e il canale riservato"""
+        self._metronome_stop.set()
+        if self._metronome_thread is not None:
+            self._metronome_thread.join()
+            self._metronome_thread = None
+        self._metronome_channel.stop()
+    
+    def update_metronome(self):
+        """
+        Mantenuto per compatibilità: il metronomo è accodato dal mixer e
+        non dipende più dal loop principale.
+        """
+        return
     
     def set_volume(self, drum_name: str, volume: float):
         """Imposta il volume di un componente specifico"""
         if drum_name in self.volumes:
-            self.volumes[drum_name] = np.clip(volume, 0, 1)
+            with self._lock:
+                self.volumes[drum_name] = np.clip(volume, 0, 1)
+                self._build_sound_cache(drum_name)
     
     def set_master_volume(self, volume: float):
         """Imposta il volume master"""
-        self.master_volume = np.clip(volume, 0, 1)
+        with self._lock:
+            self.master_volume = np.clip(volume, 0, 1)
+            self._build_sound_cache()
+        if self.metronome_enabled:
+            # Ricostruisce la battuta con il nuovo volume (dalla prossima battuta)
+            self._render_metronome_bar()
+        else:
+            self._metronome_sound = None  # Ricostruita alla prossima attivazione
     
     def stop_all(self):
         """Ferma tutti i suoni"""
-        pygame.mixer.stop()
+        self.stop_pattern()  # Fuori dal lock: il sequencer può essere dentro play_sound
+        with self._lock:
+            # Tutti i canali tranne quello riservato: il metronomo resta
+            # acceso, come indicato dall'UI
+            for index in range(1, pygame.mixer.get_num_channels()):
+                pygame.mixer.Channel(index).stop()
+            self._drum_channels.clear()
 
@@ -0,0 +1,72 @@
+"""
+Utility DSP Condivise
+
+Operazioni audio usate da più moduli:
+- Somma dei blocchi nel percorso callback (mixer delle voci, streaming da disco)
+- Lettura e ricampionamento dei campioni al sample rate di destinazione
+"""
+
+import math
+import numpy as np
+from typing import Optional
+from scipy import signal
+
+
+def accumulate(target: np.ndarray, chunk: np.ndarray, gain: float,
+               scratch: Optional[np.ndarray] = None):
+    """
+    target += chunk * gain
+
+    Args:
+        target: Blocco di destinazione (modificato sul posto)
+        chunk: Frame da sommare, stessa forma di target
+        gain: Guadagno applicato a chunk
+        scratch: Buffer di lavoro lungo almeno len(chunk): se presente
+            nessuna allocazione (uso dal callback audio)
+    """
+    if scratch is not None:
+        work = scratch[: len(chunk)]
+        np.multiply(chunk, gain, out=work)
+        np.add(target, work, out=target)
+    else:
+        target += chunk * gain
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Ricampiona lungo l'asse dei frame (mono o (frames, canali))
+
+    Args:
+        audio: Campione alla frequenza orig_sr
+        orig_sr: Frequenza di campionamento del campione
+        target_sr: Frequenza di destinazione
+
+    Returns:
+        Campione float32 a target_sr (lo stesso array se le frequenze coincidono)
+    """
+    if orig_sr == target_sr:
+        return audio
+    divisor = math.gcd(int(orig_sr), int(target_sr))
+    resampled = signal.resample_poly(audio, target_sr // divisor, orig_sr // divisor, axis=0)
+    return resampled.astype(np.float32)
+
+
+def read_audio(path: str, sample_rate: int) -> np.ndarray:
+    """
+    Legge un file audio come campione mono float32
+
+    Args:
+        path: File audio (qualsiasi formato supportato da soundfile)
+        sample_rate: Frequenza di destinazione
+
+    Returns:
+        Campione mono ricampionato a sample_rate
+    """
+    import soundfile as sf
+
+    data, sr = sf.read(path, dtype="float32")
+
+    if data.ndim > 1:
+        data = np.mean(data, axis=1)
+
+    return resample(data, sr, sample_rate)
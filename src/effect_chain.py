@@ -0,0 +1,324 @@
+"""
+Catena di Effetti in Streaming
+
+Effetti causali a blocchi, pensati per girare nel callback audio
+(per voce o per bus) invece di ri-renderizzare l'intero campione:
+- Filtri biquad in SOS con stato persistente tra i blocchi
+- Envelope attack/decay riattivabile
+- Drive (soft clipping)
+- Pan (bilanciamento stereo)
+
+I coefficienti vengono ricalcolati solo quando cambia un parametro;
+il lavoro per blocco è solo il filtraggio, su buffer preallocati
+(nessuna allocazione nel callback).
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+try:
+    from scipy import signal
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Kernel compilato di sosfilt: filtra sul posto segnale e stato, mentre
+# signal.sosfilt copia entrambi a ogni chiamata
+try:
+    from scipy.signal._sosfilt import _sosfilt as _sosfilt_inplace
+except ImportError:
+    _sosfilt_inplace = None
+
+
+class FilterStage:
+    """
+    Filtro Butterworth passa-basso/passa-alto in SOS con stato persistente.
+
+    Il blocco viene copiato in un buffer di lavoro preallocato (un canale
+    per riga, float64) e filtrato sul posto insieme allo stato. Senza il
+    kernel compilato di scipy si ripiega su signal.sosfilt, che alloca a
+    ogni blocco (allocation_free = False).
+    """
+
+    allocation_free = _sosfilt_inplace is not None
+
+    def __init__(self, kind: str = 'lowpass', cutoff: Optional[float] = None,
+                 order: int = 4, sample_rate: int = 44100, channels: int = 2,
+                 max_frames: int = 4096):
+        """
+        Args:
+            kind: 'lowpass' o 'highpass'
+            cutoff: Frequenza di taglio in Hz (None = bypass)
+            order: Ordine del filtro
+            sample_rate: Frequenza di campionamento
+            channels: Numero di canali
+            max_frames: Dimensione massima del blocco
+        """
+        self.kind = kind
+        self.order = order
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        self.cutoff: Optional[float] = None
+        self._sos: Optional[np.ndarray] = None
+        self._zi: Optional[np.ndarray] = None  # (channels, sezioni, 2)
+        self._work = np.zeros(max_frames * channels, dtype=np.float64)
+        self.set_cutoff(cutoff)
+
+    @property
+    def active(self) -> bool:
+        return self._sos is not None
+
+    def set_cutoff(self, cutoff: Optional[float]):
+        """Riprogetta i coefficienti (solo se la frequenza cambia)"""
+        if cutoff == self.cutoff:
+            return
+        self.cutoff = cutoff
+
+        nyquist = self.sample_rate / 2
+        bypass = (
+            not SCIPY_AVAILABLE
+            or cutoff is None
+            or (self.kind == 'lowpass' and cutoff >= min(20000, nyquist * 0.99))
+            or (self.kind == 'highpass' and cutoff <= 0)
+        )
+        if bypass:
+            self._sos = None
+            return
+
+        cutoff = min(cutoff, nyquist * 0.99)
+        sos = signal.butter(self.order, cutoff, self.kind, fs=self.sample_rate, output='sos')
+
+        # Lo stato resta valido se cambia solo la frequenza (stesse sezioni);
+        # riparte da zero se il filtro era in bypass
+        if self._sos is None or self._zi is None or self._zi.shape[1] != len(sos):
+            self._zi = np.zeros((self.channels, len(sos), 2))
+        self._sos = sos
+
+    def reset(self):
+        """Azzera lo stato del filtro"""
+        if self._zi is not None:
+            self._zi.fill(0.0)
+
+    def process(self, block: np.ndarray):
+        """Filtra il blocco (frames, channels) in place"""
+        # Copia locale: set_cutoff può essere chiamato da un altro thread
+        sos, zi = self._sos, self._zi
+        if sos is None or zi is None:
+            return
+
+        frames = len(block)
+        if frames * self.channels > len(self._work):
+            self._work = np.zeros(frames * self.channels, dtype=np.float64)
+
+        # Vista (channels, frames) contigua sul buffer piatto: niente copie
+        work = self._work[:frames * self.channels].reshape(self.channels, frames)
+        np.copyto(work, block.T)
+        if _sosfilt_inplace is not None:
+            _sosfilt_inplace(sos, work, zi)
+        else:
+            filtered, zf = signal.sosfilt(sos, work, axis=-1, zi=zi.transpose(1, 0, 2))
+            work[:] = filtered
+            zi[:] = zf.transpose(1, 0, 2)
+        np.copyto(block, work.T, casting='same_kind')
+
+
+class EnvelopeStage:
+    """Envelope attack/decay esponenziale, riattivato da trigger()"""
+
+    def __init__(self, attack: float = 0.0, decay: float = 0.0,
+                 sample_rate: int = 44100, max_frames: int = 4096):
+        """
+        Args:
+            attack: Tempo di attacco in secondi (0 = immediato)
+            decay: Costante di decadimento in secondi (0 = nessun decay)
+            sample_rate: Frequenza di campionamento
+            max_frames: Dimensione massima del blocco
+        """
+        self.sample_rate = sample_rate
+        self.attack = attack
+        self.decay = decay
+        self.position = 0  # Campioni dall'ultimo trigger
+
+        self._ramp = np.arange(max_frames, dtype=np.float64)
+        self._gain = np.zeros(max_frames, dtype=np.float64)
+        self._decay = np.zeros(max_frames, dtype=np.float64)
+
+    @property
+    def active(self) -> bool:
+        return self.attack > 0 or self.decay > 0
+
+    def trigger(self):
+        """Riparte dall'inizio dell'envelope"""
+        self.position = 0
+
+    def process(self, block: np.ndarray):
+        """Applica l'envelope al blocco in place (senza allocazioni)"""
+        if not self.active:
+            return
+
+        frames = len(block)
+        if frames > len(self._ramp):
+            self._ramp = np.arange(frames, dtype=np.float64)
+            self._gain = np.zeros(frames, dtype=np.float64)
+            self._decay = np.zeros(frames, dtype=np.float64)
+
+        # Tempo in secondi dall'ultimo trigger
+        gain = self._gain[:frames]
+        np.add(self._ramp[:frames], self.position, out=gain)
+        np.divide(gain, self.sample_rate, out=gain)
+
+        if self.decay > 0:
+            decay = self._decay[:frames]
+            np.divide(gain, -self.decay, out=decay)
+            np.exp(decay, out=decay)
+
+        if self.attack > 0:
+            np.divide(gain, self.attack, out=gain)
+            np.clip(gain, 0.0, 1.0, out=gain)
+            if self.decay > 0:
+                np.multiply(gain, decay, out=gain)
+        else:
+            gain[:] = decay
+
+        block *= gain[:, np.newaxis]
+        self.position += frames
+
+
+class DriveStage:
+    """Soft clipping con tanh, mix dry/wet come SoundSample._apply_distortion"""
+
+    def __init__(self, amount: float = 0.0, channels: int = 2, max_frames: int = 4096):
+        self.amount = amount
+        self._scratch = np.zeros((max_frames, channels), dtype=np.float32)
+
+    @property
+    def active(self) -> bool:
+        return self.amount > 0
+
+    def process(self, block: np.ndarray):
+        """Applica la distorsione in place"""
+        if self.amount <= 0:
+            return
+
+        frames = len(block)
+        if frames > len(self._scratch):
+            self._scratch = np.zeros((frames, block.shape[1]), dtype=np.float32)
+
+        wet = self._scratch[:frames]
+        np.multiply(block, 1 + self.amount * 10, out=wet)
+        np.tanh(wet, out=wet)
+        np.multiply(wet, self.amount, out=wet)
+        np.multiply(block, 1 - self.amount, out=block)
+        np.add(block, wet, out=block)
+
+
+class PanStage:
+    """Bilanciamento stereo (-1 = sinistra, 1 = destra): attenua solo il lato opposto"""
+
+    def __init__(self, pan: float = 0.0):
+        self.pan = 0.0
+        self._gains = np.ones(2, dtype=np.float32)
+        self.set_pan(pan)
+
+    @property
+    def active(self) -> bool:
+        return self.pan != 0.0
+
+    def set_pan(self, pan: float):
+        """Ricalcola i guadagni dei canali"""
+        self.pan = float(np.clip(pan, -1.0, 1.0))
+        # Pan 0 lascia il segnale invariato, nessun lato supera il guadagno 1
+        self._gains[0] = min(1.0, 1.0 - self.pan)
+        self._gains[1] = min(1.0, 1.0 + self.pan)
+
+    def process(self, block: np.ndarray):
+        """Applica il pan in place"""
+        if self.pan == 0.0 or block.shape[1] != 2:
+            return
+        np.multiply(block, self._gains, out=block)
+
+
+class EffectChain:
+    """
+    Catena di effetti a blocchi: envelope -> highpass -> lowpass -> drive -> pan.
+
+    I parametri usano gli stessi nomi di SoundSample.parameters dove hanno
+    lo stesso significato ('lowpass_freq', 'highpass_freq', 'distortion',
+    'pan'); l'envelope è in secondi ('attack_time', 'decay_time').
+    """
+
+    PARAMETERS = ('lowpass_freq', 'highpass_freq', 'distortion', 'pan',
+                  'attack_time', 'decay_time')
+
+    def __init__(self, sample_rate: int = 44100, channels: int = 2,
+                 max_frames: int = 4096, order: int = 4):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        self.envelope = EnvelopeStage(sample_rate=sample_rate, max_frames=max_frames)
+        self.highpass = FilterStage('highpass', None, order, sample_rate, channels, max_frames)
+        self.lowpass = FilterStage('lowpass', None, order, sample_rate, channels, max_frames)
+        self.drive = DriveStage(channels=channels, max_frames=max_frames)
+        self.pan = PanStage()
+
+        self._stages = [self.envelope, self.highpass, self.lowpass, self.drive, self.pan]
+
+    @classmethod
+    def from_sample_parameters(cls, parameters: Dict, sample_rate: int = 44100,
+                               channels: int = 2) -> 'EffectChain':
+        """Crea una catena dai parametri di un SoundSample"""
+        chain = cls(sample_rate=sample_rate, channels=channels)
+        for name in cls.PARAMETERS:
+            if name in parameters:
+                chain.set_parameter(name, parameters[name])
+        return chain
+
+    def set_parameter(self, name: str, value: float):
+        """Imposta un parametro (i coefficienti si ricalcolano solo se cambia)"""
+        if name == 'lowpass_freq':
+            self.lowpass.set_cutoff(value)
+        elif name == 'highpass_freq':
+            self.highpass.set_cutoff(value)
+        elif name == 'distortion':
+            self.drive.amount = value
+        elif name == 'pan':
+            self.pan.set_pan(value)
+        elif name == 'attack_time':
+            self.envelope.attack = value
+        elif name == 'decay_time':
+            self.envelope.decay = value
+
+    @property
+    def active(self) -> bool:
+        """True se almeno uno stadio modifica il segnale"""
+        return any(stage.active for stage in self._stages)
+
+    def trigger(self):
+        """Nuovo colpo: riparte l'envelope"""
+        self.envelope.trigger()
+
+    def reset(self):
+        """Azzera lo stato di tutti gli stadi"""
+        self.highpass.reset()
+        self.lowpass.reset()
+        self.envelope.trigger()
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Processa un blocco (frames, channels) in place.
+
+        Returns:
+            Lo stesso blocco processato
+        """
+        for stage in self._stages:
+            stage.process(block)
+        return block
+
+    def process_buffer(self, audio: np.ndarray, block_size: int = 256) -> np.ndarray:
+        """Processa un buffer intero a blocchi (es. render offline)"""
+        stereo = audio if audio.ndim == 2 else np.repeat(audio[:, np.newaxis], self.channels, axis=1)
+        output = np.array(stereo, dtype=np.float32)
+        for start in range(0, len(output), block_size):
+            self.process(output[start:start + block_size])
+        return output
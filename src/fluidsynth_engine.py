@@ -6,15 +6,19 @@ Motore audio usando FluidSynth per suoni realistici:
 - Sintesi MIDI via pyFluidSynth
 - Output via sounddevice
 - Supporta MIDI out per DAW esterni
+- Processo audio separato con trigger in memoria condivisa
 """
 
 import os
 import time
+import heapq
 import numpy as np
 from typing import Optional, Dict, List
 from dataclasses import dataclass
-from queue import Queue
-from multiprocessing import Process, Queue as MPQueue
+from multiprocessing import Process, Event
+from multiprocessing.shared_memory import SharedMemory
+
+from src.trigger_ring import TriggerRingBuffer
 
 # Check availability
 FLUIDSYNTH_AVAILABLE = False
@@ -62,6 +66,7 @@ class FluidSynthConfig:
     channels: int = 2
     soundfont_path: Optional[str] = None
     midi_device: Optional[str] = None
+    note_length: float = 0.1  # Secondi tra noteon e noteoff
 
 
 class FluidSynthEngine:
@@ -77,24 +82,43 @@ class FluidSynthEngine:
         "https://musicalartifacts.com/artefacts/6/Training-2.sf2",
     ]
 
-    def __init__(self, config: Optional[FluidSynthConfig] = None):
+    # MIDI notes per componenti
+    DRUM_NOTES = {
+        "kick": 36,
+        "snare": 38,
+        "hihat": 42,
+        "crash": 49,
+        "tom1": 48,
+        "tom2": 45,
+    }
+
+    def __init__(
+        self,
+        config: Optional[FluidSynthConfig] = None,
+        triggers: Optional[TriggerRingBuffer] = None,
+    ):
+        """
+        Args:
+            config: Configurazione
+            triggers: Ring buffer esterno (es. in memoria condivisa)
+        """
         self.config = config or FluidSynthConfig()
         self.synth = None
         self.running = False
 
-        self.event_queue: Queue = Queue(maxsize=128)
+        # Ring buffer SPSC: drum_id = nota MIDI
+        self.triggers = triggers if triggers is not None else TriggerRingBuffer(256)
+        self._drained = self.triggers.make_drain_buffer()
+
+        # Note off programmati: heap di (scadenza, nota); _note_off_due tiene
+        # la scadenza valida per nota (un nuovo colpo rinvia il noteoff)
+        self._note_offs: List = []
+        self._note_off_due: Dict[int, float] = {}
 
         self._stream = None
+        self.midi_out = None
 
-        # MIDI notes per componenti
-        self.drum_notes = {
-            "kick": 36,
-            "snare": 38,
-            "hihat": 42,
-            "crash": 49,
-            "tom1": 48,
-            "tom2": 45,
-        }
+        self.drum_notes = dict(self.DRUM_NOTES)
 
     def initialize(self) -> bool:
         """Inizializza il motore"""
@@ -197,44 +221,83 @@ class FluidSynthEngine:
             return
 
         note = self.drum_notes.get(drum_name, 36)
-        vel = int(velocity * 127)
 
-        event = {"note": note, "velocity": vel, "timestamp": time.perf_counter()}
+        # Se il ring buffer è pieno l'evento viene scartato
+        self.triggers.push(note, velocity, time.perf_counter())
 
-        try:
-            self.event_queue.put_nowait(event)
-        except:
-            pass
+    def process_events(self, now: Optional[float] = None):
+        """
+        Processa tutti gli eventi pendenti senza bloccare.
+
+        I noteon partono subito, tutti insieme; i noteoff vengono
+        programmati e inviati alla scadenza dalle chiamate successive.
+
+        Args:
+            now: Istante corrente (perf_counter), None = adesso
+        """
+        if now is None:
+            now = time.perf_counter()
+
+        n = self.triggers.drain(self._drained)
+        if n > 0:
+            notes = self._drained["drum_id"][:n].tolist()
+            velocities = (self._drained["velocity"][:n] * 127).astype(np.int32).tolist()
 
-    def process_events(self):
-        """Processa eventi dalla coda"""
-        while not self.event_queue.empty():
             try:
-                event = self.event_queue.get_nowait()
+                for note, velocity in zip(notes, velocities):
+                    if self.synth is not None:
+                        self.synth.noteon(0, note, velocity)
+                    if self.midi_out:
+                        self.midi_out.send_noteon(0, note, velocity)
+            except Exception as e:
+                print(f"[WARN] Evento MIDI: {e}")
 
-                if self.synth and FLUIDSYNTH_AVAILABLE:
-                    self.synth.noteon(0, event["note"], 0, event["velocity"])
-                    # Note off dopo breve tempo
-                    time.sleep(0.1)
-                    self.synth.noteoff(0, event["note"], 0)
+            due = now + self.config.note_length
+            for note in notes:
+                self._note_off_due[note] = due
+                heapq.heappush(self._note_offs, (due, note))
 
-                # MIDI out
-                if hasattr(self, "midi_out") and self.midi_out:
-                    self.midi_out.send_noteon(0, event["note"], event["velocity"])
-                    time.sleep(0.1)
-                    self.midi_out.send_noteoff(0, event["note"])
+        self._send_due_note_offs(now)
 
-            except:
-                break
+    def _send_due_note_offs(self, now: float):
+        """Invia i noteoff scaduti"""
+        heap = self._note_offs
+
+        while heap and heap[0][0] <= now:
+            due, note = heapq.heappop(heap)
+
+            # Voce obsoleta: la nota è stata ricolpita dopo
+            if self._note_off_due.get(note) != due:
+                continue
+            del self._note_off_due[note]
+
+            try:
+                if self.synth is not None:
+                    self.synth.noteoff(0, note)
+                if self.midi_out:
+                    self.midi_out.send_noteoff(0, note)
+            except Exception as e:
+                print(f"[WARN] Evento MIDI: {e}")
+
+    def next_note_off_delay(self, now: Optional[float] = None) -> Optional[float]:
+        """Secondi al prossimo noteoff (None se nessuno è programmato)"""
+        if not self._note_offs:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        return max(0.0, self._note_offs[0][0] - now)
 
     def stop(self):
         """Ferma il motore"""
         self.running = False
 
+        # Chiude le note ancora aperte
+        self._send_due_note_offs(float("inf"))
+
         if self.synth:
             self.synth.stop()
 
-        if hasattr(self, "midi_out") and self.midi_out:
+        if self.midi_out:
             self.midi_out.close_port()
 
         print("[OK] FluidSynth fermato")
@@ -244,43 +307,106 @@ class FluidSynthAudioProcess:
     """
     Processo audio separato per FluidSynth.
 
-    Esegue in processo separato per evitare GIL.
+    Esegue in processo separato per evitare GIL. I trigger passano da un
+    ring buffer in memoria condivisa (nessun pickle per evento) e un
+    Event sveglia il processo audio solo quando serve.
     """
 
-    def __init__(self, config: FluidSynthConfig):
+    def __init__(self, config: FluidSynthConfig, capacity: int = 256):
         self.config = config
+        self.capacity = capacity
         self.process: Optional[Process] = None
-        self.event_queue: Optional[MPQueue] = None
+        self.drum_notes = dict(FluidSynthEngine.DRUM_NOTES)
+
+        self.triggers: Optional[TriggerRingBuffer] = None
+        self._shm: Optional[SharedMemory] = None
+        self._wakeup = None
+        self._stop_event = None
 
     def start(self):
         """Avvia processo audio"""
-        self.event_queue = MPQueue()
+        size = TriggerRingBuffer.nbytes(self.capacity)
+        self._shm = SharedMemory(create=True, size=size)
+        self._shm.buf[:size] = bytes(size)
+        self.triggers = TriggerRingBuffer(self.capacity, buffer=self._shm.buf)
+
+        self._wakeup = Event()
+        self._stop_event = Event()
 
         self.process = Process(
-            target=self._audio_loop, args=(self.config, self.event_queue)
+            target=self._audio_loop,
+            args=(
+                self.config,
+                self._shm.name,
+                self.capacity,
+                self._wakeup,
+                self._stop_event,
+            ),
+            daemon=True,
         )
         self.process.start()
 
         print(f"[OK] Processo audio avviato (PID: {self.process.pid})")
 
+    def play(self, drum_name: str, velocity: float = 1.0):
+        """
+        Invia un trigger al processo audio (lato producer, un solo thread).
+
+        Scrive solo nel ring condiviso: nessuna serializzazione.
+        """
+        if self.triggers is None:
+            return
+
+        note = self.drum_notes.get(drum_name, 36)
+        if self.triggers.push(note, velocity, time.perf_counter()):
+            self._wakeup.set()
+
     @staticmethod
-    def _audio_loop(config: FluidSynthConfig, event_queue: MPQueue):
+    def _audio_loop(
+        config: FluidSynthConfig,
+        shm_name: str,
+        capacity: int,
+        wakeup,
+        stop_event,
+    ):
         """Loop del processo audio"""
-        engine = FluidSynthEngine(config)
+        shm = SharedMemory(name=shm_name)
+
+        triggers = TriggerRingBuffer(capacity, buffer=shm.buf)
+        engine = FluidSynthEngine(config, triggers=triggers)
         engine.initialize()
 
-        while True:
-            # Processa eventi
-            engine.process_events()
-            time.sleep(0.001)
+        try:
+            while not stop_event.is_set():
+                # Dorme fino al prossimo trigger o al prossimo noteoff
+                timeout = engine.next_note_off_delay()
+                wakeup.wait(0.1 if timeout is None else timeout)
+                wakeup.clear()
+
+                engine.process_events()
+        finally:
+            engine.stop()
+            del triggers, engine
+            shm.close()
 
     def stop(self):
         """Ferma processo"""
         if self.process:
-            self.process.terminate()
-            self.process.join()
+            self._stop_event.set()
+            self._wakeup.set()
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
             print("[OK] Processo audio fermato")
 
+        if self._shm is not None:
+            self.triggers = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
 
 def create_fluidsynth_engine(
     soundfont: Optional[str] = None, sample_rate: int = 44100
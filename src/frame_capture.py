@@ -0,0 +1,172 @@
+"""
+Cattura Video in Thread
+
+Stadio di cattura separato dal loop principale:
+- Un thread legge continuamente dalla videocamera
+- Slot "ultimo frame": ogni frame sovrascrive il precedente, quelli non
+  letti vengono scartati (nessuna coda che accumula ritardo)
+- Ogni frame ha timestamp (time.perf_counter() subito dopo grab(), lo
+  stesso clock del motore audio) e numero di sequenza
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+# (frame, timestamp, sequenza)
+FrameInfo = Tuple[np.ndarray, float, int]
+
+
+class LatestFrameSlot:
+    """Slot a un elemento: il producer sovrascrive, il consumer legge il più recente"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp = 0.0
+        self.sequence = 0  # Frame pubblicati
+        self.read_sequence = 0  # Ultimo frame consegnato al consumer
+        self.dropped = 0  # Frame sovrascritti senza essere letti
+
+    def publish(self, frame: np.ndarray, timestamp: float):
+        """Pubblica un frame (lato producer)"""
+        with self._condition:
+            if self.sequence > self.read_sequence:
+                self.dropped += 1
+            self._frame = frame
+            self._timestamp = timestamp
+            self.sequence += 1
+            self._condition.notify_all()
+
+    def latest(self) -> Optional[FrameInfo]:
+        """Ultimo frame pubblicato (anche se già letto)"""
+        with self._condition:
+            if self._frame is None:
+                return None
+            self.read_sequence = self.sequence
+            return self._frame, self._timestamp, self.sequence
+
+    def wait_newer(self, sequence: int, timeout: Optional[float] = None) -> Optional[FrameInfo]:
+        """
+        Attende un frame più recente di `sequence`.
+
+        Returns:
+            (frame, timestamp, sequenza) o None allo scadere del timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.sequence > sequence, timeout):
+                return None
+            self.read_sequence = self.sequence
+            return self._frame, self._timestamp, self.sequence
+
+
+class ThreadedCapture:
+    """
+    Thread di cattura da una sorgente tipo cv2.VideoCapture.
+
+    Il frame pubblicato non viene più modificato dal thread: il consumer
+    può tenerlo e disegnarci sopra senza copie.
+    """
+
+    def __init__(
+        self,
+        capture,
+        transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        retry_interval: float = 0.01,
+    ):
+        """
+        Args:
+            capture: Sorgente con grab()/retrieve() o read() (es. cv2.VideoCapture)
+            transform: Elaborazione nel thread di cattura (es. specchiatura)
+            retry_interval: Attesa dopo una lettura fallita (secondi)
+        """
+        self.capture = capture
+        self.transform = transform
+        self.retry_interval = retry_interval
+        self.slot = LatestFrameSlot()
+
+        self.failures = 0  # Letture fallite
+        self._last_sequence = 0  # Ultimo frame consegnato da read()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Frequenza di cattura misurata
+        self.fps = 0.0
+        self._fps_frames = 0
+        self._fps_start = time.perf_counter()
+
+    def _grab(self) -> Optional[Tuple[np.ndarray, float]]:
+        """Legge un frame e il suo timestamp (preso appena acquisito, prima della decodifica)"""
+        if hasattr(self.capture, "grab") and hasattr(self.capture, "retrieve"):
+            if not self.capture.grab():
+                return None
+            timestamp = time.perf_counter()
+            ok, frame = self.capture.retrieve()
+        else:
+            ok, frame = self.capture.read()
+            timestamp = time.perf_counter()
+
+        if not ok or frame is None:
+            return None
+        return frame, timestamp
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            grabbed = self._grab()
+            if grabbed is None:
+                self.failures += 1
+                self._stop_event.wait(self.retry_interval)
+                continue
+
+            frame, timestamp = grabbed
+            if self.transform is not None:
+                frame = self.transform(frame)
+            self.slot.publish(frame, timestamp)
+
+            self._fps_frames += 1
+            elapsed = timestamp - self._fps_start
+            if elapsed >= 1.0:
+                self.fps = self._fps_frames / elapsed
+                self._fps_frames = 0
+                self._fps_start = timestamp
+
+    def start(self):
+        """Avvia il thread di cattura"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferma il thread di cattura"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def read(self, timeout: Optional[float] = 0.1) -> Optional[FrameInfo]:
+        """
+        Frame più recente non ancora consegnato (attende se non ce n'è uno nuovo).
+
+        Returns:
+            (frame, timestamp, sequenza) o None allo scadere del timeout
+        """
+        info = self.slot.wait_newer(self._last_sequence, timeout)
+        if info is not None:
+            self._last_sequence = info[2]
+        return info
+
+    def get_stats(self) -> dict:
+        """Statistiche di cattura"""
+        return {
+            "fps": self.fps,
+            "frames": self.slot.sequence,
+            "dropped": self.slot.dropped,
+            "failures": self.failures,
+        }
@@ -0,0 +1,263 @@
+"""
+Filtri dei Keypoint a Bassa Latenza
+
+Filtri adattivi per le posizioni della posa (array articolazioni × 3):
+- One Euro: passa-basso con frequenza di taglio che cresce con la
+  velocità, molto liscio da fermo e quasi senza ritardo nei colpi veloci
+- Kalman a velocità costante: stima posizione e velocità insieme
+  (un filtro 2×2 indipendente per coordinata, vettorializzato)
+- Media mobile: il comportamento storico (ritardo ~ (storia - 1) / 2 frame)
+
+Ogni filtro produce anche velocità e accelerazione (unità/s e unità/s²)
+usate per l'intensità dei colpi e la predizione delle traiettorie.
+"""
+
+import math
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from src.keypoints import JOINTS, KeypointHistory
+
+# Modalità selezionabili in MotionTracker
+FILTER_MODES = ("one_euro", "kalman", "average")
+
+
+def _smoothing_factor(cutoff, dt: float):
+    """Alfa del passa-basso esponenziale per una frequenza di taglio (Hz)"""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class KeypointFilter(ABC):
+    """
+    Base dei filtri: gestisce tempi, reset e derivate.
+
+    Le sottoclassi implementano solo _filter() (e _start() se hanno
+    stato proprio); update() calcola dt, riparte dopo le pause e ricava
+    l'accelerazione dalla velocità.
+
+    position, velocity e acceleration sono array nuovi a ogni update():
+    si possono passare ad altri thread senza copie.
+    """
+
+    def __init__(self, joints: int = len(JOINTS), acceleration_cutoff: float = 10.0,
+                 max_gap: float = 0.25):
+        """
+        Args:
+            joints: Articolazioni per frame
+            acceleration_cutoff: Taglio (Hz) del passa-basso sull'accelerazione
+            max_gap: Pausa oltre la quale il filtro riparte da zero (secondi,
+                es. posa persa per qualche frame)
+        """
+        self.joints = joints
+        self.acceleration_cutoff = acceleration_cutoff
+        self.max_gap = max_gap
+
+        self.position = np.zeros((joints, 3), dtype=np.float32)
+        self.velocity = np.zeros((joints, 3), dtype=np.float32)
+        self.acceleration = np.zeros((joints, 3), dtype=np.float32)
+        self.timestamp: Optional[float] = None
+
+        self._position = np.zeros((joints, 3))  # Stato interno in float64
+        self._velocity = np.zeros((joints, 3))
+        self._acceleration = np.zeros((joints, 3))
+
+    def reset(self):
+        """Dimentica lo stato: il prossimo frame riparte senza storia"""
+        self.timestamp = None
+
+    def update(self, frame: np.ndarray, timestamp: float) -> np.ndarray:
+        """
+        Filtra un frame.
+
+        Args:
+            frame: Posizioni misurate (articolazioni × 3)
+            timestamp: Istante di acquisizione (secondi, perf_counter())
+
+        Returns:
+            Posizioni filtrate (nuovo array float32)
+        """
+        measured = np.asarray(frame, dtype=np.float64)
+        dt = None if self.timestamp is None else timestamp - self.timestamp
+
+        if dt is None or dt > self.max_gap:
+            self._start(measured)
+            self._velocity[:] = 0.0
+            self._acceleration[:] = 0.0
+        elif dt > 0:
+            previous_velocity = self._velocity.copy()
+            self._filter(measured, dt)
+
+            # Accelerazione: derivata della velocità, passa-basso contro il rumore
+            alpha = _smoothing_factor(self.acceleration_cutoff, dt)
+            raw = (self._velocity - previous_velocity) / dt
+            self._acceleration += alpha * (raw - self._acceleration)
+        else:
+            # Stesso timestamp (frame duplicato): nulla da aggiornare
+            return self.position
+
+        self.timestamp = timestamp
+        self.position = self._position.astype(np.float32)
+        self.velocity = self._velocity.astype(np.float32)
+        self.acceleration = self._acceleration.astype(np.float32)
+        return self.position
+
+    def _start(self, measured: np.ndarray):
+        """Primo frame (o dopo una pausa): la posizione è la misura"""
+        self._position[:] = measured
+
+    @abstractmethod
+    def _filter(self, measured: np.ndarray, dt: float):
+        """
+        Passo del filtro: aggiorna sul posto _position e _velocity.
+
+        Args:
+            measured: Posizioni misurate (articolazioni × 3, float64)
+            dt: Secondi dal frame precedente (sempre > 0 e <= max_gap)
+        """
+
+
+class OneEuroFilter(KeypointFilter):
+    """
+    Filtro One Euro (Casiez et al.) vettorializzato.
+
+    Il taglio è min_cutoff + beta * |velocità| per articolazione: jitter
+    filtrato da fermo, ritardo trascurabile durante i colpi.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 20.0, d_cutoff: float = 1.0,
+                 velocity_cutoff: float = 15.0, **kwargs):
+        """
+        Args:
+            min_cutoff: Taglio a velocità nulla (Hz), più basso = più liscio
+            beta: Crescita del taglio con la velocità, più alto = meno ritardo
+            d_cutoff: Taglio della derivata che guida l'adattamento (Hz)
+            velocity_cutoff: Taglio della velocità restituita (Hz)
+        """
+        super().__init__(**kwargs)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.velocity_cutoff = velocity_cutoff
+        self._dx = np.zeros((self.joints, 3))  # Derivata filtrata della misura
+
+    def _start(self, measured: np.ndarray):
+        super()._start(measured)
+        self._dx[:] = 0.0
+
+    def _filter(self, measured: np.ndarray, dt: float):
+        previous = self._position.copy()
+
+        # Derivata della misura, filtrata, per scegliere il taglio
+        alpha_d = _smoothing_factor(self.d_cutoff, dt)
+        self._dx += alpha_d * ((measured - previous) / dt - self._dx)
+
+        speed = np.linalg.norm(self._dx, axis=1, keepdims=True)
+        alpha = _smoothing_factor(self.min_cutoff + self.beta * speed, dt)
+        self._position += alpha * (measured - previous)
+
+        # Velocità: derivata della posizione filtrata (segue già i colpi veloci)
+        alpha_v = _smoothing_factor(self.velocity_cutoff, dt)
+        self._velocity += alpha_v * ((self._position - previous) / dt - self._velocity)
+
+
+class KalmanKeypointFilter(KeypointFilter):
+    """
+    Kalman a velocità costante, stato (posizione, velocità) per coordinata.
+
+    Le coordinate sono indipendenti: la covarianza 2×2 è tenuta in tre
+    array (p00, p01, p11) e aggiornata per tutte le articolazioni insieme.
+    """
+
+    def __init__(self, process_noise: float = 1.0, measurement_noise: float = 2.5e-5,
+                 **kwargs):
+        """
+        Args:
+            process_noise: Densità spettrale dell'accelerazione (unità²/s³),
+                più alta = segue prima i cambi di direzione
+            measurement_noise: Varianza del rumore di MediaPipe (unità²)
+        """
+        super().__init__(**kwargs)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        shape = (self.joints, 3)
+        self._p00 = np.zeros(shape)
+        self._p01 = np.zeros(shape)
+        self._p11 = np.zeros(shape)
+
+    def _start(self, measured: np.ndarray):
+        super()._start(measured)
+        # Posizione nota al rumore di misura, velocità ignota
+        self._p00.fill(self.measurement_noise)
+        self._p01.fill(0.0)
+        self._p11.fill(1.0)
+
+    def _filter(self, measured: np.ndarray, dt: float):
+        q = self.process_noise
+        p00, p01, p11 = self._p00, self._p01, self._p11
+
+        # Predizione: x += v dt, covarianza con rumore di accelerazione
+        self._position += self._velocity * dt
+        p00 += dt * (2.0 * p01 + dt * p11) + q * dt ** 3 / 3.0
+        p01 += dt * p11 + q * dt ** 2 / 2.0
+        p11 += q * dt
+
+        # Correzione con la misura
+        innovation = measured - self._position
+        s = p00 + self.measurement_noise
+        k0 = p00 / s
+        k1 = p01 / s
+        self._position += k0 * innovation
+        self._velocity += k1 * innovation
+
+        p11 -= k1 * p01
+        p01 *= 1.0 - k0
+        p00 *= 1.0 - k0
+
+
+class MovingAverageFilter(KeypointFilter):
+    """Media mobile sugli ultimi frame (comportamento storico)"""
+
+    def __init__(self, history_size: int = 5, **kwargs):
+        """
+        Args:
+            history_size: Frame nella media mobile
+        """
+        super().__init__(**kwargs)
+        self.history = KeypointHistory(history_size, self.joints)
+
+    def reset(self):
+        super().reset()
+        self.history.reset()
+
+    def _start(self, measured: np.ndarray):
+        self.history.reset()
+        self._position[:] = self.history.push(measured)
+
+    def _filter(self, measured: np.ndarray, dt: float):
+        previous = self._position.copy()
+        self._position[:] = self.history.push(measured)
+        self._velocity[:] = (self._position - previous) / dt
+
+
+def create_keypoint_filter(mode: str = "one_euro", history_size: int = 5, **kwargs) -> KeypointFilter:
+    """
+    Crea il filtro per una modalità
+
+    Args:
+        mode: 'one_euro', 'kalman' o 'average'
+        history_size: Frame della media mobile (solo 'average')
+        **kwargs: Parametri del filtro
+
+    Returns:
+        Filtro dei keypoint
+    """
+    if mode == "one_euro":
+        return OneEuroFilter(**kwargs)
+    if mode == "kalman":
+        return KalmanKeypointFilter(**kwargs)
+    if mode == "average":
+        return MovingAverageFilter(history_size, **kwargs)
+    raise ValueError(f"Filtro sconosciuto: {mode} (disponibili: {', '.join(FILTER_MODES)})")
@@ -0,0 +1,135 @@
+"""
+Keypoint in Forma di Array
+
+Rappresentazione compatta dei punti chiave della posa:
+- Un frame è un array (articolazioni × 3) float32 con indici fissi (JOINTS)
+- KeypointFrame: accesso per nome (come il vecchio dizionario) senza copie
+- KeypointHistory: buffer circolare (storia × articolazioni × 3) con
+  somma aggiornata in modo incrementale per la media mobile
+"""
+
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Union
+
+# Articolazioni tracciate, nell'ordine delle righe dell'array
+JOINTS = (
+    "left_wrist",
+    "right_wrist",
+    "left_knee",
+    "right_knee",
+    "left_ankle",
+    "right_ankle",
+    "nose",
+)
+JOINT_INDEX: Dict[str, int] = {name: i for i, name in enumerate(JOINTS)}
+
+
+class KeypointFrame(Mapping):
+    """
+    Vista per nome su un array di keypoint.
+
+    frame['left_wrist'] restituisce la riga dell'array (una vista, nessuna
+    copia): il codice scritto per i dizionari funziona senza modifiche,
+    quello vettorializzato usa direttamente `frame.array`.
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.array[JOINT_INDEX[name]]
+
+    def __contains__(self, name) -> bool:
+        return name in JOINT_INDEX
+
+    def __iter__(self):
+        return iter(JOINTS)
+
+    def __len__(self) -> int:
+        return len(JOINTS)
+
+
+KeypointsLike = Union[np.ndarray, KeypointFrame, Dict[str, np.ndarray]]
+
+
+def as_keypoint_frame(key_points: KeypointsLike) -> Mapping:
+    """Accesso per nome da array, KeypointFrame o dizionario"""
+    if isinstance(key_points, np.ndarray):
+        return KeypointFrame(key_points)
+    return key_points
+
+
+def as_keypoint_array(key_points: KeypointsLike) -> np.ndarray:
+    """Array (articolazioni × 3) da array, KeypointFrame o dizionario (NaN se manca)"""
+    if isinstance(key_points, np.ndarray):
+        return key_points
+    if isinstance(key_points, KeypointFrame):
+        return key_points.array
+
+    array = np.full((len(JOINTS), 3), np.nan, dtype=np.float32)
+    for name, point in key_points.items():
+        index = JOINT_INDEX.get(name)
+        if index is not None:
+            array[index] = point
+    return array
+
+
+def joint_speeds(vectors: np.ndarray, names=JOINTS) -> Dict[str, float]:
+    """Modulo per articolazione (es. velocità scalari) da un array (articolazioni × 3)"""
+    norms = np.linalg.norm(vectors, axis=1)
+    return {name: float(norms[JOINT_INDEX[name]]) for name in names}
+
+
+class KeypointHistory:
+    """Media mobile su un buffer circolare con somma incrementale"""
+
+    # Ogni quanti push ricalcolare la somma da zero (contro la deriva numerica)
+    RESYNC_INTERVAL = 4096
+
+    def __init__(self, size: int = 5, joints: int = len(JOINTS)):
+        """
+        Args:
+            size: Frame nella media mobile
+            joints: Articolazioni per frame
+        """
+        self.size = max(1, size)
+        self.buffer = np.zeros((self.size, joints, 3), dtype=np.float32)
+        self.sum = np.zeros((joints, 3), dtype=np.float64)
+        self.count = 0
+        self.index = 0
+        self._pushes = 0
+
+    def reset(self):
+        """Svuota la storia"""
+        self.sum.fill(0.0)
+        self.count = 0
+        self.index = 0
+
+    def push(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Aggiunge un frame e restituisce la media degli ultimi `size`.
+
+        Returns:
+            Nuovo array (articolazioni × 3) float32: può passare ad altri
+            thread senza essere sovrascritto dal frame successivo
+        """
+        slot = self.buffer[self.index]
+        if self.count == self.size:
+            self.sum -= slot
+        else:
+            self.count += 1
+
+        slot[:] = frame
+        self.sum += slot
+        self.index = (self.index + 1) % self.size
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_INTERVAL == 0:
+            np.sum(self.buffer[: self.count], axis=0, dtype=np.float64, out=self.sum)
+
+        mean = np.empty(self.sum.shape, dtype=np.float32)
+        np.divide(self.sum, self.count, out=mean, casting="unsafe")
+        return mean
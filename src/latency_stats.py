@@ -0,0 +1,187 @@
+"""
+Statistiche di Latenza
+
+Misure di latenza a costo costante, registrabili anche dal callback audio:
+- Istogrammi a bucket logaritmici (10 µs - 10 s) per ogni stadio
+- Percentili p50/p95/p99 dagli istogrammi, senza conservare i campioni
+- Conteggio di xrun/underflow dallo status dello stream
+- Carico del callback come frazione del tempo di blocco
+"""
+
+import math
+from typing import Dict, List, Optional
+
+# Stadi della catena colpo -> suono
+STAGES = (
+    "detection_to_trigger",  # Frame/pose -> colpo riconosciuto
+    "trigger_to_enqueue",  # Colpo riconosciuto -> push nel ring
+    "enqueue_to_callback",  # Push nel ring -> letto dal callback
+    "callback_to_dac",  # Callback -> uscita stimata dal DAC
+)
+
+
+class LatencyHistogram:
+    """
+    Istogramma a bucket logaritmici.
+
+    record() fa solo aritmetica su float e un incremento in lista: niente
+    allocazioni, adatto al callback. Un solo thread deve scrivere.
+    """
+
+    def __init__(self, min_value: float = 1e-5, max_value: float = 10.0,
+                 buckets_per_decade: int = 20):
+        """
+        Args:
+            min_value: Valore minimo distinto (secondi)
+            max_value: Valore massimo distinto (secondi)
+            buckets_per_decade: Risoluzione (20 = circa 12% per bucket)
+        """
+        self.min_value = min_value
+        self.buckets_per_decade = buckets_per_decade
+        self._log_min = math.log10(min_value)
+
+        decades = math.log10(max_value) - self._log_min
+        self.num_buckets = int(math.ceil(decades * buckets_per_decade)) + 1
+        self.counts: List[int] = [0] * self.num_buckets
+        self.reset()
+
+    def reset(self):
+        """Azzera l'istogramma"""
+        for i in range(self.num_buckets):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Registra un valore (secondi)"""
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = int((math.log10(value) - self._log_min) * self.buckets_per_decade) + 1
+            if index >= self.num_buckets:
+                index = self.num_buckets - 1
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _bucket_value(self, index: int) -> float:
+        """Centro geometrico di un bucket"""
+        if index == 0:
+            return self.min_value
+        return 10 ** (self._log_min + (index - 0.5) / self.buckets_per_decade)
+
+    def percentile(self, p: float) -> float:
+        """Percentile approssimato (0-100) in secondi"""
+        if self.count == 0:
+            return 0.0
+
+        target = p / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count > 0:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """Riepilogo in millisecondi"""
+        if self.count == 0:
+            return {"count": 0, "mean": 0, "min": 0, "max": 0, "p50": 0, "p95": 0, "p99": 0}
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count * 1000,
+            "min": self.min * 1000,
+            "max": self.max * 1000,
+            "p50": self.percentile(50) * 1000,
+            "p95": self.percentile(95) * 1000,
+            "p99": self.percentile(99) * 1000,
+        }
+
+
+class LatencyMonitor:
+    """Istogrammi per stadio + salute dello stream audio"""
+
+    def __init__(self, sample_rate: int = 44100, buffer_size: int = 256):
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+
+        self.stages: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in STAGES}
+        self.callback = LatencyHistogram()  # Tempo CPU del callback
+
+        self.callbacks = 0
+        self.xruns = 0  # Blocchi con almeno un flag di errore
+        self.underflows = 0  # Output underflow (il DAC ha suonato silenzio)
+        self.overflows = 0
+        self.max_load = 0.0  # Massimo carico del callback (frazione del blocco)
+        self._load_total = 0.0
+
+    def record(self, stage: str, seconds: float):
+        """Registra la latenza di uno stadio (un thread scrittore per stadio)"""
+        histogram = self.stages.get(stage)
+        if histogram is not None and seconds >= 0:
+            histogram.record(seconds)
+
+    def record_callback(self, seconds: float, frames: int):
+        """Registra la durata di un callback e il carico sul budget del blocco"""
+        self.callbacks += 1
+        self.callback.record(seconds)
+
+        load = seconds * self.sample_rate / frames if frames else 0.0
+        self._load_total += load
+        if load > self.max_load:
+            self.max_load = load
+
+    def record_status(self, status):
+        """Conta xrun dallo status di PortAudio (sounddevice.CallbackFlags)"""
+        if not status:
+            return
+        self.xruns += 1
+        if getattr(status, "output_underflow", False):
+            self.underflows += 1
+        if getattr(status, "output_overflow", False):
+            self.overflows += 1
+
+    def reset(self):
+        """Azzera tutte le statistiche"""
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.callback.reset()
+        self.callbacks = self.xruns = self.underflows = self.overflows = 0
+        self.max_load = self._load_total = 0.0
+
+    def snapshot(self, stages: Optional[List[str]] = None) -> Dict:
+        """
+        Fotografia delle statistiche (economica: nessun campione memorizzato).
+
+        Returns:
+            Dict con 'stages' (ms per stadio), 'callback' e contatori xrun
+        """
+        names = stages or list(self.stages.keys())
+        budget = self.buffer_size / self.sample_rate
+
+        callback = self.callback.snapshot()
+        callback.update(
+            {
+                "budget": budget * 1000,
+                "load_mean": self._load_total / self.callbacks if self.callbacks else 0.0,
+                "load_max": self.max_load,
+                "load_p99": self.callback.percentile(99) / budget if budget else 0.0,
+            }
+        )
+
+        return {
+            "stages": {name: self.stages[name].snapshot() for name in names},
+            "callback": callback,
+            "callbacks": self.callbacks,
+            "xruns": self.xruns,
+            "underflows": self.underflows,
+            "overflows": self.overflows,
+        }
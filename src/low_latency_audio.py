@@ -5,16 +5,40 @@ Sostituisce pygame.mixer con un sistema audio a bassa latenza:
 - python-rtmixer per callback C (evita GIL)
 - sounddevice/PortAudio come fallback
 - Precomputed audio buffers
-- Lock-free queue per eventi
+- Ring buffer SPSC lock-free per eventi
+- Pool di voci polifoniche con playhead persistenti
+- Scheduling sample-accurate dei trigger (timestamp -> frame nel blocco)
+- Velocity layer e round-robin con selezione O(1)
+- Catene di effetti in streaming per pad (bus) e master
+- Metronomo sample-accurate generato nel callback
+- Voci in streaming da disco per campioni lunghi
+- Istogrammi di latenza per stadio, xrun e carico del callback
+- Backend null con clock virtuale per test deterministici e benchmark
+- Polifonia limitata: voci per suono, gruppi di choke, budget adattivo al carico
 """
 
 import os
+import re
 import time
 import numpy as np
 from typing import Optional, Dict, List, Callable
 from dataclasses import dataclass
 from collections import deque
-from queue import Queue
+
+from src.trigger_ring import TriggerRingBuffer
+from src.effect_chain import EffectChain
+from src.metronome import Metronome
+from src.sample_bank import SampleBank
+from src.latency_stats import LatencyMonitor
+from src.null_audio import NullAudioBackend
+from src.synthesis_cache import DEFAULT_CACHE_DIR, SynthesisCache, pitched_drum_batch
+from src.disk_streaming import (
+    ArraySource,
+    DiskStreamer,
+    SoundFileSource,
+    StreamingSample,
+)
+from src.dsp_utils import accumulate, read_audio
 
 # Check availability
 RTMIXER_AVAILABLE = False
@@ -44,6 +68,81 @@ class AudioConfig:
     channels: int = 2
     dtype: str = "float32"
     device: Optional[str] = None  # None = default
+    max_voices: int = 32  # Voci simultanee (limite CPU nel callback)
+    voices_per_drum: int = 4  # Voci per suono non elencato in VOICE_LIMITS
+    voice_stealing: str = "oldest"  # Voce da rubare: "oldest" o "quietest"
+    fade_ms: float = 5.0  # Fade delle voci rubate o smorzate
+    target_load: float = 0.7  # Carico del callback oltre cui il budget di voci cala (0 = fisso)
+    min_voices: int = 8  # Budget minimo di voci sotto carico
+    mix_mode: str = "preallocated"  # "preallocated" (no allocazioni) o "legacy"
+    trigger_capacity: int = 256  # Slot del ring buffer dei trigger
+    sample_accurate: bool = True  # Posiziona i trigger al frame esatto nel blocco
+    lookahead_ms: float = 1.0  # Margine fisso oltre a un blocco di latenza
+    master_gain: float = 0.9
+    stream_threshold: float = 0.0  # Campioni più lunghi (s) in streaming da disco (0 = mai)
+    stream_head: float = 0.25  # Secondi di testa tenuti in RAM per i campioni in streaming
+    backend: str = "auto"  # "auto" (rtmixer/sounddevice/pygame) o "null" (nessun device)
+    null_realtime: bool = False  # Backend null: blocchi cadenzati in tempo reale in un thread
+    capture_seconds: float = 0.0  # Backend null: secondi di uscita catturati in memoria
+    capture_path: Optional[str] = None  # Backend null: WAV su cui scrivere l'uscita
+
+
+class VelocityLayerSet:
+    """
+    Campioni multi-layer di un pezzo della batteria.
+
+    Ogni layer copre un intervallo di velocity MIDI e contiene uno o più
+    campioni alternativi suonati a rotazione (round-robin). La scelta del
+    layer usa una tabella precalcolata velocity -> indice, quindi costa
+    O(1) anche con 16 layer e non alloca nulla nel callback.
+    """
+
+    def __init__(
+        self, layers: List[List[np.ndarray]], thresholds: Optional[List[int]] = None
+    ):
+        """
+        Args:
+            layers: Per ogni layer (dal più piano al più forte) la lista
+                dei campioni alternativi
+            thresholds: Velocity MIDI massima (0-127) di ogni layer.
+                Se None i layer dividono 0-127 in parti uguali.
+        """
+        if not layers or any(len(alternates) == 0 for alternates in layers):
+            raise ValueError("Ogni velocity layer deve avere almeno un campione")
+
+        count = len(layers)
+        if thresholds is None:
+            thresholds = [round(127 * (i + 1) / count) for i in range(count)]
+        if len(thresholds) != count:
+            raise ValueError("Serve una soglia per ogni velocity layer")
+
+        self.layers = [list(alternates) for alternates in layers]
+        self.thresholds = list(thresholds)
+
+        # Tabella velocity MIDI -> layer (tuple: indicizzazione più veloce di numpy)
+        lut = np.searchsorted(np.asarray(self.thresholds), np.arange(128), side="left")
+        self._lut = tuple(int(min(i, count - 1)) for i in lut)
+
+        # Prossimo campione alternativo per ogni layer
+        self._round_robin = [0] * count
+
+    def layer_index(self, velocity: float) -> int:
+        """Indice del layer per una velocity 0-1"""
+        midi = int(velocity * 127.0)
+        if midi < 0:
+            midi = 0
+        elif midi > 127:
+            midi = 127
+        return self._lut[midi]
+
+    def get_buffer(self, velocity: float) -> np.ndarray:
+        """Campione per la velocity (0-1), ruotando tra gli alternativi"""
+        index = self.layer_index(velocity)
+        alternates = self.layers[index]
+
+        rr = self._round_robin[index]
+        self._round_robin[index] = rr + 1 if rr + 1 < len(alternates) else 0
+        return alternates[rr]
 
 
 @dataclass
@@ -53,6 +152,371 @@ class DrumSound:
     name: str
     buffer: np.ndarray
     velocity_layers: Dict[int, np.ndarray] = None  # {velocity: buffer}
+    layer_set: Optional[VelocityLayerSet] = None
+
+    def get_buffer(self, velocity: float) -> np.ndarray:
+        """Campione da suonare per la velocity (0-1)"""
+        if self.layer_set is not None:
+            return self.layer_set.get_buffer(velocity)
+        return self.buffer
+
+
+# Gruppi di choke: un colpo su un membro smorza le voci degli altri membri
+CHOKE_GROUPS = {
+    "hihat": "hihat",
+    "hihat_closed": "hihat",
+    "hihat_open": "hihat",
+    "hihat_pedal": "hihat",
+}
+
+# Voci simultanee per suono (gli altri usano AudioConfig.voices_per_drum)
+VOICE_LIMITS = {
+    "kick": 2,
+    "hihat": 2,
+    "hihat_closed": 2,
+    "hihat_pedal": 2,
+    "hihat_open": 2,
+    "crash": 3,
+    "ride": 3,
+}
+
+
+@dataclass
+class Voice:
+    """Voce attiva: campione in riproduzione con il suo playhead"""
+
+    sample: Optional[np.ndarray] = None  # Buffer (frames, channels) float32
+    position: int = 0  # Offset di lettura nel campione
+    delay: int = 0  # Frame di attesa prima dell'attacco
+    gain: float = 0.0
+    drum: str = ""
+    serial: int = 0  # Ordine di avvio (per voice stealing)
+    active: bool = False
+    length: int = 0  # Frame totali (testa + coda per le voci in streaming)
+    stream: Optional[object] = None  # StreamSlot con la coda letta da disco
+    release_at: int = -1  # Frame dall'inizio del prossimo blocco all'avvio del fade (-1 = nessuno)
+    fade_position: int = 0  # Frame di fade già renderizzati
+
+
+class VoicePool:
+    """
+    Pool fisso di voci mixate blocco per blocco nel callback.
+
+    Ogni voce mantiene il proprio offset di lettura, quindi un campione
+    più lungo del buffer audio continua a suonare nei blocchi successivi.
+
+    La polifonia è limitata per suono (voice_limits), per gruppo di choke
+    (es. hi-hat chiuso che smorza l'aperto) e globalmente (budget): la voce
+    rubata, la più vecchia o la più debole, sfuma in pochi millisecondi
+    invece di essere troncata. Solo a pool esaurito si ruba senza fade.
+    """
+
+    def __init__(
+        self,
+        max_voices: int = 32,
+        channels: int = 2,
+        streamer: Optional[DiskStreamer] = None,
+        fade_frames: int = 220,
+        stealing: str = "oldest",
+    ):
+        """
+        Args:
+            max_voices: Voci nel pool (anche quelle in fade)
+            channels: Canali
+            streamer: DiskStreamer per le voci in streaming
+            fade_frames: Durata del fade delle voci rubate o smorzate
+            stealing: Voce da rubare: "oldest" o "quietest"
+        """
+        self.max_voices = max_voices
+        self.channels = channels
+        self.streamer = streamer
+        self.voices: List[Voice] = [Voice() for _ in range(max_voices)]
+
+        self.budget = max_voices  # Voci non in fade ammesse (vedi set_budget)
+        self.voice_limits: Dict[str, int] = {}
+        self.choke_groups: Dict[str, str] = {}
+        self.stealing = stealing
+
+        # Rampa di fade e buffer di lavoro preallocati
+        self.fade_frames = max(1, fade_frames)
+        ramp = np.linspace(1.0, 0.0, self.fade_frames, endpoint=False, dtype=np.float32)
+        self._fade_ramp = ramp[:, np.newaxis]
+        self._fade_buffer = np.zeros((self.fade_frames, channels), dtype=np.float32)
+
+        self._serial = 0
+        self.stolen_count = 0  # Voci rubate per limiti o budget
+        self.choked_count = 0  # Voci smorzate da un gruppo di choke
+
+    @property
+    def active_count(self) -> int:
+        """Numero di voci attualmente in riproduzione"""
+        return sum(1 for voice in self.voices if voice.active)
+
+    def _level(self, voice: Voice) -> float:
+        """Livello stimato: guadagno per la frazione di campione ancora da suonare"""
+        if voice.length <= 0:
+            return 0.0
+        return voice.gain * (voice.length - voice.position) / voice.length
+
+    def _select(self, drum: Optional[str] = None):
+        """
+        Conta le voci che suonano (non in fade) e sceglie quella da rubare.
+
+        Returns:
+            (numero di voci, voce candidata o None)
+        """
+        count = 0
+        victim = None
+        victim_key = 0.0
+        quietest = self.stealing == "quietest"
+
+        for voice in self.voices:
+            if not voice.active or voice.release_at >= 0:
+                continue
+            if drum is not None and voice.drum != drum:
+                continue
+            count += 1
+            key = self._level(voice) if quietest else voice.serial
+            if victim is None or key < victim_key:
+                victim = voice
+                victim_key = key
+
+        return count, victim
+
+    def _allocate(self) -> Voice:
+        """Restituisce una voce libera, poi una in fade, altrimenti ruba senza fade"""
+        fading = None
+        for voice in self.voices:
+            if not voice.active:
+                return voice
+            if voice.release_at >= 0 and (fading is None or voice.fade_position > fading.fade_position):
+                fading = voice
+
+        if fading is not None:
+            self._end(fading)
+            return fading
+
+        _, victim = self._select()
+        self.stolen_count += 1
+        self._end(victim)
+        return victim
+
+    def _end(self, voice: Voice):
+        """Chiude la voce e restituisce l'eventuale stream"""
+        if voice.stream is not None:
+            self.streamer.release(voice.stream)
+            voice.stream = None
+        voice.active = False
+        voice.sample = None
+        voice.release_at = -1
+
+    def release(self, voice: Voice, at: int = 0):
+        """
+        Avvia il fade di una voce.
+
+        Args:
+            voice: Voce da sfumare
+            at: Frame dall'inizio del prossimo blocco in cui inizia il fade
+        """
+        if not voice.active:
+            return
+        if voice.position == 0 and voice.delay >= at:
+            # Non avrebbe ancora suonato: si chiude subito
+            self._end(voice)
+        elif voice.release_at < 0 or at < voice.release_at:
+            voice.release_at = at
+            voice.fade_position = 0
+
+    def _choke(self, drum: str, delay: int) -> int:
+        """
+        Smorza le voci degli altri suoni del gruppo di choke di `drum`.
+
+        Returns:
+            Frame in cui va smorzata la nuova voce (-1 = mai): succede se
+            una voce del gruppo è programmata dopo di lei
+        """
+        group = self.choke_groups.get(drum)
+        if group is None:
+            return -1
+
+        release_new = -1
+        for voice in self.voices:
+            if not voice.active or voice.drum == drum or voice.release_at >= 0:
+                continue
+            if self.choke_groups.get(voice.drum) != group:
+                continue
+            if voice.delay <= delay:
+                self.release(voice, delay)
+                self.choked_count += 1
+            elif release_new < 0 or voice.delay < release_new:
+                release_new = voice.delay
+
+        return release_new
+
+    def choke(self, drum: str, delay: int = 0):
+        """Smorza tutte le voci di un suono (es. presa del crash)"""
+        for voice in self.voices:
+            if voice.active and voice.drum == drum:
+                self.release(voice, delay)
+
+    def set_budget(self, budget: int):
+        """Cambia il numero di voci ammesse, sfumando quelle in eccesso"""
+        self.budget = max(1, min(int(budget), self.max_voices))
+
+        count, victim = self._select()
+        while count > self.budget and victim is not None:
+            self.release(victim)
+            self.stolen_count += 1
+            count, victim = self._select()
+
+    def start(
+        self, sample, gain: float = 1.0, drum: str = "", delay: int = 0
+    ) -> Voice:
+        """
+        Avvia una nuova voce.
+
+        Args:
+            sample: Buffer (frames, channels) float32 o StreamingSample
+            gain: Guadagno della voce
+            drum: Nome del suono (per statistiche e choke)
+            delay: Frame dall'inizio del prossimo blocco all'attacco
+
+        Returns:
+            Voce avviata
+        """
+        release_new = self._choke(drum, delay)
+
+        # Limite per suono, poi budget globale: la voce rubata sfuma all'attacco
+        limit = self.voice_limits.get(drum)
+        if limit is not None:
+            count, victim = self._select(drum)
+            if count >= limit and victim is not None:
+                self.release(victim, delay)
+                self.stolen_count += 1
+
+        count, victim = self._select()
+        if count >= self.budget and victim is not None:
+            self.release(victim, delay)
+            self.stolen_count += 1
+
+        voice = self._allocate()
+
+        if isinstance(sample, StreamingSample):
+            # Senza slot liberi suona solo la testa
+            voice.stream = self.streamer.open(sample) if self.streamer else None
+            voice.sample = sample.head
+            voice.length = sample.length if voice.stream is not None else len(sample.head)
+        else:
+            voice.sample = sample
+            voice.length = len(sample)
+        voice.position = 0
+        voice.delay = delay
+        voice.gain = gain
+        voice.drum = drum
+        voice.serial = self._serial
+        voice.release_at = -1
+        voice.active = True
+
+        if release_new >= 0:
+            self.release(voice, release_new)
+            self.choked_count += 1
+
+        self._serial += 1
+        return voice
+
+    def _mix(self, voice: Voice, target: np.ndarray, scratch: Optional[np.ndarray]) -> int:
+        """Somma in target i prossimi frame della voce. Returns: frame letti"""
+        n = min(len(target), voice.length - voice.position)
+        if n <= 0:
+            return 0
+
+        # Testa in memoria, poi la coda dal ring dello stream
+        sample = voice.sample
+        head = max(0, min(n, len(sample) - voice.position))
+        if head > 0:
+            accumulate(
+                target[:head],
+                sample[voice.position : voice.position + head],
+                voice.gain,
+                scratch,
+            )
+        if head < n:
+            self.streamer.read_into(voice.stream, target[head:n], voice.gain, scratch)
+
+        voice.position += n
+        return n
+
+    def _mix_fade(self, voice: Voice, target: np.ndarray, scratch: Optional[np.ndarray]):
+        """Come _mix, ma con la rampa di fade applicata"""
+        n = min(len(target), self.fade_frames - voice.fade_position)
+        work = self._fade_buffer[:n]
+        work.fill(0.0)
+        n = self._mix(voice, work, scratch)
+
+        ramp = self._fade_ramp[voice.fade_position : voice.fade_position + n]
+        np.multiply(work[:n], ramp, out=work[:n])
+        np.add(target[:n], work[:n], out=target[:n])
+        voice.fade_position += n
+
+    def render(
+        self,
+        output: np.ndarray,
+        frames: int,
+        scratch: Optional[np.ndarray] = None,
+        drum: Optional[str] = None,
+        exclude: Optional[Dict] = None,
+    ):
+        """
+        Mixa tutte le voci attive nel blocco e avanza i playhead.
+
+        Args:
+            output: Buffer di uscita (frames, channels) da accumulare
+            frames: Numero di frame del blocco
+            scratch: Buffer di lavoro preallocato (>= frames). Se fornito
+                il gain viene applicato in place, senza allocazioni.
+            drum: Se indicato, mixa solo le voci di questo suono
+            exclude: Suoni da saltare (mixati a parte su un bus)
+        """
+        for voice in self.voices:
+            if not voice.active:
+                continue
+            if drum is not None and voice.drum != drum:
+                continue
+            if exclude and voice.drum in exclude:
+                continue
+
+            # Attacco in un blocco successivo
+            if voice.delay >= frames:
+                voice.delay -= frames
+                if voice.release_at > 0:
+                    voice.release_at = max(0, voice.release_at - frames)
+                continue
+
+            start = voice.delay
+            voice.delay = 0
+
+            if voice.release_at < 0:
+                self._mix(voice, output[start:frames], scratch)
+            else:
+                # Fino all'avvio del fade a pieno volume, poi la rampa
+                fade_start = max(start, min(voice.release_at, frames))
+                if fade_start > start:
+                    self._mix(voice, output[start:fade_start], scratch)
+                if fade_start < frames:
+                    self._mix_fade(voice, output[fade_start:frames], scratch)
+                voice.release_at = max(0, voice.release_at - frames)
+
+                if voice.fade_position >= self.fade_frames:
+                    self._end(voice)
+                    continue
+
+            if voice.position >= voice.length:
+                self._end(voice)
+
+    def stop_all(self):
+        """Ferma tutte le voci"""
+        for voice in self.voices:
+            self._end(voice)
 
 
 class LowLatencyAudioEngine:
@@ -66,13 +530,59 @@ class LowLatencyAudioEngine:
         self.config = config or AudioConfig()
         self.running = False
         self.sounds: Dict[str, DrumSound] = {}
-        self.event_queue: Queue = Queue(maxsize=128)
+
+        # Prefetch da disco per i campioni lunghi (thread avviato al primo uso)
+        self.streamer = DiskStreamer(self.config.channels, self.config.max_voices)
+        self.voices = VoicePool(
+            self.config.max_voices,
+            self.config.channels,
+            self.streamer,
+            fade_frames=int(self.config.fade_ms / 1000.0 * self.config.sample_rate),
+            stealing=self.config.voice_stealing,
+        )
+        self.voices.choke_groups = dict(CHOKE_GROUPS)
+        self._load_average = 0.0  # Media mobile del carico del callback
 
         self._output_device = None
         self._stream = None
+        self.null_backend: Optional[NullAudioBackend] = None
 
         self._latency_measurements: deque = deque(maxlen=100)
         self._last_timestamp = 0
+        self.latency = LatencyMonitor(self.config.sample_rate, self.config.buffer_size)
+
+        # Buffer di mix preallocati (modalità "preallocated")
+        self._mix_buffer: Optional[np.ndarray] = None
+        self._scratch_buffer: Optional[np.ndarray] = None
+        self._allocate_mix_buffers(self.config.buffer_size)
+
+        # Effetti in streaming: un bus per pad + master (copy-on-write)
+        self.effects: Dict[str, EffectChain] = {}
+        self.master_effects: Optional[EffectChain] = None
+
+        # Metronomo: click programmati su frame esatti nel callback
+        self.metronome = Metronome(self.config.sample_rate, channels=self.config.channels)
+
+        # Trigger: id numerici al posto dei nomi nel percorso realtime
+        self.drum_ids: Dict[str, int] = {}
+        self._sound_table: List[DrumSound] = []
+        self.triggers = TriggerRingBuffer(self.config.trigger_capacity)
+        # Ogni producer aggiuntivo (es. sequencer) ha il proprio ring SPSC
+        self._trigger_sources: List[TriggerRingBuffer] = [self.triggers]
+        self._drained = self.triggers.make_drain_buffer()
+        self._drained_ids = self._drained["drum_id"]
+        self._drained_velocities = self._drained["velocity"]
+        self._drained_timestamps = self._drained["timestamp"]
+        self._drained_frames = self._drained["target_frame"]
+
+        # Clock del motore
+        self.frame_position = 0  # Frame totali renderizzati
+        self._output_latency = 0.0  # Latenza di uscita del device (s)
+        self._block_dac_time = 0.0  # perf_counter() di uscita del blocco corrente
+        self.late_triggers = 0  # Trigger arrivati oltre il lookahead
+
+        # Contatori del percorso callback
+        self.callback_count = 0
 
     def initialize(self) -> bool:
         """
@@ -81,6 +591,8 @@ class LowLatencyAudioEngine:
         Returns:
             True se inizializzato
         """
+        if self.config.backend == "null":
+            return self._init_null()
         if RTMIXER_AVAILABLE:
             return self._init_rtmixer()
         elif SOUNDDEVICE_AVAILABLE:
@@ -122,7 +634,7 @@ class LowLatencyAudioEngine:
             )
 
             def callback(outdata, frames, time_info, status):
-                self._audio_callback(outdata, frames, time_info)
+                self._audio_callback(outdata, frames, time_info, status)
 
             self._stream = sd.OutputStream(
                 device=self.config.device,
@@ -134,6 +646,7 @@ class LowLatencyAudioEngine:
             )
 
             self._stream.start()
+            self._output_latency = float(self._stream.latency)
             self.running = True
             print("[OK] sounddevice attivo")
             return True
@@ -163,43 +676,228 @@ class LowLatencyAudioEngine:
             print(f"[ERR] pygame: {e}")
             return False
 
-    def _audio_callback(self, outdata, frames, time_info=None):
+    def _init_null(self) -> bool:
+        """
+        Backend senza device: il callback è guidato da un clock virtuale.
+
+        In modalità veloce i blocchi si renderizzano con null_backend.run();
+        con null_realtime un thread li cadenza come una scheda audio.
+        """
+        config = self.config
+        self.null_backend = NullAudioBackend(
+            self._audio_callback,
+            sample_rate=config.sample_rate,
+            buffer_size=config.buffer_size,
+            channels=config.channels,
+            realtime=config.null_realtime,
+            capture_frames=int(config.capture_seconds * config.sample_rate),
+            capture_path=config.capture_path,
+        )
+        self._output_latency = 0.0
+
+        if config.null_realtime:
+            self.null_backend.start()
+
+        self.running = True
+        mode = "tempo reale" if config.null_realtime else "veloce"
+        print(f"[OK] Backend null attivo ({mode})")
+        return True
+
+    def _allocate_mix_buffers(self, frames: int):
+        """Alloca i buffer di mix per blocchi fino a `frames` frame"""
+        shape = (frames, self.config.channels)
+        self._mix_buffer = np.zeros(shape, dtype=np.float32)
+        self._scratch_buffer = np.zeros(shape, dtype=np.float32)
+        self._bus_buffer = np.zeros(shape, dtype=np.float32)
+
+    def _audio_callback(self, outdata, frames, time_info=None, status=None):
         """
         Callback audio (chiamato dal thread nativo).
 
         Questo è il cuore critico - deve essere velocissimo.
         """
-        output = np.zeros((frames, self.config.channels), dtype=np.float32)
+        callback_start = time.perf_counter()
+        self.callback_count += 1
+        if status:
+            self.latency.record_status(status)
+        self._update_block_clock(time_info)
+        self._process_events(frames)
+        self.metronome.schedule(self.voices, self.frame_position, frames)
+
+        if self.config.mix_mode == "legacy":
+            self._mix_legacy(outdata, frames)
+        else:
+            self._mix_preallocated(outdata, frames)
 
-        while not self.event_queue.empty():
-            try:
-                event = self.event_queue.get_nowait()
+        self.frame_position += frames
 
-                drum_name = event.get("drum")
-                velocity = event.get("velocity", 1.0)
-                timestamp = event.get("timestamp", 0)
+        elapsed = time.perf_counter() - callback_start
+        self.latency.record_callback(elapsed, frames)
+        self._adapt_voice_budget(elapsed * self.config.sample_rate / frames)
 
-                if drum_name in self.sounds:
-                    sound = self.sounds[drum_name]
-                    buffer = sound.get_buffer(velocity)
+    def _adapt_voice_budget(self, load: float):
+        """
+        Adatta il budget di voci al carico misurato del callback.
 
-                    if buffer is not None:
-                        pos = 0
-                        end = min(pos + len(buffer), frames)
-                        output[pos:end] += buffer[: end - pos] * velocity
+        Sopra target_load toglie una voce per blocco (sfumando la più
+        vecchia/debole), sotto metà target ne restituisce una: l'isteresi
+        evita oscillazioni a ogni blocco.
+        """
+        target = self.config.target_load
+        if target <= 0:
+            return
 
-                # Misura latenza
-                if timestamp > 0:
-                    latency = time.perf_counter() - timestamp
-                    self._latency_measurements.append(latency)
+        self._load_average += 0.2 * (load - self._load_average)
+        budget = self.voices.budget
 
-            except:
-                break
+        if self._load_average > target and budget > self.config.min_voices:
+            self.voices.set_budget(budget - 1)
+        elif self._load_average < target * 0.5 and budget < self.config.max_voices:
+            self.voices.budget = budget + 1
+
+    def _update_block_clock(self, time_info):
+        """
+        Stima quando il primo frame del blocco raggiungerà il DAC,
+        espresso nel clock di time.perf_counter().
+
+        Usa outputBufferDacTime/currentTime forniti da PortAudio; senza
+        time_info ricade sulla latenza di uscita dichiarata dallo stream.
+        """
+        now = time.perf_counter()
+        dac_time = getattr(time_info, "outputBufferDacTime", 0.0)
+        current_time = getattr(time_info, "currentTime", 0.0)
+
+        if dac_time and current_time:
+            self._block_dac_time = now + (dac_time - current_time)
+        else:
+            self._block_dac_time = now + self._output_latency
+
+    def _trigger_offset(self, timestamp: float, target_frame: int) -> int:
+        """
+        Converte un trigger nell'offset (in frame) dall'inizio del blocco.
+
+        L'evento suona a `timestamp + latenza fissa`, dove la latenza fissa è
+        latenza di uscita + un blocco + lookahead: ogni trigger arrivato
+        durante il blocco precedente cade così dentro il blocco corrente,
+        con latenza costante invece di un jitter pari al buffer.
+        """
+        if target_frame >= 0:
+            offset = target_frame - self.frame_position
+        elif not self.config.sample_accurate or timestamp <= 0:
+            return 0
+        else:
+            sr = self.config.sample_rate
+            latency = (
+                self._output_latency
+                + self.config.buffer_size / sr
+                + self.config.lookahead_ms / 1000.0
+            )
+            offset = int(round((timestamp + latency - self._block_dac_time) * sr))
+
+        if offset < 0:
+            self.late_triggers += 1
+            return 0
+        return offset
+
+    def _mix_preallocated(self, outdata, frames: int):
+        """
+        Mix senza allocazioni: buffer preallocati e operazioni in place.
+
+        Se `outdata` è già float32 con la forma giusta si mixa direttamente
+        al suo interno, altrimenti si passa dal buffer di mix interno.
+        """
+        if frames > len(self._scratch_buffer):
+            # Blocco più grande del previsto (blocksize variabile)
+            self._allocate_mix_buffers(frames)
+
+        direct = (
+            isinstance(outdata, np.ndarray)
+            and outdata.dtype == np.float32
+            and outdata.shape == (frames, self.config.channels)
+        )
+        mix = outdata if direct else self._mix_buffer[:frames]
+
+        mix.fill(0.0)
+        self._render_voices(mix, frames, self._scratch_buffer)
+
+        np.clip(mix, -1.0, 1.0, out=mix)
+        np.multiply(mix, self.config.master_gain, out=mix)
+
+        if not direct:
+            outdata[:] = mix
+
+    def _mix_legacy(self, outdata, frames: int):
+        """Mix originale: alloca nuovi array a ogni blocco"""
+        output = np.zeros((frames, self.config.channels), dtype=np.float32)
+        self._render_voices(output, frames)
 
         # Clip per evitare clipping
-        output = np.clip(output, -1.0, 1.0) * 0.9
+        output = np.clip(output, -1.0, 1.0) * self.config.master_gain
         outdata[:] = output.astype(np.float32)
 
+    def _render_voices(
+        self, mix: np.ndarray, frames: int, scratch: Optional[np.ndarray] = None
+    ):
+        """
+        Mixa le voci nel blocco: i pad con una catena di effetti passano
+        dal proprio bus, poi la catena master agisce sull'intero mix.
+        """
+        effects = self.effects
+
+        if not effects:
+            self.voices.render(mix, frames, scratch)
+        else:
+            self.voices.render(mix, frames, scratch, exclude=effects)
+
+            if frames > len(self._bus_buffer):
+                self._allocate_mix_buffers(frames)
+            bus = self._bus_buffer[:frames]
+
+            for name, chain in effects.items():
+                bus.fill(0.0)
+                self.voices.render(bus, frames, scratch, drum=name)
+                chain.process(bus)
+                np.add(mix, bus, out=mix)
+
+        master = self.master_effects
+        if master is not None:
+            master.process(mix)
+
+    def _process_events(self, frames: int):
+        """Avvia le voci per tutti i trigger pendenti (una lettura per sorgente)"""
+        for ring in self._trigger_sources:
+            n = ring.drain(self._drained)
+            if n > 0:
+                self._start_drained(n)
+
+    def _start_drained(self, n: int):
+        """Avvia le voci per i primi n trigger letti in self._drained"""
+        now = time.perf_counter()
+
+        for i in range(n):
+            sound = self._sound_table[self._drained_ids[i]]
+            timestamp = self._drained_timestamps[i]
+            delay = self._trigger_offset(timestamp, int(self._drained_frames[i]))
+
+            velocity = float(self._drained_velocities[i])
+            if velocity <= 0.0:
+                # Velocity 0 = smorza il suono (come note-on a velocity 0 in MIDI)
+                self.voices.choke(sound.name, delay)
+                continue
+            self.voices.start(sound.get_buffer(velocity), velocity, sound.name, delay)
+
+            chain = self.effects.get(sound.name)
+            if chain is not None:
+                chain.trigger()
+
+            # Misura latenza: attesa nel ring e uscita prevista dal DAC
+            if 0 < timestamp <= now:
+                self._latency_measurements.append(now - timestamp)
+                self.latency.record("enqueue_to_callback", now - timestamp)
+            self.latency.record(
+                "callback_to_dac", self._block_dac_time + delay / self.config.sample_rate - now
+            )
+
     def load_sound(self, name: str, data: np.ndarray, velocities: List[int] = None):
         """
         Carica suono con layer di velocity.
@@ -209,60 +907,321 @@ class LowLatencyAudioEngine:
             data: Audio buffer
             velocities: Lista velocity per layer (es. [60, 80, 100, 120])
         """
+        data = self._prepare_buffer(data)
         sound = DrumSound(name=name, buffer=data)
 
         if velocities:
             sound.velocity_layers = {}
-            for vel in velocities:
+            for vel in sorted(velocities):
                 gain = vel / 127.0
-                sound.velocity_layers[vel] = data * gain
+                sound.velocity_layers[vel] = data * np.float32(gain)
+
+            sound.layer_set = VelocityLayerSet(
+                [[layer] for layer in sound.velocity_layers.values()],
+                list(sound.velocity_layers.keys()),
+            )
+
+        self._register_sound(sound)
+
+    def load_layers(
+        self,
+        name: str,
+        layers: List[List[np.ndarray]],
+        thresholds: Optional[List[int]] = None,
+    ):
+        """
+        Carica un suono multi-campione (velocity layer + round-robin).
+
+        Args:
+            name: Nome suono
+            layers: Per ogni layer (dal più piano al più forte) i campioni alternativi
+            thresholds: Velocity MIDI massima di ogni layer (None = divisione uniforme)
+        """
+        prepared = [[self._prepare_buffer(data) for data in alternates] for alternates in layers]
+        layer_set = VelocityLayerSet(prepared, thresholds)
+
+        sound = DrumSound(name=name, buffer=prepared[-1][0], layer_set=layer_set)
+        self._register_sound(sound)
+
+    def _register_sound(self, sound: DrumSound):
+        """Registra il suono e gli assegna un id numerico per i trigger"""
+        name = sound.name
+
+        if name in self.drum_ids:
+            self._sound_table[self.drum_ids[name]] = sound
+        else:
+            self.drum_ids[name] = len(self._sound_table)
+            self._sound_table.append(sound)
+            self.set_voice_limit(name, VOICE_LIMITS.get(name, self.config.voices_per_drum))
 
         self.sounds[name] = sound
         print(f"[OK] Suono caricato: {name}")
 
+    def _prepare_buffer(self, data: np.ndarray) -> np.ndarray:
+        """Converte un buffer nel formato del mixer: (frames, channels) float32"""
+        if isinstance(data, StreamingSample):
+            return data
+
+        data = np.asarray(data, dtype=np.float32)
+
+        if data.ndim == 1:
+            data = np.repeat(data[:, np.newaxis], self.config.channels, axis=1)
+        elif data.shape[1] != self.config.channels:
+            mono = np.mean(data, axis=1, dtype=np.float32)
+            data = np.repeat(mono[:, np.newaxis], self.config.channels, axis=1)
+
+        return np.ascontiguousarray(data)
+
     def load_wav(self, name: str, path: str, velocities: List[int] = None):
         """Carica suono da file WAV"""
         try:
-            import soundfile as sf
+            self.load_sound(name, read_audio(path, self.config.sample_rate), velocities)
+
+        except Exception as e:
+            print(f"[ERR] Caricamento {path}: {e}")
+
+    # Nomi file dei kit multi-campione: <drum>[_v<layer>][_rr<alternativo>].wav
+    KIT_FILE_PATTERN = re.compile(r"^(?P<drum>.+?)(?:_v(?P<layer>\d+))?(?:_rr(?P<rr>\d+))?$")
+    KIT_EXTENSIONS = (".wav", ".flac", ".ogg", ".aiff")
+
+    def load_kit(self, kit_dir: str) -> List[str]:
+        """
+        Carica un kit multi-campione da una cartella (es. sounds/kits/my_kit).
+
+        I file `snare_v1_rr1.wav`, `snare_v1_rr2.wav`, `snare_v2_rr1.wav`, ...
+        diventano i layer/alternativi di "snare"; `kick.wav` resta un
+        campione singolo. I layer dividono la velocity in parti uguali.
+
+        Args:
+            kit_dir: Cartella del kit
 
-            data, sr = sf.read(path)
+        Returns:
+            Nomi dei suoni caricati
+        """
+        if not os.path.isdir(kit_dir):
+            print(f"[ERR] Kit non trovato: {kit_dir}")
+            return []
 
-            if len(data.shape) > 1:
-                data = np.mean(data, axis=1)
+        loaded = []
+        for drum, layer_paths in self.scan_kit(kit_dir).items():
+            try:
+                layers = [
+                    [read_audio(path, self.config.sample_rate) for path in paths]
+                    for paths in layer_paths
+                ]
+                self.load_layers(drum, layers)
+                loaded.append(drum)
+            except Exception as e:
+                print(f"[ERR] Caricamento {drum} da {kit_dir}: {e}")
+
+        return loaded
+
+    def load_bank(self, bank) -> List[str]:
+        """
+        Carica un sample bank compilato (vedi scripts/build_sample_bank.py).
+
+        I campioni restano viste sul file in memory-map: nessuna decodifica
+        né copia, il cambio kit costa solo la lettura dell'indice.
+
+        Args:
+            bank: SampleBank o percorso del file .bank
+
+        Returns:
+            Nomi dei suoni caricati
+        """
+        try:
+            if not isinstance(bank, SampleBank):
+                bank = SampleBank(bank)
+        except Exception as e:
+            print(f"[ERR] Sample bank {bank}: {e}")
+            return []
 
-            if sr != self.config.sample_rate:
-                import librosa
+        if bank.sample_rate != self.config.sample_rate or bank.channels != self.config.channels:
+            print(
+                f"[ERR] Sample bank a {bank.sample_rate} Hz / {bank.channels} canali, "
+                f"motore a {self.config.sample_rate} Hz / {self.config.channels} canali"
+            )
+            return []
+
+        channels = self.config.channels
+        for name in bank.names():
+            # I campioni lunghi restano sul file: in RAM solo la testa
+            layers = [
+                [self._maybe_stream(ArraySource(view, channels)) or view for view in alternates]
+                for alternates in bank.get_layers(name)
+            ]
+            self.load_layers(name, layers, bank.get_thresholds(name))
+        return bank.names()
+
+    def _maybe_stream(self, source) -> Optional[StreamingSample]:
+        """StreamingSample se la sorgente supera config.stream_threshold, altrimenti None"""
+        threshold = self.config.stream_threshold
+        if threshold <= 0 or len(source) <= threshold * self.config.sample_rate:
+            return None
+
+        self.streamer.start()
+        return StreamingSample(source, int(self.config.stream_head * self.config.sample_rate))
+
+    def load_streaming(self, name: str, path: str):
+        """
+        Carica un campione lungo in streaming: in RAM resta solo la testa.
 
-                data = librosa.resample(
-                    data, orig_sr=sr, target_sr=self.config.sample_rate
-                )
+        Il file deve avere il sample rate del motore (nessun ricampionamento
+        durante lo streaming).
+        """
+        try:
+            source = SoundFileSource(path, self.config.channels)
+            if source.sample_rate != self.config.sample_rate:
+                raise ValueError(f"sample rate {source.sample_rate} diverso dal motore")
 
-            self.load_sound(name, data, velocities)
+            self.streamer.start()
+            head = int(self.config.stream_head * self.config.sample_rate)
+            self.load_layers(name, [[StreamingSample(source, head)]])
 
         except Exception as e:
             print(f"[ERR] Caricamento {path}: {e}")
 
-    def play(self, drum_name: str, velocity: float = 1.0):
+    @classmethod
+    def scan_kit(cls, kit_dir: str) -> Dict[str, List[List[str]]]:
+        """
+        Raggruppa i file di un kit per suono.
+
+        Returns:
+            {drum: [[percorsi round-robin del layer 1], [layer 2], ...]}
+        """
+        # {drum: {layer: [(rr, path), ...]}}
+        files: Dict[str, Dict[int, List]] = {}
+        for filename in sorted(os.listdir(kit_dir)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() not in cls.KIT_EXTENSIONS:
+                continue
+
+            match = cls.KIT_FILE_PATTERN.match(stem.lower())
+            layer = int(match.group("layer") or 1)
+            rr = int(match.group("rr") or 1)
+            files.setdefault(match.group("drum"), {}).setdefault(layer, []).append(
+                (rr, os.path.join(kit_dir, filename))
+            )
+
+        return {
+            drum: [[path for _, path in sorted(layer_files[layer])] for layer in sorted(layer_files)]
+            for drum, layer_files in files.items()
+        }
+
+    def play(
+        self,
+        drum_name: str,
+        velocity: float = 1.0,
+        trigger_time: Optional[float] = None,
+        detection_time: Optional[float] = None,
+    ):
         """
-        Riproduce suono (thread-safe).
+        Riproduce suono (lock-free).
+
+        Va chiamato da un solo thread producer (loop di rilevamento).
 
         Args:
             drum_name: Nome suono
             velocity: Velocità (0-1)
+            trigger_time: perf_counter() del riconoscimento del colpo (per le statistiche)
+            detection_time: perf_counter() del frame/pose che ha generato il colpo
         """
         if not self.running:
             return
 
-        event = {
-            "drum": drum_name,
-            "velocity": velocity,
-            "timestamp": time.perf_counter(),
-        }
+        drum_id = self.drum_ids.get(drum_name)
+        if drum_id is None:
+            return
 
-        try:
-            self.event_queue.put_nowait(event)
-        except:
-            pass  # Queue piena - skip
+        now = time.perf_counter()
+        if trigger_time is not None:
+            self.latency.record("trigger_to_enqueue", now - trigger_time)
+            if detection_time is not None:
+                self.latency.record("detection_to_trigger", trigger_time - detection_time)
+
+        # Se il ring buffer è pieno l'evento viene scartato (vedi triggers.dropped)
+        self.triggers.push(drum_id, velocity, now)
+
+    def play_at(self, drum_name: str, velocity: float, timestamp: float):
+        """
+        Programma un suono a un istante futuro.
+
+        Args:
+            drum_name: Nome suono
+            velocity: Velocità (0-1)
+            timestamp: Istante in secondi nel clock di time.perf_counter()
+        """
+        if not self.running:
+            return
+
+        drum_id = self.drum_ids.get(drum_name)
+        if drum_id is not None:
+            self.triggers.push(drum_id, velocity, timestamp)
+
+    def play_at_frame(self, drum_name: str, velocity: float, frame: int):
+        """
+        Programma un suono a un frame assoluto del motore (vedi frame_position).
+
+        Args:
+            drum_name: Nome suono
+            velocity: Velocità (0-1)
+            frame: Frame assoluto di attacco
+        """
+        if not self.running:
+            return
+
+        drum_id = self.drum_ids.get(drum_name)
+        if drum_id is not None:
+            self.triggers.push(drum_id, velocity, 0.0, frame)
+
+    def choke(self, drum_name: str):
+        """
+        Smorza con un breve fade le voci di un suono (es. presa del crash).
+
+        Passa dal ring dei trigger come evento a velocity 0: le voci
+        appartengono al callback e solo lui le modifica.
+        """
+        if not self.running:
+            return
+
+        drum_id = self.drum_ids.get(drum_name)
+        if drum_id is not None:
+            self.triggers.push(drum_id, 0.0, time.perf_counter())
+
+    def set_voice_limit(self, drum_name: str, max_voices: int):
+        """Voci simultanee massime di un suono (oltre: ruba con fade)"""
+        limits = dict(self.voices.voice_limits)
+        limits[drum_name] = max(1, int(max_voices))
+        self.voices.voice_limits = limits
+
+    def set_choke_group(self, drum_name: str, group: Optional[str]):
+        """
+        Assegna un suono a un gruppo di choke (None = nessun gruppo).
+
+        Un colpo su un membro smorza le voci degli altri membri del gruppo.
+        """
+        groups = dict(self.voices.choke_groups)
+        if group is None:
+            groups.pop(drum_name, None)
+        else:
+            groups[drum_name] = group
+        self.voices.choke_groups = groups
+
+    def add_trigger_source(self) -> TriggerRingBuffer:
+        """
+        Crea un ring buffer dedicato per un nuovo thread producer.
+
+        Il ring principale (self.triggers) ammette un solo producer: ogni
+        altro thread che programma suoni (sequencer, processi esterni)
+        deve usare il proprio ring, letto dal callback insieme agli altri.
+        """
+        ring = TriggerRingBuffer(self.config.trigger_capacity)
+        self._trigger_sources = self._trigger_sources + [ring]
+        return ring
+
+    def remove_trigger_source(self, ring: TriggerRingBuffer):
+        """Rimuove un ring creato con add_trigger_source()"""
+        self._trigger_sources = [r for r in self._trigger_sources if r is not ring]
 
     def stop(self):
         """Ferma il motore"""
@@ -282,45 +1241,150 @@ class LowLatencyAudioEngine:
             except:
                 pass
 
+        if self.null_backend:
+            self.null_backend.stop()
+
+        self.voices.stop_all()
+        self.streamer.stop()
         print("[OK] Audio fermato")
 
+    def set_metronome(
+        self, enabled: bool, bpm: Optional[float] = None, beats_per_bar: Optional[int] = None
+    ):
+        """
+        Attiva/disattiva il metronomo interno.
+
+        Args:
+            enabled: Stato del metronomo
+            bpm: Nuovi BPM (None = invariati)
+            beats_per_bar: Battiti per battuta (None = invariati)
+        """
+        if bpm is not None:
+            self.metronome.set_tempo(bpm)
+        if beats_per_bar is not None:
+            self.metronome.beats_per_bar = max(1, int(beats_per_bar))
+
+        if enabled and not self.metronome.enabled:
+            self.metronome.start()
+        elif not enabled:
+            self.metronome.stop()
+
+    def set_effects(self, drum_name: str, chain: Optional[EffectChain]):
+        """
+        Assegna una catena di effetti al bus di un pad (None = rimuove).
+
+        Il dizionario viene sostituito, mai modificato, così il callback
+        non lo vede mai a metà aggiornamento.
+        """
+        effects = dict(self.effects)
+        if chain is None:
+            effects.pop(drum_name, None)
+        else:
+            effects[drum_name] = chain
+        self.effects = effects
+
+    def set_effect_parameter(self, drum_name: str, name: str, value: float):
+        """
+        Modifica dal vivo un effetto di un pad (es. 'lowpass_freq', 'distortion').
+
+        Costa solo il ricalcolo dei coefficienti: nessun re-render del campione.
+        """
+        chain = self.effects.get(drum_name)
+        if chain is None:
+            chain = EffectChain(
+                sample_rate=self.config.sample_rate,
+                channels=self.config.channels,
+                max_frames=max(4096, self.config.buffer_size),
+            )
+            chain.set_parameter(name, value)
+            self.set_effects(drum_name, chain)
+        else:
+            chain.set_parameter(name, value)
+
+    def get_mixer_stats(self) -> Dict:
+        """Statistiche del mixer"""
+        return {
+            "mix_mode": self.config.mix_mode,
+            "callbacks": self.callback_count,
+            "active_voices": self.voices.active_count,
+            "stolen_voices": self.voices.stolen_count,
+            "choked_voices": self.voices.choked_count,
+            "voice_budget": self.voices.budget,
+            "dropped_triggers": sum(r.dropped for r in self._trigger_sources),
+            "late_triggers": self.late_triggers,
+        }
+
     def get_latency_stats(self) -> Dict:
-        """Statistiche latenza"""
+        """
+        Statistiche latenza (ms).
+
+        avg/min/max/jitter si riferiscono agli ultimi 100 trigger
+        (enqueue -> callback); 'stages', 'callback' e i contatori xrun
+        vengono da LatencyMonitor.snapshot() su tutta la sessione.
+        """
+        stats = self.latency.snapshot()
+        stats["stream_underruns"] = self.streamer.underruns
+
         if not self._latency_measurements:
-            return {"avg": 0, "min": 0, "max": 0, "jitter": 0}
+            stats.update({"avg": 0, "min": 0, "max": 0, "jitter": 0})
+            return stats
 
         measurements = list(self._latency_measurements)
 
-        return {
-            "avg": np.mean(measurements) * 1000,
-            "min": np.min(measurements) * 1000,
-            "max": np.max(measurements) * 1000,
-            "jitter": np.std(measurements) * 1000,
-        }
+        stats.update(
+            {
+                "avg": np.mean(measurements) * 1000,
+                "min": np.min(measurements) * 1000,
+                "max": np.max(measurements) * 1000,
+                "jitter": np.std(measurements) * 1000,
+            }
+        )
+        return stats
 
 
 class PrecomputedDrumPool:
     """
     Pool di suoni precalcolati per evitare sintesi realtime.
+
+    Con una cache di sintesi i buffer stereo float32 vengono caricati da
+    disco in memory-map, già nel formato del mixer (nessuna copia).
     """
 
-    def __init__(self, sample_rate: int = 44100):
+    def __init__(self, sample_rate: int = 44100, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """
+        Args:
+            sample_rate: Sample rate
+            cache_dir: Cartella della cache di sintesi (default: sounds/cache nel
+                progetto, None = sempre sintesi)
+        """
         self.sample_rate = sample_rate
         self.sounds: Dict[str, np.ndarray] = {}
+        self.cache = SynthesisCache(cache_dir) if cache_dir else None
 
-    def generate_kick(self, pitch: float = 60, duration: float = 0.3) -> np.ndarray:
-        """Genera kick precalcolato"""
-        t = np.linspace(0, duration, int(self.sample_rate * duration))
+    def generate_kick_variants(
+        self, pitches, decays=10.0, duration: float = 0.3
+    ) -> np.ndarray:
+        """
+        Genera varianti di kick in un solo passaggio vettorializzato.
 
-        freq = np.linspace(pitch, pitch * 0.5, len(t))
-        wave = np.sin(2 * np.pi * freq * t)
-        wave += 0.3 * np.sin(2 * np.pi * freq * 2 * t)
+        Args:
+            pitches: Frequenze iniziali (Hz)
+            decays: Decadimento dell'inviluppo, broadcast con pitches
+            duration: Durata (secondi)
 
-        envelope = np.exp(-t * 10)
-        wave *= envelope
-        wave = np.clip(wave, -1, 1) * 0.9
+        Returns:
+            Array (varianti, frame, 2) float32
+        """
+        waves = pitched_drum_batch(
+            self.sample_rate, duration, pitches, decays, end_ratio=0.5,
+            harmonics=((1.0, 1.0), (2.0, 0.3)),
+        )
+        waves = (np.clip(waves, -1, 1) * 0.9).astype(np.float32)
+        return np.repeat(waves[:, :, np.newaxis], 2, axis=2)
 
-        return np.column_stack([wave, wave])
+    def generate_kick(self, pitch: float = 60, duration: float = 0.3) -> np.ndarray:
+        """Genera kick precalcolato"""
+        return self.generate_kick_variants([pitch], duration=duration)[0]
 
     def generate_snare(self, duration: float = 0.2) -> np.ndarray:
         """Genera snare precalcolato"""
@@ -346,13 +1410,20 @@ class PrecomputedDrumPool:
 
         return np.column_stack([wave, wave])
 
+    def _synthesize(self, name: str, generator: Callable, **params) -> np.ndarray:
+        """Buffer stereo float32 dalla cache (generato e salvato se manca)"""
+        if self.cache is None:
+            return np.asarray(generator(**params), dtype=np.float32)
+        return self.cache.get(name, self.sample_rate, generator, params)
+
     def generate_all(self):
-        """Genera tutti i suoni base"""
-        self.sounds["kick"] = self.generate_kick()
-        self.sounds["snare"] = self.generate_snare()
-        self.sounds["hihat"] = self.generate_hihat()
+        """Genera tutti i suoni base (o li carica dalla cache)"""
+        self.sounds["kick"] = self._synthesize("kick", self.generate_kick)
+        self.sounds["snare"] = self._synthesize("snare", self.generate_snare)
+        self.sounds["hihat"] = self._synthesize("hihat", self.generate_hihat)
 
-        print("[OK] Suoni precalcolati")
+        cached = f", cache: {self.cache.hits} da disco" if self.cache else ""
+        print(f"[OK] Suoni precalcolati{cached}")
 
 
 def create_low_latency_engine(
@@ -420,6 +1491,12 @@ if __name__ == "__main__":
         print(f"  Min: {stats['min']:.2f}ms")
         print(f"  Max: {stats['max']:.2f}ms")
         print(f"  Jitter: {stats['jitter']:.2f}ms")
+        for stage, values in stats["stages"].items():
+            if values["count"]:
+                print(f"  {stage}: p50 {values['p50']:.2f}ms, p99 {values['p99']:.2f}ms")
+        load = stats["callback"]
+        print(f"  Carico callback: {load['load_mean']:.1%} (max {load['load_max']:.1%})")
+        print(f"  Xrun: {stats['xruns']} (underflow: {stats['underflows']})")
 
         engine.stop()
     else:
@@ -0,0 +1,151 @@
+"""
+Metronomo Sample-Accurate
+
+Metronomo generato dentro il motore audio, indipendente dal frame rate
+della camera:
+- Click e click accentato precalcolati una sola volta
+- Battiti posizionati su frame esatti calcolati dai BPM
+- Cambio di tempo senza salti di fase (vale dal battito successivo)
+- Battuta completa pre-renderizzata per i mixer che sanno solo fare loop
+"""
+
+import numpy as np
+from typing import Optional
+
+
+def generate_click(
+    sample_rate: int = 44100,
+    frequency: float = 1000.0,
+    duration: float = 0.05,
+    decay: float = 50.0,
+    gain: float = 0.3,
+) -> np.ndarray:
+    """
+    Genera un click sinusoidale con decadimento esponenziale.
+
+    Returns:
+        Click mono float32
+    """
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    click = np.sin(2 * np.pi * frequency * t) * np.exp(-t * decay)
+    return (np.clip(click, -1, 1) * gain).astype(np.float32)
+
+
+class Metronome:
+    """
+    Sorgente di click per il motore audio.
+
+    I battiti sono calcolati in frame assoluti del motore: il callback
+    chiama schedule() ad ogni blocco e i click partono con l'offset
+    esatto all'interno del blocco.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 44100,
+        bpm: float = 120,
+        beats_per_bar: int = 4,
+        gain: float = 1.0,
+        channels: int = 2,
+    ):
+        """
+        Args:
+            sample_rate: Frequenza di campionamento
+            bpm: Battiti al minuto
+            beats_per_bar: Battiti per battuta (il primo è accentato)
+            gain: Volume dei click
+            channels: Canali delle voci avviate nel motore
+        """
+        self.sample_rate = sample_rate
+        self.bpm = float(bpm)
+        self.beats_per_bar = beats_per_bar
+        self.gain = gain
+        self.enabled = False
+
+        # Click precalcolati (il primo battito è più acuto e forte)
+        self.click = generate_click(sample_rate, frequency=1000.0, gain=0.3)
+        self.accent = generate_click(sample_rate, frequency=1500.0, gain=0.45)
+
+        # Stessi click nel formato delle voci del motore (frames, channels)
+        self._click_voice = np.repeat(self.click[:, np.newaxis], channels, axis=1)
+        self._accent_voice = np.repeat(self.accent[:, np.newaxis], channels, axis=1)
+
+        # Stato del callback: prossimo battito in frame assoluti
+        self.beat_count = 0
+        self._next_beat_frame: Optional[float] = None
+
+    @property
+    def frames_per_beat(self) -> float:
+        """Durata di un battito in frame (frazionaria, nessun arrotondamento cumulato)"""
+        return self.sample_rate * 60.0 / self.bpm
+
+    def set_tempo(self, bpm: float):
+        """Cambia i BPM: il prossimo battito già programmato resta invariato"""
+        self.bpm = float(max(1.0, bpm))
+
+    def start(self):
+        """Attiva il metronomo: il primo battito cade sul blocco successivo"""
+        self.beat_count = 0
+        self._next_beat_frame = None
+        self.enabled = True
+
+    def stop(self):
+        """Disattiva il metronomo"""
+        self.enabled = False
+
+    def schedule(self, voices, block_start: int, frames: int) -> int:
+        """
+        Avvia i click che cadono nel blocco [block_start, block_start + frames).
+
+        Args:
+            voices: VoicePool del motore
+            block_start: Frame assoluto di inizio del blocco
+            frames: Dimensione del blocco
+
+        Returns:
+            Numero di click avviati
+        """
+        if not self.enabled:
+            return 0
+
+        if self._next_beat_frame is None:
+            self._next_beat_frame = float(block_start)
+
+        block_end = block_start + frames
+        started = 0
+
+        while self._next_beat_frame < block_end:
+            offset = max(0, int(round(self._next_beat_frame)) - block_start)
+            if offset >= frames:
+                break
+
+            accent = self.beat_count % self.beats_per_bar == 0
+            sample = self._accent_voice if accent else self._click_voice
+            voices.start(sample, self.gain, "metronome", offset)
+
+            self.beat_count += 1
+            self._next_beat_frame += self.frames_per_beat
+            started += 1
+
+        return started
+
+    def render_bar(self, channels: int = 2) -> np.ndarray:
+        """
+        Pre-renderizza una battuta completa (click + silenzio).
+
+        Suonata in loop dal mixer mantiene il tempo a campione, senza
+        bisogno di controlli dal loop principale.
+
+        Returns:
+            Array (frames, channels) float32
+        """
+        length = int(round(self.frames_per_beat * self.beats_per_bar))
+        bar = np.zeros(length, dtype=np.float32)
+
+        for beat in range(self.beats_per_bar):
+            start = int(round(beat * self.frames_per_beat))
+            sample = self.accent if beat == 0 else self.click
+            end = min(length, start + len(sample))
+            bar[start:end] += sample[: end - start] * self.gain
+
+        return np.repeat(bar[:, np.newaxis], channels, axis=1)
@@ -6,11 +6,15 @@ import mediapipe as mp
 import numpy as np
 from typing import Optional, Dict, Tuple
 import time
+from src.frame_capture import ThreadedCapture
+from src.keypoints import JOINTS, KeypointFrame
+from src.keypoint_filter import create_keypoint_filter
 
 class MotionTracker:
     """Classe per tracciare i movimenti dell'utente usando MediaPipe Pose"""
     
-    def __init__(self, camera_index: int = 0, width: int = 640, height: int = 480):
+    def __init__(self, camera_index: int = 0, width: int = 640, height: int = 480,
+                 threaded_capture: bool = True, pose_filter: str = 'average'):
         """
         Inizializza il motion tracker
         
@@ -18,10 +22,13 @@ class MotionTracker:
             camera_index: Indice della videocamera
             width: Larghezza del frame
             height: Altezza del frame
+            threaded_capture: Cattura in un thread dedicato (sempre il frame più recente)
+            pose_filter: Filtro delle posizioni ('one_euro', 'kalman' o 'average')
         """
         self.camera_index = camera_index
         self.width = width
         self.height = height
+        self.threaded_capture = threaded_capture
         
         # Inizializza MediaPipe
         self.mp_pose = mp.solutions.pose
@@ -34,12 +41,20 @@ class MotionTracker:
         
         # Inizializza la videocamera
         self.cap = None
+        self.capture: Optional[ThreadedCapture] = None
+        self.frame_timestamp = 0.0  # perf_counter() di acquisizione dell'ultimo frame
+        self.frame_sequence = 0  # Numero di sequenza dell'ultimo frame
         self.last_positions = {}  # Per calcolare la velocità
-        self.last_time = time.time()
+        self.last_time = time.perf_counter()
         
-        # Filtro per smoothing delle posizioni
-        self.position_history = {}  # Storia delle posizioni per smoothing
-        self.history_size = 5
+        # Indici dei landmark MediaPipe nell'ordine di JOINTS
+        self._landmark_ids = [self.mp_pose.PoseLandmark[name.upper()].value for name in JOINTS]
+        self._raw_keypoints = np.zeros((len(JOINTS), 3), dtype=np.float32)
+        
+        # Filtro per smoothing delle posizioni (stima anche velocità e accelerazione)
+        self.history_size = 5  # Solo per la media mobile
+        self.pose_filter = pose_filter
+        self.keypoint_filter = create_keypoint_filter(pose_filter, self.history_size)
         
     def initialize_camera(self) -> bool:
         """Inizializza la videocamera"""
@@ -47,13 +62,34 @@ class MotionTracker:
             self.cap = cv2.VideoCapture(self.camera_index)
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-            return self.cap.isOpened()
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Niente frame vecchi in coda nel driver
+            if not self.cap.isOpened():
+                return False
+            
+            if self.threaded_capture:
+                # Specchia nel thread di cattura, fuori dal percorso dei trigger
+                self.capture = ThreadedCapture(self.cap, transform=lambda f: cv2.flip(f, 1))
+                self.capture.start()
+            return True
         except Exception as e:
             print(f"Errore nell'inizializzazione della videocamera: {e}")
             return False
     
-    def get_frame(self) -> Optional[np.ndarray]:
-        """Ottiene un frame dalla videocamera"""
+    def get_frame(self, timeout: float = 0.1) -> Optional[np.ndarray]:
+        """
+        Ottiene un frame dalla videocamera
+        
+        Con la cattura in thread restituisce il frame più recente non
+        ancora elaborato (attende al massimo `timeout` secondi); timestamp
+        e sequenza sono in frame_timestamp e frame_sequence.
+        """
+        if self.capture is not None:
+            info = self.capture.read(timeout)
+            if info is None:
+                return None
+            frame, self.frame_timestamp, self.frame_sequence = info
+            return frame
+        
         if self.cap is None or not self.cap.isOpened():
             return None
         
@@ -61,14 +97,23 @@ class MotionTracker:
         if not ret:
             return None
         
+        self.frame_timestamp = time.perf_counter()
+        self.frame_sequence += 1
         return cv2.flip(frame, 1)  # Specchia il frame per effetto specchio
     
-    def detect_pose(self, frame: np.ndarray) -> Optional[Dict]:
+    def detect_pose(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Optional[Dict]:
         """
         Rileva la posa dell'utente nel frame
         
+        Args:
+            frame: Frame BGR
+            timestamp: Istante di acquisizione (default: frame_timestamp)
+        
         Returns:
-            Dizionario con le posizioni delle articolazioni chiave
+            Dizionario con 'keypoints' (array articolazioni × 3, righe in
+            ordine di JOINTS), 'key_points' (vista per nome sullo stesso
+            array), 'velocity' e 'acceleration' (stesse righe, unità/s e
+            unità/s²), 'landmarks' e 'frame'
         """
         if frame is None:
             return None
@@ -86,70 +131,34 @@ class MotionTracker:
         # Estrai le posizioni delle articolazioni chiave
         landmarks = results.pose_landmarks.landmark
         
-        # Converti in coordinate normalizzate (0-1) con smoothing
-        raw_key_points = {
-            'left_wrist': np.array([
-                landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].y,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].z
-            ]),
-            'right_wrist': np.array([
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].y,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].z
-            ]),
-            'left_knee': np.array([
-                landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE].y,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE].z
-            ]),
-            'right_knee': np.array([
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE].y,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE].z
-            ]),
-            'left_ankle': np.array([
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE].y,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE].z
-            ]),
-            'right_ankle': np.array([
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE].y,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE].z
-            ]),
-            'nose': np.array([
-                landmarks[self.mp_pose.PoseLandmark.NOSE].x,
-                landmarks[self.mp_pose.PoseLandmark.NOSE].y,
-                landmarks[self.mp_pose.PoseLandmark.NOSE].z
-            ])
-        }
+        # Coordinate normalizzate (0-1) nell'array preallocato (articolazioni × 3)
+        raw = self._raw_keypoints
+        for row, landmark_id in enumerate(self._landmark_ids):
+            landmark = landmarks[landmark_id]
+            raw[row, 0] = landmark.x
+            raw[row, 1] = landmark.y
+            raw[row, 2] = landmark.z
         
-        # Applica smoothing
-        key_points = {}
-        for point_name, point in raw_key_points.items():
-            if point_name not in self.position_history:
-                self.position_history[point_name] = []
-            
-            self.position_history[point_name].append(point)
-            if len(self.position_history[point_name]) > self.history_size:
-                self.position_history[point_name].pop(0)
-            
-            # Media mobile per smoothing
-            if len(self.position_history[point_name]) > 1:
-                smoothed = np.mean(self.position_history[point_name], axis=0)
-                key_points[point_name] = smoothed
-            else:
-                key_points[point_name] = point
+        # Applica smoothing (filtro adattivo o media mobile)
+        if timestamp is None:
+            timestamp = self.frame_timestamp or time.perf_counter()
+        keypoints = self.keypoint_filter.update(raw, timestamp)
         
         return {
-            'key_points': key_points,
+            'keypoints': keypoints,
+            'key_points': KeypointFrame(keypoints),
+            'velocity': self.keypoint_filter.velocity,
+            'acceleration': self.keypoint_filter.acceleration,
             'landmarks': results.pose_landmarks,
             'frame': frame
         }
     
     def calculate_velocity(self, current_pos: np.ndarray, last_pos: np.ndarray, dt: float) -> float:
-        """Calcola la velocità di movimento"""
+        """
+        Calcola la velocità di movimento (differenza finita tra due posizioni)
+        
+        Il loop live usa le stime del filtro ('velocity' in detect_pose).
+        """
         if dt == 0:
             return 0.0
         
@@ -164,7 +173,7 @@ class MotionTracker:
         Returns:
             Dizionario con velocità di left_wrist e right_wrist
         """
-        current_time = time.time()
+        current_time = time.perf_counter()
         dt = current_time - self.last_time
         
         velocities = {}
@@ -202,6 +211,9 @@ class MotionTracker:
     
     def release(self):
         """Rilascia le risorse"""
+        if self.capture is not None:
+            self.capture.stop()
+            self.capture = None
         if self.cap is not None:
             self.cap.release()
         cv2.destroyAllWindows()
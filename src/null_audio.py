@@ -0,0 +1,246 @@
+"""
+Null Audio Backend
+
+Backend senza dispositivo audio per CI e benchmark:
+- Chiama il callback del motore con un clock virtuale (frame renderizzati)
+- Modalità veloce (il più rapido possibile) o cadenzata in tempo reale
+- Cattura dell'uscita in un buffer preallocato o su file WAV
+- Throughput in blocchi al secondo e fattore rispetto al tempo reale
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Callable, Optional
+
+from src.offline_renderer import WavWriter
+
+
+class VirtualTimeInfo:
+    """time_info come quello di PortAudio, ma nel clock virtuale"""
+
+    __slots__ = ("currentTime", "outputBufferDacTime")
+
+    def __init__(self):
+        self.currentTime = 0.0
+        self.outputBufferDacTime = 0.0
+
+
+class NullAudioBackend:
+    """Driver del callback audio con clock virtuale"""
+
+    def __init__(
+        self,
+        callback: Callable,
+        sample_rate: int = 44100,
+        buffer_size: int = 256,
+        channels: int = 2,
+        realtime: bool = False,
+        output_latency: float = 0.0,
+        capture_frames: int = 0,
+        capture_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            callback: Callback del motore (outdata, frames, time_info, status)
+            sample_rate: Frequenza di campionamento
+            buffer_size: Frame per blocco
+            channels: Canali
+            realtime: Cadenza i blocchi in tempo reale (thread in background)
+            output_latency: Latenza di uscita simulata (secondi)
+            capture_frames: Frame da catturare in memoria (0 = nessuna cattura)
+            capture_path: WAV su cui scrivere l'uscita (opzionale)
+        """
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.channels = channels
+        self.realtime = realtime
+        self.output_latency = output_latency
+
+        self._outdata = np.zeros((buffer_size, channels), dtype=np.float32)
+        self._time_info = VirtualTimeInfo()
+
+        self.capture = np.zeros((capture_frames, channels), dtype=np.float32)
+        self.captured_frames = 0
+        self.capture_path = capture_path
+        self._writer: Optional[WavWriter] = None
+
+        self.blocks = 0
+        self.frames = 0
+        self.callback_time = 0.0  # Secondi spesi nel callback
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def time(self) -> float:
+        """Clock virtuale in secondi"""
+        return self.frames / self.sample_rate
+
+    def process_block(self):
+        """Renderizza un blocco e avanza il clock virtuale"""
+        outdata = self._outdata
+        info = self._time_info
+        info.currentTime = self.time
+        info.outputBufferDacTime = info.currentTime + self.output_latency
+
+        start = time.perf_counter()
+        self.callback(outdata, self.buffer_size, info, None)
+        self.callback_time += time.perf_counter() - start
+
+        self._capture(outdata)
+        self.blocks += 1
+        self.frames += self.buffer_size
+
+    def _capture(self, block: np.ndarray):
+        """Copia il blocco nel buffer di cattura e/o sul WAV"""
+        if self.captured_frames < len(self.capture):
+            n = min(len(block), len(self.capture) - self.captured_frames)
+            self.capture[self.captured_frames : self.captured_frames + n] = block[:n]
+            self.captured_frames += n
+
+        if self.capture_path is not None:
+            if self._writer is None:
+                self._writer = WavWriter(self.capture_path, self.sample_rate, self.channels)
+            self._writer.write(np.clip(block, -1.0, 1.0))
+
+    def run(self, blocks: Optional[int] = None, seconds: Optional[float] = None) -> float:
+        """
+        Renderizza in modo sincrono (veloce o cadenzato secondo `realtime`).
+
+        Args:
+            blocks: Numero di blocchi
+            seconds: In alternativa, durata nel clock virtuale
+
+        Returns:
+            Blocchi al secondo ottenuti
+        """
+        if blocks is None:
+            blocks = int(np.ceil((seconds or 0.0) * self.sample_rate / self.buffer_size))
+
+        start = time.perf_counter()
+        block_time = self.buffer_size / self.sample_rate
+
+        for i in range(blocks):
+            if self._stop_event.is_set():
+                break
+            self.process_block()
+
+            if self.realtime:
+                # Cadenza sul tempo assoluto: nessuna deriva cumulata
+                delay = start + (i + 1) * block_time - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+
+        elapsed = time.perf_counter() - start
+        return blocks / elapsed if elapsed > 0 else float("inf")
+
+    def start(self):
+        """Avvia il rendering continuo in tempo reale in un thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self.realtime = True
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.is_set():
+                self.run(blocks=int(self.sample_rate / self.buffer_size))
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferma il thread e chiude il WAV di cattura"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.close()
+
+    def close(self):
+        """Chiude il WAV di cattura"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def captured(self) -> np.ndarray:
+        """Audio catturato in memoria"""
+        return self.capture[: self.captured_frames]
+
+    def get_stats(self) -> dict:
+        """Throughput del callback"""
+        block_time = self.buffer_size / self.sample_rate
+        per_block = self.callback_time / self.blocks if self.blocks else 0.0
+        return {
+            "blocks": self.blocks,
+            "virtual_time": self.time,
+            "callback_time": self.callback_time,
+            "blocks_per_second": 1.0 / per_block if per_block else 0.0,
+            "realtime_factor": block_time / per_block if per_block else 0.0,
+        }
+
+
+def benchmark_engine(engine, seconds: float = 10.0, hits_per_second: float = 16.0) -> dict:
+    """
+    Misura il throughput del callback con un pattern di colpi regolare.
+
+    I colpi sono programmati su frame esatti (play_at_frame), quindi il
+    risultato audio è deterministico a parità di suoni caricati.
+
+    Args:
+        engine: LowLatencyAudioEngine inizializzato con backend "null"
+        seconds: Durata nel clock virtuale
+        hits_per_second: Colpi programmati al secondo (a rotazione sui suoni)
+
+    Returns:
+        Statistiche del backend (blocks_per_second, realtime_factor, ...)
+    """
+    backend = engine.null_backend
+    if backend is None:
+        raise RuntimeError("Il motore non usa il backend null")
+
+    names = list(engine.drum_ids.keys())
+    block = backend.buffer_size
+    hit_interval = int(backend.sample_rate / hits_per_second)
+    blocks = int(np.ceil(seconds * backend.sample_rate / block))
+
+    next_hit = engine.frame_position
+    hit = 0
+    for _ in range(blocks):
+        # Programma i colpi che cadono nel prossimo blocco
+        while names and next_hit < engine.frame_position + block:
+            engine.play_at_frame(names[hit % len(names)], 0.5 + 0.5 * (hit % 4 == 0), next_hit)
+            next_hit += hit_interval
+            hit += 1
+        backend.run(blocks=1)
+
+    stats = backend.get_stats()
+    stats["hits"] = hit
+    return stats
+
+
+if __name__ == "__main__":
+    from src.low_latency_audio import AudioConfig, LowLatencyAudioEngine, PrecomputedDrumPool
+
+    print("=" * 60)
+    print("BENCHMARK CALLBACK (backend null)")
+    print("=" * 60)
+
+    for buffer_size in (64, 128, 256, 512):
+        engine = LowLatencyAudioEngine(AudioConfig(buffer_size=buffer_size, backend="null"))
+        engine.initialize()
+
+        pool = PrecomputedDrumPool(engine.config.sample_rate)
+        pool.generate_all()
+        for name, buffer in pool.sounds.items():
+            engine.load_sound(name, buffer)
+
+        stats = benchmark_engine(engine, seconds=10.0)
+        engine.stop()
+
+        print(
+            f"  Buffer {buffer_size:4d}: {stats['blocks_per_second']:10.0f} blocchi/s "
+            f"({stats['realtime_factor']:.0f}x tempo reale, {stats['hits']} colpi)"
+        )
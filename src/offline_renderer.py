@@ -0,0 +1,328 @@
+"""
+Render Offline
+
+Converte pattern di batteria in audio più veloce del tempo reale:
+- Sorgenti: List[DrumEvent], PrettyMIDI o pattern registrati
+- Campioni da SoundLibrary, PrecomputedDrumPool o dizionario
+- Mix overlap-add per suono: somma diretta a slice per eventi radi,
+  convoluzione FFT di un treno di impulsi (velocity) per eventi densi
+- Render a blocchi con scrittura in streaming su WAV per brani lunghi
+"""
+
+import wave
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from scipy import signal
+
+from src.dsp_utils import resample
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+
+# Note General MIDI -> nomi dei suoni
+GM_NOTE_NAMES = {
+    35: "kick",
+    36: "kick",
+    37: "rim",
+    38: "snare",
+    39: "clap",
+    40: "snare",
+    41: "tom_floor",
+    42: "hihat_closed",
+    43: "tom_floor",
+    44: "hihat_closed",
+    45: "tom2",
+    46: "hihat_open",
+    47: "tom2",
+    48: "tom1",
+    49: "crash",
+    50: "tom1",
+    51: "ride",
+    52: "crash",
+    55: "crash",
+    57: "crash",
+    59: "ride",
+}
+
+# Suono sostitutivo quando il kit non ha quello richiesto
+DRUM_FALLBACKS = {
+    "hihat_closed": "hihat",
+    "hihat_open": "hihat",
+    "ride": "crash",
+    "tom_floor": "tom2",
+    "rim": "snare",
+    "clap": "snare",
+}
+
+
+class OfflineRenderer:
+    """Mixer offline a overlap-add per pattern di batteria"""
+
+    def __init__(self, sounds: Dict[str, np.ndarray], sample_rate: int = 44100,
+                 channels: int = 2, gain: float = 0.9):
+        """
+        Args:
+            sounds: {nome: campione} mono (N,) o multicanale (N, canali)
+            sample_rate: Frequenza di campionamento dei campioni
+            channels: Canali dell'audio renderizzato
+            gain: Guadagno master
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.gain = gain
+        self.sounds: Dict[str, np.ndarray] = {
+            name: self._prepare(audio) for name, audio in sounds.items()
+            if audio is not None and len(audio) > 0
+        }
+        self.missing_events = 0  # Eventi senza campione nell'ultimo render
+
+    @classmethod
+    def from_sound_library(cls, library, sample_rate: int = 44100,
+                           **kwargs) -> 'OfflineRenderer':
+        """Usa i campioni (con modifiche applicate) di una SoundLibrary, ricampionati a sample_rate"""
+        sounds = {}
+        for name in library.list_samples():
+            audio = library.get_audio(name)
+            if audio is not None and len(audio) > 0:
+                sounds[name] = resample(audio, library.get_sample(name).sample_rate, sample_rate)
+        return cls(sounds, sample_rate, **kwargs)
+
+    @classmethod
+    def from_pool(cls, pool, **kwargs) -> 'OfflineRenderer':
+        """Usa i suoni di un PrecomputedDrumPool (generati se mancanti)"""
+        if not pool.sounds:
+            pool.generate_all()
+        return cls(pool.sounds, pool.sample_rate, **kwargs)
+
+    def _prepare(self, audio: np.ndarray) -> np.ndarray:
+        """Campione come (frames, channels) float32"""
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim == 1:
+            audio = audio[:, np.newaxis]
+        if audio.shape[1] != self.channels:
+            audio = np.repeat(audio.mean(axis=1, keepdims=True), self.channels, axis=1)
+        return np.ascontiguousarray(audio)
+
+    def _resolve(self, drum: str) -> Optional[str]:
+        """Nome del suono disponibile per un drum (con sostituti)"""
+        if drum in self.sounds:
+            return drum
+        fallback = DRUM_FALLBACKS.get(drum)
+        return fallback if fallback in self.sounds else None
+
+    # === Conversione delle sorgenti in array ===
+
+    @staticmethod
+    def events_from_drum_events(events: Iterable) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """List[DrumEvent] -> (tempi, suoni, velocity)"""
+        events = list(events)
+        times = np.array([e.time + e.timing_offset for e in events], dtype=np.float64)
+        velocities = np.array([e.velocity for e in events], dtype=np.float32)
+        return times, [e.drum for e in events], velocities
+
+    @staticmethod
+    def events_from_pattern(pattern: List[Dict]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Pattern registrato ({'time', 'drum', 'velocity'}) -> (tempi, suoni, velocity)"""
+        times = np.array([e['time'] for e in pattern], dtype=np.float64)
+        velocities = np.array([e.get('velocity', 1.0) for e in pattern], dtype=np.float32)
+        return times, [e['drum'] for e in pattern], velocities
+
+    @staticmethod
+    def events_from_midi(midi) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """PrettyMIDI (tracce di batteria) -> (tempi, suoni, velocity)"""
+        notes = [
+            note
+            for instrument in midi.instruments if instrument.is_drum
+            for note in instrument.notes
+        ]
+        times = np.array([n.start for n in notes], dtype=np.float64)
+        velocities = np.array([n.velocity / 127.0 for n in notes], dtype=np.float32)
+        drums = [GM_NOTE_NAMES.get(n.pitch, f"note_{n.pitch}") for n in notes]
+        return times, drums, velocities
+
+    def _to_arrays(self, source) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Riconosce il tipo di sorgente"""
+        if hasattr(source, 'instruments'):
+            return self.events_from_midi(source)
+        source = list(source)
+        if source and isinstance(source[0], dict):
+            return self.events_from_pattern(source)
+        return self.events_from_drum_events(source)
+
+    def _group(self, source) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Eventi raggruppati per suono: {nome: (frame di attacco, gain)}"""
+        times, drums, velocities = self._to_arrays(source)
+        onsets = np.maximum(np.round(times * self.sample_rate), 0).astype(np.int64)
+
+        resolved = np.array([self._resolve(d) or "" for d in drums], dtype=object)
+        self.missing_events = int(np.sum(resolved == ""))
+
+        groups = {}
+        for name in set(resolved) - {""}:
+            mask = resolved == name
+            groups[name] = (onsets[mask], velocities[mask])
+        return groups
+
+    # === Render ===
+
+    def _length(self, groups: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> int:
+        """Frame totali: ultimo attacco + coda del relativo campione"""
+        length = 0
+        for name, (onsets, _) in groups.items():
+            if len(onsets):
+                length = max(length, int(onsets.max()) + len(self.sounds[name]))
+        return length
+
+    def _render_range(self, groups: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                      start: int, stop: int) -> np.ndarray:
+        """Renderizza i frame [start, stop) con overlap-add per ogni suono"""
+        output = np.zeros((stop - start, self.channels), dtype=np.float32)
+
+        for name, (onsets, gains) in groups.items():
+            sample = self.sounds[name]
+            tail = len(sample) - 1
+
+            # Attacchi che contribuiscono al blocco (anche con la sola coda)
+            mask = (onsets >= start - tail) & (onsets < stop)
+            if not np.any(mask):
+                continue
+
+            # Somma diretta O(eventi * campione) contro FFT O(frame * log campione)
+            direct_cost = np.count_nonzero(mask) * len(sample)
+            if direct_cost < (stop - start) * 2 * np.log2(len(sample) + 1):
+                self._add_direct(output, sample, onsets[mask] - start, gains[mask])
+            else:
+                self._add_fft(output, sample, onsets[mask] - (start - tail), gains[mask])
+
+        np.multiply(output, self.gain, out=output)
+        np.clip(output, -1.0, 1.0, out=output)
+        return output
+
+    @staticmethod
+    def _add_direct(output: np.ndarray, sample: np.ndarray,
+                    offsets: np.ndarray, gains: np.ndarray):
+        """Overlap-add a slice: ogni attacco somma il campione scalato"""
+        frames = len(output)
+        for offset, gain in zip(offsets.tolist(), gains.tolist()):
+            begin = max(offset, 0)
+            end = min(offset + len(sample), frames)
+            if end > begin:
+                output[begin:end] += sample[begin - offset:end - offset] * gain
+
+    @staticmethod
+    def _add_fft(output: np.ndarray, sample: np.ndarray,
+                 positions: np.ndarray, gains: np.ndarray):
+        """Overlap-add FFT: treno di impulsi (dalla coda precedente) convoluto col campione"""
+        impulses = np.zeros(len(output) + len(sample) - 1, dtype=np.float32)
+        np.add.at(impulses, positions, gains)
+        output += signal.oaconvolve(
+            impulses[:, np.newaxis], sample, mode='valid', axes=0
+        ).astype(np.float32)
+
+    def render(self, source, length: Optional[float] = None) -> np.ndarray:
+        """
+        Renderizza in memoria.
+
+        Args:
+            source: List[DrumEvent], PrettyMIDI o pattern registrato
+            length: Durata in secondi (None = fino alla fine dell'ultima coda)
+
+        Returns:
+            Audio (frames, channels) float32
+        """
+        groups = self._group(source)
+        frames = int(length * self.sample_rate) if length is not None else self._length(groups)
+        return self._render_range(groups, 0, frames)
+
+    def render_to_file(self, source, output_path: str, length: Optional[float] = None,
+                       chunk_seconds: float = 30.0) -> int:
+        """
+        Renderizza a blocchi scrivendo direttamente su WAV.
+
+        La memoria usata dipende dalla dimensione del blocco, non dalla
+        durata del brano.
+
+        Returns:
+            Frame scritti
+        """
+        groups = self._group(source)
+        frames = int(length * self.sample_rate) if length is not None else self._length(groups)
+        chunk = max(1, int(chunk_seconds * self.sample_rate))
+
+        with WavWriter(output_path, self.sample_rate, self.channels) as writer:
+            for start in range(0, frames, chunk):
+                writer.write(self._render_range(groups, start, min(start + chunk, frames)))
+
+        print(f"[OK] Render salvato: {output_path} ({frames / self.sample_rate:.1f}s)")
+        return frames
+
+
+class WavWriter:
+    """
+    Scrittura WAV in streaming: soundfile se disponibile, altrimenti PCM 16 bit.
+
+    Usabile come context manager o chiudendo esplicitamente con close().
+    """
+
+    def __init__(self, path: str, sample_rate: int, channels: int):
+        if SOUNDFILE_AVAILABLE:
+            self._file = sf.SoundFile(path, 'w', sample_rate, channels, subtype='PCM_16')
+            self._wave = None
+        else:
+            self._file = None
+            self._wave = wave.open(path, 'wb')
+            self._wave.setnchannels(channels)
+            self._wave.setsampwidth(2)
+            self._wave.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        if self._file is not None:
+            self._file.write(block)
+        else:
+            self._wave.writeframes((block * 32767).astype('<i2').tobytes())
+
+    def close(self):
+        """Chiude il file (il WAV è completo solo dopo la chiusura)"""
+        if self._file is not None:
+            self._file.close()
+        else:
+            self._wave.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_to_wav(source, output_path: str, sounds=None, sample_rate: int = 44100,
+                  **kwargs) -> int:
+    """
+    Render rapido su WAV.
+
+    Args:
+        source: List[DrumEvent], PrettyMIDI o pattern registrato
+        output_path: File WAV di destinazione
+        sounds: SoundLibrary, PrecomputedDrumPool o dizionario di campioni
+            (None = PrecomputedDrumPool)
+        sample_rate: Frequenza di campionamento
+
+    Returns:
+        Frame scritti
+    """
+    if sounds is None:
+        from src.low_latency_audio import PrecomputedDrumPool
+        sounds = PrecomputedDrumPool(sample_rate)
+
+    if hasattr(sounds, 'list_samples'):
+        renderer = OfflineRenderer.from_sound_library(sounds, sample_rate)
+    elif hasattr(sounds, 'generate_all'):
+        renderer = OfflineRenderer.from_pool(sounds)
+    else:
+        renderer = OfflineRenderer(sounds, sample_rate)
+
+    return renderer.render_to_file(source, output_path, **kwargs)
@@ -0,0 +1,230 @@
+"""
+Pipeline del Loop Live
+
+Stadi in thread separati collegati da code limitate:
+- Ogni stadio prende un elemento dalla coda (o da una sorgente), lo
+  elabora e passa il risultato alla coda successiva
+- Code "latest" (drop-oldest): il producer non attende mai il consumer,
+  l'elemento più vecchio viene scartato (es. verso il rendering)
+- Code bloccanti per gli stadi che non devono perdere elementi
+- Tempi per stadio (istogrammi), frequenza ed età degli elementi
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.latency_stats import LatencyHistogram
+
+
+def put_latest(target: queue.Queue, item) -> bool:
+    """
+    Inserisce senza mai bloccare: se la coda è piena scarta il più vecchio.
+
+    Returns:
+        False se un elemento è stato scartato
+    """
+    dropped = False
+    while True:
+        try:
+            target.put_nowait(item)
+            return not dropped
+        except queue.Full:
+            try:
+                target.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+
+
+class PipelineStage:
+    """Stadio della pipeline: un thread che applica `work` a ogni elemento"""
+
+    def __init__(
+        self,
+        name: str,
+        work: Callable,
+        input_queue: Optional[queue.Queue] = None,
+        source: Optional[Callable] = None,
+        output_queue: Optional[queue.Queue] = None,
+        drop_oldest: bool = True,
+        timestamp: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            name: Nome dello stadio (per le statistiche)
+            work: Elaborazione, work(item) -> risultato (None = niente da inoltrare)
+            input_queue: Coda di ingresso
+            source: In alternativa, funzione che produce gli elementi
+                (deve attendere con un timeout e restituire None se non c'è nulla)
+            output_queue: Coda di uscita (None = stadio finale)
+            drop_oldest: Se la coda di uscita è piena scarta il più vecchio
+                invece di attendere
+            timestamp: timestamp(item) -> perf_counter() di origine, per
+                misurare l'età degli elementi all'ingresso dello stadio
+        """
+        if (input_queue is None) == (source is None):
+            raise ValueError("Serve una coda di ingresso oppure una sorgente")
+
+        self.name = name
+        self.work = work
+        self.input_queue = input_queue
+        self.source = source
+        self.output_queue = output_queue
+        self.drop_oldest = drop_oldest
+        self.timestamp = timestamp
+
+        self.process_time = LatencyHistogram()  # Durata di work()
+        self.age = LatencyHistogram()  # Età degli elementi in ingresso
+        self.processed = 0
+        self.dropped = 0  # Risultati scartati sulla coda di uscita
+        self.errors = 0
+        self.rate = 0.0  # Elementi al secondo
+
+        self._rate_count = 0
+        self._rate_start = time.perf_counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._idle = threading.Event()
+
+    def _next(self):
+        if self.source is not None:
+            return self.source()
+        try:
+            return self.input_queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+    def _emit(self, result):
+        if self.output_queue is None or result is None:
+            return
+        if self.drop_oldest:
+            if not put_latest(self.output_queue, result):
+                self.dropped += 1
+            return
+        while not self._stop_event.is_set():
+            try:
+                self.output_queue.put(result, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if not self._resume_event.is_set():
+                self._idle.set()
+                self._resume_event.wait(0.1)
+                continue
+            self._idle.clear()
+
+            item = self._next()
+            if item is None:
+                continue
+
+            start = time.perf_counter()
+            if self.timestamp is not None:
+                origin = self.timestamp(item)
+                if origin:
+                    self.age.record(start - origin)
+
+            try:
+                result = self.work(item)
+            except Exception as e:
+                # Un elemento difettoso non deve fermare la pipeline
+                self.errors += 1
+                print(f"[ERR] Stadio {self.name}: {e}")
+                continue
+
+            end = time.perf_counter()
+            self.process_time.record(end - start)
+            self._emit(result)
+
+            self.processed += 1
+            self._rate_count += 1
+            if end - self._rate_start >= 1.0:
+                self.rate = self._rate_count / (end - self._rate_start)
+                self._rate_count = 0
+                self._rate_start = end
+
+    def start(self):
+        """Avvia il thread dello stadio"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferma il thread dello stadio"""
+        self._stop_event.set()
+        self._resume_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def pause(self, timeout: float = 1.0) -> bool:
+        """Sospende lo stadio e attende che finisca l'elemento in corso"""
+        self._idle.clear()
+        self._resume_event.clear()
+        if self._thread is None:
+            return True
+        return self._idle.wait(timeout)
+
+    def resume(self):
+        """Riprende lo stadio sospeso"""
+        self._resume_event.set()
+
+    def get_stats(self) -> Dict:
+        """Statistiche dello stadio (tempi in ms)"""
+        return {
+            "processed": self.processed,
+            "rate": self.rate,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "process": self.process_time.snapshot(),
+            "age": self.age.snapshot(),
+        }
+
+
+class Pipeline:
+    """Insieme ordinato di stadi avviati e fermati insieme"""
+
+    def __init__(self):
+        self.stages: List[PipelineStage] = []
+
+    def add_stage(self, stage: PipelineStage) -> PipelineStage:
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        # Dal primo all'ultimo: gli stadi a valle svuotano ciò che resta
+        for stage in self.stages:
+            stage.stop()
+
+    def pause(self):
+        """Sospende tutti gli stadi (es. calibrazione che usa la videocamera)"""
+        for stage in self.stages:
+            stage.pause()
+
+    def resume(self):
+        for stage in self.stages:
+            stage.resume()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Statistiche per stadio"""
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+    def summary(self) -> str:
+        """Riga compatta per la console: frequenza e p50 di ogni stadio"""
+        parts = []
+        for stage in self.stages:
+            stats = stage.get_stats()
+            parts.append(f"{stage.name} {stats['rate']:.0f}/s {stats['process']['p50']:.1f}ms")
+        return " | ".join(parts)
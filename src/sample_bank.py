@@ -0,0 +1,143 @@
+"""
+Sample Bank
+
+Formato compatto per caricare kit istantaneamente:
+- Un file dati `.bank` con tutti i campioni float32 (frames, canali) in sequenza
+- Un indice JSON `.json` con nome, layer, round-robin, offset e lunghezza
+- Apertura con np.memmap: ogni campione è una vista senza copie, le pagine
+  vengono lette dal disco solo quando servono
+
+Compilazione da sounds/ e library.json: scripts/build_sample_bank.py
+"""
+
+import json
+import os
+import numpy as np
+from typing import Dict, List, Optional
+
+BANK_VERSION = 1
+
+
+def _index_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def write_sample_bank(
+    path: str,
+    sounds: Dict[str, List[List[np.ndarray]]],
+    sample_rate: int = 44100,
+    channels: int = 2,
+    thresholds: Optional[Dict[str, List[int]]] = None,
+) -> int:
+    """
+    Scrive un sample bank (file dati + indice).
+
+    Args:
+        path: File dati di destinazione (es. sounds/banks/acoustic.bank)
+        sounds: {nome: [[campioni round-robin del layer 1], [layer 2], ...]}
+        sample_rate: Sample rate dei campioni (già convertiti)
+        channels: Canali memorizzati (quelli del motore: nessuna conversione al caricamento)
+        thresholds: {nome: velocity MIDI massima per layer} (opzionale)
+
+    Returns:
+        Byte scritti nel file dati
+    """
+    thresholds = thresholds or {}
+    entries = []
+    offset = 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with open(path, "wb") as f:
+        for name, layers in sounds.items():
+            for layer, alternates in enumerate(layers):
+                for rr, audio in enumerate(alternates):
+                    data = np.asarray(audio, dtype=np.float32)
+                    if data.ndim == 1:
+                        data = np.repeat(data[:, np.newaxis], channels, axis=1)
+                    elif data.shape[1] != channels:
+                        mono = np.mean(data, axis=1, dtype=np.float32)
+                        data = np.repeat(mono[:, np.newaxis], channels, axis=1)
+
+                    np.ascontiguousarray(data).tofile(f)
+                    entries.append(
+                        {
+                            "name": name,
+                            "layer": layer,
+                            "rr": rr,
+                            "offset": offset,
+                            "length": len(data),
+                        }
+                    )
+                    offset += len(data)
+
+    index = {
+        "version": BANK_VERSION,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "frames": offset,
+        "thresholds": {name: list(t) for name, t in thresholds.items() if name in sounds},
+        "entries": entries,
+    }
+    with open(_index_path(path), "w") as f:
+        json.dump(index, f, indent=2)
+
+    return offset * channels * 4
+
+
+class SampleBank:
+    """Sample bank aperto in memory-map (sola lettura)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: File dati .bank (l'indice .json deve stare accanto)
+        """
+        with open(_index_path(path), "r") as f:
+            index = json.load(f)
+
+        if index.get("version") != BANK_VERSION:
+            raise ValueError(f"Versione sample bank non supportata: {index.get('version')}")
+
+        self.path = path
+        self.sample_rate: int = index["sample_rate"]
+        self.channels: int = index["channels"]
+        self._thresholds: Dict[str, List[int]] = index.get("thresholds", {})
+
+        frames = index["frames"]
+        if frames > 0:
+            self._data = np.memmap(path, dtype=np.float32, mode="r", shape=(frames, self.channels))
+        else:
+            self._data = np.zeros((0, self.channels), dtype=np.float32)
+
+        # {nome: [[vista rr0, vista rr1, ...] per layer]}
+        self._layers: Dict[str, List[List[np.ndarray]]] = {}
+        for entry in index["entries"]:
+            layers = self._layers.setdefault(entry["name"], [])
+            while len(layers) <= entry["layer"]:
+                layers.append([])
+            start = entry["offset"]
+            layers[entry["layer"]].append(self._data[start : start + entry["length"]])
+
+    def names(self) -> List[str]:
+        """Nomi dei suoni nel bank"""
+        return list(self._layers.keys())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layers
+
+    def get_layers(self, name: str) -> List[List[np.ndarray]]:
+        """Layer di un suono (viste sul file, nessuna copia)"""
+        return self._layers[name]
+
+    def get_thresholds(self, name: str) -> Optional[List[int]]:
+        """Soglie di velocity dei layer (None = divisione uniforme)"""
+        return self._thresholds.get(name)
+
+    def get(self, name: str, layer: int = -1, rr: int = 0) -> np.ndarray:
+        """Singolo campione (default: layer più forte, primo alternativo)"""
+        return self._layers[name][layer][rr]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.size * 4
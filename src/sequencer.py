@@ -0,0 +1,249 @@
+"""
+Sequencer di Pattern con Lookahead
+
+Riproduce pattern registrati senza busy loop:
+- Pattern come array ordinati (tempi, suoni, velocity)
+- Gli eventi vengono programmati nel motore audio con una finestra di
+  anticipo e attaccano su frame esatti (anche tra un loop e l'altro)
+- Il thread dorme tra una finestra e la successiva
+- Start, stop e cambio di tempo durante la riproduzione
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class PatternSequencer:
+    """
+    Sequencer con scheduling a finestra.
+
+    Con un LowLatencyAudioEngine gli eventi vengono scritti in un ring
+    dedicato con il frame di attacco esatto; senza motore (es. pygame)
+    il thread dorme fino a ogni evento e chiama `trigger(drum, velocity)`.
+    """
+
+    def __init__(
+        self,
+        times: Sequence[float],
+        drums: Sequence[str],
+        velocities: Sequence[float],
+        length: Optional[float] = None,
+        loop: bool = False,
+        engine=None,
+        trigger: Optional[Callable[[str, float], object]] = None,
+        sample_rate: int = 44100,
+        pattern_bpm: float = 120.0,
+        lookahead: float = 0.05,
+    ):
+        """
+        Args:
+            times: Istanti degli eventi in secondi dall'inizio del pattern
+            drums: Nome del suono per ogni evento
+            velocities: Velocity (0-1) per ogni evento
+            length: Durata del pattern (None = calcolata dagli eventi)
+            loop: Ripete il pattern all'infinito
+            engine: LowLatencyAudioEngine di destinazione (opzionale)
+            trigger: Funzione (drum, velocity) usata senza motore
+            sample_rate: Frequenza di campionamento del clock
+            pattern_bpm: Tempo a cui è stato registrato il pattern
+            lookahead: Anticipo della finestra di scheduling (secondi)
+        """
+        if engine is None and trigger is None:
+            raise ValueError("Serve un motore audio o una funzione trigger")
+
+        order = np.argsort(np.asarray(times, dtype=np.float64), kind="stable")
+        self.times = np.asarray(times, dtype=np.float64)[order]
+        self.drums: List[str] = [drums[i] for i in order]
+        self.velocities = np.asarray(velocities, dtype=np.float32)[order]
+
+        self.loop = loop
+        self.length = length if length is not None else self._default_length()
+        self.engine = engine
+        self.trigger = trigger
+        self.sample_rate = engine.config.sample_rate if engine is not None else sample_rate
+        self.pattern_bpm = pattern_bpm
+        self.bpm = pattern_bpm
+        self.lookahead = lookahead
+
+        self.loop_count = 0
+        self.scheduled_events = 0
+
+        # Cursore: posizione nel pattern (s) e frame assoluto corrispondente
+        self._cursor = 0.0
+        self._cursor_frame = 0.0
+        self._finished = False
+
+        self._ring = None
+        self._drum_ids = np.full(len(self.drums), -1, dtype=np.int32)
+        self._clock_origin = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def from_events(cls, pattern: List[Dict], **kwargs) -> "PatternSequencer":
+        """Crea il sequencer da un pattern registrato ({'time', 'drum', 'velocity'})"""
+        return cls(
+            [event["time"] for event in pattern],
+            [event["drum"] for event in pattern],
+            [event.get("velocity", 1.0) for event in pattern],
+            **kwargs,
+        )
+
+    def _default_length(self) -> float:
+        """Durata del pattern: per i loop ripete anche il silenzio iniziale"""
+        if len(self.times) == 0:
+            return 0.0
+
+        last = float(self.times[-1])
+        if not self.loop:
+            return last
+
+        first = float(self.times[0])
+        if first > 0:
+            return last + first
+        if len(self.times) > 1:
+            return last + float(np.median(np.diff(self.times)))
+        return last + 60.0 / 120.0
+
+    @property
+    def is_playing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def rate(self) -> float:
+        """Velocità di riproduzione rispetto al tempo originale"""
+        return self.bpm / self.pattern_bpm
+
+    def set_tempo(self, bpm: float):
+        """Cambia il tempo: vale dalla prossima finestra, senza salti di fase"""
+        self.bpm = float(max(1.0, bpm))
+
+    def _now_frame(self) -> int:
+        """Frame corrente del clock di riproduzione"""
+        if self.engine is not None:
+            return self.engine.frame_position
+        return int((time.perf_counter() - self._clock_origin) * self.sample_rate)
+
+    def _collect(self, end_frame: int) -> List[Tuple[int, int]]:
+        """
+        Avanza il cursore fino a `end_frame` e restituisce gli eventi incontrati.
+
+        Returns:
+            Lista di (frame assoluto, indice evento)
+        """
+        events = []
+        sr = self.sample_rate
+
+        while self._cursor_frame < end_frame and not self._finished:
+            rate = self.rate
+            span = (end_frame - self._cursor_frame) / sr * rate
+            segment_end = min(self._cursor + span, self.length)
+
+            # L'ultimo evento di un pattern senza loop cade esattamente sulla fine
+            last_segment = segment_end >= self.length
+            side = "right" if last_segment and not self.loop else "left"
+            lo = np.searchsorted(self.times, self._cursor, "left")
+            hi = np.searchsorted(self.times, segment_end, side)
+
+            for i in range(lo, hi):
+                frame = self._cursor_frame + (self.times[i] - self._cursor) / rate * sr
+                events.append((int(round(frame)), i))
+
+            self._cursor_frame += (segment_end - self._cursor) / rate * sr
+            self._cursor = segment_end
+
+            if last_segment:
+                if self.loop and self.length > 0:
+                    self._cursor = 0.0
+                    self.loop_count += 1
+                else:
+                    self._finished = True
+
+        self.scheduled_events += len(events)
+        return events
+
+    def start(self):
+        """Avvia la riproduzione in un thread dedicato"""
+        if self.is_playing or len(self.times) == 0:
+            return
+
+        self._stop_event.clear()
+        self._cursor = 0.0
+        self._finished = False
+        self.loop_count = 0
+
+        lookahead_frames = int(self.lookahead * self.sample_rate)
+        if self.engine is not None:
+            self._drum_ids[:] = [self.engine.drum_ids.get(d, -1) for d in self.drums]
+            self._ring = self.engine.add_trigger_source()
+        else:
+            self._clock_origin = time.perf_counter()
+
+        # Il primo evento cade una finestra dopo l'avvio
+        self._cursor_frame = float(self._now_frame() + lookahead_frames)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferma la riproduzione (gli eventi già programmati suonano comunque)"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        # Un blocco audio basta al callback per leggere il ring
+        block = self.engine.config.buffer_size / self.sample_rate if self.engine is not None else 0.0
+        self._release_ring(drain_timeout=self.lookahead + 2 * block)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attende la fine della riproduzione (solo pattern senza loop)"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.is_playing
+
+    def _release_ring(self, drain_timeout: float = 0.0):
+        """Rimuove il ring dal motore dopo che il callback ha letto gli eventi rimasti"""
+        if self._ring is not None and self.engine is not None:
+            deadline = time.perf_counter() + drain_timeout
+            while len(self._ring) and self.engine.running and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            self.engine.remove_trigger_source(self._ring)
+        self._ring = None
+
+    def _run(self):
+        """Loop di scheduling: una finestra, poi dorme metà lookahead"""
+        lookahead_frames = int(self.lookahead * self.sample_rate)
+        interval = self.lookahead / 2
+
+        while not self._stop_event.is_set():
+            end_frame = self._now_frame() + lookahead_frames
+            events = self._collect(end_frame)
+
+            if self.engine is not None:
+                for frame, i in events:
+                    drum_id = self._drum_ids[i]
+                    if drum_id >= 0:
+                        self._ring.push(drum_id, self.velocities[i], 0.0, frame)
+            else:
+                self._dispatch(events)
+
+            if self._finished:
+                break
+            self._stop_event.wait(interval)
+
+        # Lascia al callback il tempo di leggere gli ultimi eventi
+        if self._ring is not None:
+            while len(self._ring) and not self._stop_event.is_set():
+                self._stop_event.wait(interval)
+            if not self._stop_event.is_set():
+                self._release_ring()
+
+    def _dispatch(self, events: List[Tuple[int, int]]):
+        """Senza motore: dorme fino a ogni evento e lo suona"""
+        for frame, i in events:
+            delay = self._clock_origin + frame / self.sample_rate - time.perf_counter()
+            if delay > 0 and self._stop_event.wait(delay):
+                return
+            self.trigger(self.drums[i], float(self.velocities[i]))
@@ -22,6 +22,8 @@ try:
 except ImportError:
     SCIPY_AVAILABLE = False
 
+from src.convolution_reverb import ConvolutionReverb, get_default_reverb
+
 
 class SoundSample:
     """Classe per rappresentare un campione audio modificabile"""
@@ -41,6 +43,9 @@ class SoundSample:
         self.file_path = file_path
         self.sample_rate = sample_rate
         
+        # Generazione dell'audio originale (cambia a ogni assegnazione)
+        self._audio_generation = 0
+        
         # Dati audio originali
         if audio_data is not None:
             self.original_audio = audio_data.copy()
@@ -52,6 +57,14 @@ class SoundSample:
         # Dati audio modificati (copia di lavoro)
         self.modified_audio = self.original_audio.copy() if len(self.original_audio) > 0 else np.array([])
         
+        # Riverbero a convoluzione (None = IR sintetica condivisa)
+        self.reverb_ir: Optional[str] = None
+        self._reverb: Optional[ConvolutionReverb] = None
+        
+        # Cache dell'audio processato: array read-only + chiave dei parametri
+        self._render_cache: Optional[np.ndarray] = None
+        self._render_cache_key: Optional[Tuple] = None
+        
         # Parametri di modifica
         self.parameters = {
             'volume': 1.0,           # Volume (0-2.0)
@@ -76,6 +89,17 @@ class SoundSample:
             'channels': 1 if len(self.original_audio.shape) == 1 else self.original_audio.shape[1]
         }
     
+    @property
+    def original_audio(self) -> np.ndarray:
+        """Audio sorgente non modificato"""
+        return self._original_audio
+    
+    @original_audio.setter
+    def original_audio(self, audio: np.ndarray):
+        # Nuova generazione: la cache dell'audio processato non è più valida
+        self._original_audio = audio
+        self._audio_generation += 1
+    
     def _load_audio_file(self, file_path: str) -> np.ndarray:
         """Carica file audio"""
         if not SOUNDFILE_AVAILABLE:
@@ -105,7 +129,7 @@ class SoundSample:
         Applica tutte le modifiche e restituisce l'audio processato
         
         Returns:
-            Array audio modificato
+            Array audio modificato (read-only: è lo stesso array in cache)
         """
         if len(self.original_audio) == 0:
             return np.array([])
@@ -136,7 +160,8 @@ class SoundSample:
         if self.parameters['distortion'] > 0:
             audio = self._apply_distortion(audio, self.parameters['distortion'])
         
-        # 6. Riverbero (semplificato)
+        # 6. Riverbero a convoluzione FFT partizionata con la IR del campione
+        #    (o quella sintetica condivisa); la coda allunga il campione
         if self.parameters['reverb'] > 0:
             audio = self._apply_reverb(audio, self.parameters['reverb'])
         
@@ -150,11 +175,42 @@ class SoundSample:
         # Normalizza e limita
         audio = np.clip(audio, -1.0, 1.0)
         
+        # Non modificabile: chi lo riceve non può alterare la cache
+        audio.flags.writeable = False
         self.modified_audio = audio
         self.metadata['modified'] = time.time()
         
+        self._render_cache = audio
+        self._render_cache_key = self._parameters_key()
+        
         return audio
     
+    def _parameters_key(self) -> Tuple:
+        """Stato che determina l'audio processato (generazione della sorgente + parametri)"""
+        return (self._audio_generation, tuple(sorted(self.parameters.items())))
+    
+    def get_processed_audio(self) -> np.ndarray:
+        """
+        Restituisce l'audio processato, ricalcolandolo solo se i parametri
+        sono cambiati dall'ultimo render.
+        
+        Returns:
+            Array read-only dell'audio modificato (stesso oggetto finché
+            la cache è valida)
+        """
+        if len(self.original_audio) == 0:
+            return np.array([])
+        
+        if self._render_cache is None or self._render_cache_key != self._parameters_key():
+            self.apply_modifications()
+        
+        return self._render_cache
+    
+    def invalidate_cache(self):
+        """Scarta l'audio processato in cache"""
+        self._render_cache = None
+        self._render_cache_key = None
+    
     def _apply_pitch_shift(self, audio: np.ndarray, pitch: float) -> np.ndarray:
         """Applica pitch shift"""
         if not SCIPY_AVAILABLE or pitch == 1.0:
@@ -240,18 +296,27 @@ class SoundSample:
         return audio * (1 - amount) + distorted * amount
     
     def _apply_reverb(self, audio: np.ndarray, amount: float) -> np.ndarray:
-        """Applica riverbero semplificato"""
+        """Applica riverbero a convoluzione (la coda allunga il campione)"""
         if amount == 0:
             return audio
         
-        # Delay semplice con feedback
-        delay_samples = int(0.03 * self.sample_rate)  # 30ms delay
-        reverb = np.zeros_like(audio)
-        
-        for i in range(delay_samples, len(audio)):
-            reverb[i] = audio[i] + audio[i - delay_samples] * amount * 0.5
+        reverb = self._reverb or get_default_reverb()
+        return reverb.process(audio, self.sample_rate, amount)
+    
+    def set_reverb_ir(self, file_path: Optional[str]):
+        """
+        Imposta la risposta all'impulso del riverbero
         
-        return audio * (1 - amount) + reverb * amount
+        Args:
+            file_path: File IR (WAV) o None per l'IR sintetica
+        """
+        if file_path:
+            self._reverb = ConvolutionReverb.from_file(file_path)
+        else:
+            self._reverb = None
+        self.reverb_ir = file_path
+        self.invalidate_cache()
+        self.apply_modifications()
     
     def _apply_pan(self, audio: np.ndarray, pan: float) -> np.ndarray:
         """Applica panoramica (converte a stereo)"""
@@ -277,6 +342,7 @@ class SoundSample:
         """Imposta un parametro"""
         if param_name in self.parameters:
             self.parameters[param_name] = value
+            self.invalidate_cache()
             self.apply_modifications()
     
     def get_parameter(self, param_name: str) -> float:
@@ -299,6 +365,7 @@ class SoundSample:
             'distortion': 0.0,
             'pan': 0.0,
         }
+        self.invalidate_cache()
         self.apply_modifications()
     
     def save(self, file_path: str):
@@ -306,7 +373,7 @@ class SoundSample:
         if not SOUNDFILE_AVAILABLE:
             raise ImportError("soundfile non disponibile")
         
-        audio = self.apply_modifications()
+        audio = self.get_processed_audio()
         if len(audio) > 0:
             sf.write(file_path, audio, self.sample_rate)
     
@@ -315,6 +382,7 @@ class SoundSample:
         return {
             'name': self.name,
             'file_path': self.file_path,
+            'reverb_ir': self.reverb_ir,
             'parameters': self.parameters.copy(),
             'metadata': self.metadata.copy()
         }
@@ -328,6 +396,12 @@ class SoundSample:
         )
         sample.parameters = data.get('parameters', sample.parameters)
         sample.metadata = data.get('metadata', sample.metadata)
+        if data.get('reverb_ir'):
+            try:
+                sample._reverb = ConvolutionReverb.from_file(data['reverb_ir'])
+                sample.reverb_ir = data['reverb_ir']
+            except Exception as e:
+                print(f"⚠️  Errore caricamento IR {data['reverb_ir']}: {e}")
         sample.apply_modifications()
         return sample
 
@@ -394,14 +468,14 @@ class SoundLibrary:
             apply_mods: Se applicare modifiche
         
         Returns:
-            Array audio o None
+            Array audio o None (read-only se apply_mods)
         """
         sample = self.samples.get(drum_name)
         if sample is None:
             return None
         
         if apply_mods:
-            return sample.apply_modifications()
+            return sample.get_processed_audio()
         else:
             return sample.original_audio
     
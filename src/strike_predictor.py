@@ -0,0 +1,225 @@
+"""
+Rilevamento Predittivo dei Colpi
+
+Anticipa i colpi invece di aspettare che il polso filtrato sia già
+dentro il pad:
+- Estrapola la traiettoria di ogni arto da posizione, velocità e
+  accelerazione del filtro della posa (p + v·t + a·t²/2)
+- Orizzonte = età del frame + compensazione della latenza della posa
+  (TriggerSystem.compensa_latenza_mano su latencies['pose'])
+- Il colpo parte quando la traiettoria prevista attraversa il bordo del pad
+- Finestra di conferma: se l'arto non entra davvero nel pad entro la
+  finestra la predizione è falsa e la zona viene restituita come
+  annullata (il chiamante smorza il suono)
+- Un colpo per ingresso: l'arto deve uscire dal pad per riarmarsi
+"""
+
+import time
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.config import COOLDOWN_TIME
+from src.keypoints import JOINT_INDEX, as_keypoint_array
+from src.trigger_system import TriggerSystem
+
+# Arto -> zona, come in ZoneDetector.detect_hits (batterista seduto)
+LIMB_ZONES = {
+    "right_wrist": "snare",
+    "left_wrist": "hihat",
+    "left_knee": "kick",
+    "right_knee": "kick",
+    "left_ankle": "kick",
+    "right_ankle": "kick",
+}
+
+
+class Strike(NamedTuple):
+    """Colpo rilevato"""
+
+    zone: str
+    limb: str
+    point: np.ndarray  # Punto nel pad (previsto o misurato)
+    speed: float  # Velocità dell'arto (unità/s)
+    lead: float  # Anticipo sulla misura (secondi, 0 = colpo reattivo)
+
+
+class StrikePredictor:
+    """Trigger predittivo con conferma sui pad di un ZoneDetector"""
+
+    def __init__(
+        self,
+        zone_detector,
+        trigger_system: Optional[TriggerSystem] = None,
+        confirmation_window: float = 0.1,
+        max_lead: float = 0.08,
+        steps: int = 4,
+        max_acceleration: float = 30.0,
+        cooldown: float = COOLDOWN_TIME,
+    ):
+        """
+        Args:
+            zone_detector: ZoneDetector con le zone e la soglia di velocità
+            trigger_system: Modello delle latenze (default: TriggerSystem())
+            confirmation_window: Tempo per confermare una predizione (secondi)
+            max_lead: Anticipo massimo dell'estrapolazione (secondi)
+            steps: Punti campionati sulla traiettoria prevista
+            max_acceleration: Limite del termine di accelerazione (unità/s²),
+                contro il rumore della doppia derivata
+            cooldown: Intervallo minimo tra due colpi sulla stessa zona (secondi)
+        """
+        self.zone_detector = zone_detector
+        self.trigger_system = trigger_system or TriggerSystem()
+        self.confirmation_window = confirmation_window
+        self.max_lead = max_lead
+        self.steps = max(1, steps)
+        self.max_acceleration = max_acceleration
+        self.cooldown = cooldown
+
+        self._armed = {limb: True for limb in LIMB_ZONES}
+        self._pending: Dict[str, float] = {}  # Arto -> scadenza della conferma
+        self._last_hit: Dict[str, float] = {}  # Zona -> istante dell'ultimo colpo
+
+        # Statistiche
+        self.predicted = 0  # Colpi anticipati
+        self.confirmed = 0  # Predizioni confermate dall'ingresso nel pad
+        self.cancelled = 0  # Predizioni false (arto mai entrato)
+        self.reactive = 0  # Colpi rilevati solo a pad già raggiunto
+
+    def reset(self):
+        """Riarma tutti gli arti e dimentica le predizioni in attesa"""
+        self._armed = {limb: True for limb in LIMB_ZONES}
+        self._pending.clear()
+        self._last_hit.clear()
+
+    def lead_time(self, speed: float, frame_age: float) -> float:
+        """
+        Anticipo della predizione: età del frame + latenza della posa compensata
+
+        Args:
+            speed: Velocità dell'arto (unità/s)
+            frame_age: Tempo trascorso dall'acquisizione del frame (secondi)
+        """
+        compensation = self.trigger_system.compensa_latenza_mano(velocita_mano=speed) / 1000.0
+        return min(self.max_lead, max(0.0, frame_age) + compensation)
+
+    def predict_path(self, point: np.ndarray, velocity: np.ndarray, acceleration: np.ndarray,
+                     lead: float) -> np.ndarray:
+        """
+        Punti della traiettoria prevista fino a `lead` secondi
+
+        Returns:
+            Array (steps × 3), dal più vicino al più lontano nel tempo
+        """
+        t = np.linspace(lead / self.steps, lead, self.steps)[:, np.newaxis]
+        acceleration = np.clip(acceleration, -self.max_acceleration, self.max_acceleration)
+        return point + velocity * t + 0.5 * acceleration * t * t
+
+    def _crossing(self, path: np.ndarray, zone: Dict) -> Optional[np.ndarray]:
+        """Primo punto della traiettoria dentro la zona (None se non la attraversa)"""
+        for point in path:
+            if self.zone_detector.is_point_in_zone(point, zone):
+                return point
+        return None
+
+    def _fire(self, zone_name: str, now: float) -> bool:
+        """Registra un colpo sulla zona se il cooldown è scaduto"""
+        if now - self._last_hit.get(zone_name, -np.inf) < self.cooldown:
+            return False
+        self._last_hit[zone_name] = now
+        return True
+
+    def update(
+        self,
+        key_points,
+        velocity: np.ndarray,
+        acceleration: np.ndarray,
+        timestamp: float,
+        now: Optional[float] = None,
+    ) -> Tuple[List[Strike], Set[str]]:
+        """
+        Elabora un frame filtrato
+
+        Args:
+            key_points: Posizioni (array articolazioni × 3, KeypointFrame o dizionario)
+            velocity: Velocità per articolazione (stesse righe, unità/s)
+            acceleration: Accelerazione per articolazione (unità/s²)
+            timestamp: perf_counter() di acquisizione del frame
+            now: Istante corrente (default: perf_counter())
+
+        Returns:
+            (colpi da suonare, zone con predizioni false da smorzare)
+        """
+        if now is None:
+            now = time.perf_counter()
+        positions = as_keypoint_array(key_points)
+        velocity = as_keypoint_array(velocity)
+        acceleration = as_keypoint_array(acceleration)
+        drum_zones = self.zone_detector.drum_zones
+        threshold = self.zone_detector.velocity_threshold
+
+        strikes: List[Strike] = []
+        cancelled: Set[str] = set()
+        struck: Set[str] = set()
+
+        for limb, zone_name in LIMB_ZONES.items():
+            zone = drum_zones.get(zone_name)
+            row = JOINT_INDEX[limb]
+            point = positions[row]
+            if zone is None or np.isnan(point).any():
+                continue
+
+            inside = self.zone_detector.is_point_in_zone(point, zone)
+            speed = float(np.linalg.norm(velocity[row]))
+
+            # Predizione in attesa: confermata dall'ingresso o scaduta
+            if limb in self._pending:
+                if inside:
+                    del self._pending[limb]
+                    self.confirmed += 1
+                elif now > self._pending[limb]:
+                    del self._pending[limb]
+                    self.cancelled += 1
+                    self._armed[limb] = True
+                    self._last_hit.pop(zone_name, None)
+                    cancelled.add(zone_name)
+                continue
+
+            if not inside and not self._armed[limb]:
+                self._armed[limb] = True  # Uscito dal pad: pronto per il prossimo colpo
+
+            if not self._armed[limb] or speed < threshold or zone_name in struck:
+                continue
+
+            if inside:
+                # Nessuna predizione (es. movimento troppo breve): colpo reattivo
+                if self._fire(zone_name, now):
+                    strikes.append(Strike(zone_name, limb, point, speed, 0.0))
+                    struck.add(zone_name)
+                    self.reactive += 1
+                self._armed[limb] = False
+                continue
+
+            lead = self.lead_time(speed, now - timestamp)
+            if lead <= 0.0:
+                continue
+            path = self.predict_path(point, velocity[row], acceleration[row], lead)
+            crossing = self._crossing(path, zone)
+            if crossing is not None and self._fire(zone_name, now):
+                strikes.append(Strike(zone_name, limb, crossing, speed, lead))
+                struck.add(zone_name)
+                self._armed[limb] = False
+                self._pending[limb] = now + self.confirmation_window
+                self.predicted += 1
+
+        return strikes, cancelled
+
+    def get_stats(self) -> Dict:
+        """Statistiche delle predizioni"""
+        resolved = self.confirmed + self.cancelled
+        return {
+            "predicted": self.predicted,
+            "confirmed": self.confirmed,
+            "cancelled": self.cancelled,
+            "reactive": self.reactive,
+            "precision": self.confirmed / resolved if resolved else 0.0,
+        }
@@ -0,0 +1,175 @@
+"""
+Cache di Sintesi
+
+Cache su disco dei suoni sintetizzati all'avvio (DrumMachine e
+PrecomputedDrumPool):
+- Un file .npy per suono, chiave = nome + sample rate + hash dei parametri
+  e del codice del generatore (modificare la sintesi invalida la cache)
+- Caricamento con np.load(mmap_mode='r'): nessuna sintesi né copia
+- Scrittura atomica (file temporaneo + rename), sicura con più processi
+- Sintesi batch vettorializzata di varianti di pitch e decay
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence
+
+# Da incrementare se cambia il formato dei file in cache
+CACHE_VERSION = 1
+
+# Cartella predefinita, relativa alla radice del progetto (non alla cartella corrente)
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sounds", "cache"
+)
+
+
+def _generator_fingerprint(generator: Callable) -> str:
+    """Codice sorgente del generatore (solo il nome se non disponibile, es. eseguibili congelati)"""
+    function = getattr(generator, "__func__", generator)
+    try:
+        return inspect.getsource(function)
+    except (OSError, TypeError):
+        return getattr(function, "__qualname__", repr(function))
+
+
+class SynthesisCache:
+    """Cache persistente di buffer sintetizzati"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        Args:
+            cache_dir: Cartella dei file .npy (creata al primo salvataggio)
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name: str, sample_rate: int, params: Optional[Dict] = None,
+            generator: Optional[Callable] = None) -> str:
+        """Chiave del suono: hash di sample rate, parametri e codice del generatore"""
+        description = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "name": name,
+                "sample_rate": sample_rate,
+                "params": params or {},
+                "generator": _generator_fingerprint(generator) if generator else "",
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha1(description.encode("utf-8")).hexdigest()[:16]
+        return f"{name}_{sample_rate}_{digest}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, name: str, sample_rate: int, generator: Callable[..., np.ndarray],
+            params: Optional[Dict] = None, dtype=np.float32) -> np.ndarray:
+        """
+        Buffer dalla cache, sintetizzato e salvato se assente.
+
+        Args:
+            name: Nome del suono
+            sample_rate: Frequenza di campionamento
+            generator: Funzione di sintesi, chiamata come generator(**params)
+            params: Parametri della sintesi (fanno parte della chiave)
+            dtype: Tipo dei dati salvati
+
+        Returns:
+            Array in sola lettura (memory-map) o appena sintetizzato
+        """
+        params = params or {}
+        path = self.path(self.key(name, sample_rate, params, generator))
+
+        if os.path.exists(path):
+            try:
+                data = np.load(path, mmap_mode="r")
+                self.hits += 1
+                return data
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Cache di sintesi non leggibile ({path}): {e}")
+
+        self.misses += 1
+        data = np.ascontiguousarray(generator(**params), dtype=dtype)
+        self._save(path, data)
+        return data
+
+    def _save(self, path: str, data: np.ndarray):
+        """Salvataggio atomico: chi legge vede il file completo o nessun file"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # Cache non scrivibile (es. disco in sola lettura): si sintetizza ogni volta
+            print(f"[WARN] Impossibile salvare la cache di sintesi: {e}")
+
+    def clear(self) -> int:
+        """Elimina i file in cache. Returns: file eliminati"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        removed = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".npy"):
+                os.remove(os.path.join(self.cache_dir, filename))
+                removed += 1
+        return removed
+
+
+def pitched_drum_batch(
+    sample_rate: int,
+    duration: float,
+    pitches: Sequence[float],
+    decays: Sequence[float],
+    end_ratio: float = 0.5,
+    harmonics: Sequence = ((1.0, 1.0),),
+    attack: float = 0.0,
+) -> np.ndarray:
+    """
+    Sintesi vettorializzata di tamburi intonati (kick, tom) in un solo passaggio.
+
+    Glissando lineare da pitch a pitch * end_ratio, armoniche e inviluppo
+    esponenziale, calcolati su tutte le varianti insieme per broadcasting.
+
+    Args:
+        sample_rate: Frequenza di campionamento
+        duration: Durata (secondi)
+        pitches: Frequenze iniziali delle varianti (Hz)
+        decays: Costanti di decadimento (1/s), broadcast con pitches
+        end_ratio: Frequenza finale / iniziale
+        harmonics: Coppie (multiplo della frequenza, ampiezza)
+        attack: Attacco lineare (secondi)
+
+    Returns:
+        Array (varianti, frame) float64
+    """
+    # Griglie (es. pitch colonna x decay riga) diventano una lista di varianti
+    pitches, decays = np.broadcast_arrays(
+        np.asarray(pitches, dtype=np.float64), np.asarray(decays, dtype=np.float64)
+    )
+    pitches = pitches.ravel()
+    decays = decays.ravel()
+    t = np.linspace(0, duration, int(sample_rate * duration))
+    ramp = np.linspace(0.0, 1.0, len(t))
+
+    # Frequenza istantanea come nei generatori singoli: freq(t) * t
+    freq = pitches[:, np.newaxis] * (1.0 + (end_ratio - 1.0) * ramp)
+    phase = 2 * np.pi * freq * t
+
+    wave = np.zeros((len(pitches), len(t)))
+    for multiple, amplitude in harmonics:
+        wave += amplitude * np.sin(phase * multiple)
+
+    # Inviluppo: attacco lineare poi decadimento esponenziale
+    attack_samples = int(attack * sample_rate)
+    envelope = np.exp(-np.maximum(t - attack, 0.0) * decays[:, np.newaxis])
+    if attack_samples > 0:
+        envelope[:, :attack_samples] = np.linspace(0, 1, attack_samples)
+    return wave * envelope
@@ -0,0 +1,134 @@
+"""
+Trigger Ring Buffer
+
+Coda single-producer/single-consumer (SPSC) tra il thread di rilevamento
+e il thread audio:
+- Array numpy strutturato preallocato (nessun dict per evento)
+- Nessun lock: il producer scrive solo l'indice di scrittura,
+  il consumer solo quello di lettura
+- Il consumer svuota tutti gli eventi pendenti in una sola lettura
+- Lo storage può essere fornito dall'esterno (es. memoria condivisa)
+"""
+
+import numpy as np
+
+# Record di un trigger
+TRIGGER_DTYPE = np.dtype(
+    [
+        ("drum_id", np.int32),
+        ("velocity", np.float32),
+        ("timestamp", np.float64),  # time.perf_counter() del producer
+        ("target_frame", np.int64),  # Frame di destinazione (-1 = subito)
+    ]
+)
+
+# Spazio riservato agli indici in testa allo storage (una cache line)
+_HEADER_BYTES = 64
+
+
+class TriggerRingBuffer:
+    """
+    Ring buffer SPSC lock-free per eventi di trigger.
+
+    Sicuro solo con UN producer e UN consumer: push() va chiamato
+    sempre dallo stesso thread, drain() sempre dal thread audio.
+    Gli indici crescono in modo monotono; lo slot è indice & mask.
+    """
+
+    def __init__(self, capacity: int = 256, buffer=None):
+        """
+        Args:
+            capacity: Numero di slot (arrotondato alla potenza di 2 successiva)
+            buffer: Storage esterno (>= nbytes(capacity)), es. SharedMemory.buf.
+                Se None viene allocato localmente.
+        """
+        capacity = 1 << max(1, int(capacity - 1).bit_length())
+        self.capacity = capacity
+        self._mask = capacity - 1
+
+        if buffer is None:
+            buffer = bytearray(self.nbytes(capacity))
+
+        # [0] = indice di scrittura (producer), [1] = indice di lettura (consumer)
+        self._indices = np.ndarray((2,), dtype=np.int64, buffer=buffer, offset=0)
+        self._records = np.ndarray(
+            (capacity,), dtype=TRIGGER_DTYPE, buffer=buffer, offset=_HEADER_BYTES
+        )
+
+        # Viste per campo precalcolate (evitano lookup per nome nel push)
+        self._drum_id = self._records["drum_id"]
+        self._velocity = self._records["velocity"]
+        self._timestamp = self._records["timestamp"]
+        self._target_frame = self._records["target_frame"]
+
+        self.dropped = 0  # Eventi scartati con buffer pieno (lato producer)
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        """Byte necessari per lo storage di un buffer con `capacity` slot"""
+        capacity = 1 << max(1, int(capacity - 1).bit_length())
+        return _HEADER_BYTES + capacity * TRIGGER_DTYPE.itemsize
+
+    def reset(self):
+        """Azzera gli indici (solo quando nessuno sta usando il buffer)"""
+        self._indices[:] = 0
+
+    def __len__(self) -> int:
+        return int(self._indices[0] - self._indices[1])
+
+    def push(
+        self,
+        drum_id: int,
+        velocity: float,
+        timestamp: float = 0.0,
+        target_frame: int = -1,
+    ) -> bool:
+        """
+        Inserisce un trigger (lato producer).
+
+        Returns:
+            False se il buffer è pieno (evento scartato)
+        """
+        write = int(self._indices[0])
+        if write - int(self._indices[1]) >= self.capacity:
+            self.dropped += 1
+            return False
+
+        slot = write & self._mask
+        self._drum_id[slot] = drum_id
+        self._velocity[slot] = velocity
+        self._timestamp[slot] = timestamp
+        self._target_frame[slot] = target_frame
+
+        # Pubblica l'evento solo dopo aver scritto il record
+        self._indices[0] = write + 1
+        return True
+
+    def drain(self, out: np.ndarray) -> int:
+        """
+        Copia tutti gli eventi pendenti in `out` (lato consumer).
+
+        Args:
+            out: Array preallocato con dtype TRIGGER_DTYPE e len >= capacity
+
+        Returns:
+            Numero di eventi copiati in out[:n]
+        """
+        read = int(self._indices[1])
+        n = int(self._indices[0]) - read
+        if n <= 0:
+            return 0
+
+        start = read & self._mask
+        first = min(n, self.capacity - start)
+        out[:first] = self._records[start : start + first]
+        if n > first:
+            out[first:n] = self._records[: n - first]
+
+        # Libera gli slot solo dopo averli copiati
+        self._indices[1] = read + n
+        return n
+
+    def make_drain_buffer(self) -> np.ndarray:
+        """Crea un buffer di destinazione adatto a drain()"""
+        return np.zeros(self.capacity, dtype=TRIGGER_DTYPE)
@@ -10,6 +10,7 @@ import os
 # Aggiungi il percorso del progetto al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import DRUM_ZONES, COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
+from src.keypoints import as_keypoint_frame
 
 class VirtualEnvironment:
     """Classe per visualizzare l'ambiente virtuale 3D"""
@@ -133,8 +134,10 @@ class VirtualEnvironment:
         Disegna la rappresentazione dell'utente con miglioramenti visivi
         
         Args:
-            key_points: Dizionario con le posizioni delle articolazioni
+            key_points: Dizionario o array (articolazioni × 3) con le posizioni
         """
+        key_points = as_keypoint_frame(key_points)
+        
         # Disegna le connessioni prima (sotto i punti)
         connections = [
             (('left_wrist', 'right_wrist'), 2),
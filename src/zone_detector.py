@@ -9,6 +9,7 @@ import os
 # Aggiungi il percorso del progetto al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import DRUM_ZONES, VELOCITY_THRESHOLD
+from src.keypoints import as_keypoint_frame
 
 class ZoneDetector:
     """Classe per rilevare i colpi sulle zone della batteria"""
@@ -79,12 +80,15 @@ class ZoneDetector:
         - Kick con ginocchio/gamba
         
         Args:
-            key_points: Punti chiave dell'utente (coordinate normalizzate)
-            velocities: Velocità dei movimenti
+            key_points: Punti chiave dell'utente (coordinate normalizzate),
+                dizionario o array (articolazioni × 3)
+            velocities: Velocità dei movimenti, dizionario o array (articolazioni,)
         
         Returns:
             Set di nomi delle zone colpite
         """
+        key_points = as_keypoint_frame(key_points)
+        velocities = as_keypoint_frame(velocities)
         hit_zones = set()
         
         # Controlla mano DESTRA per Snare (INVERTITO)
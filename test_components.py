@@ -88,6 +88,1092 @@ def test_zone_detector():
     print(f"✓ Zone rilevate: {hits}")
     print()
 
+def test_voice_pool():
+    """Test del mixer polifonico del motore a bassa latenza"""
+    print("Test Voice Pool...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    config = AudioConfig(buffer_size=256, max_voices=4, sample_accurate=False)
+    engine = LowLatencyAudioEngine(config)
+    engine.running = True  # Nessun backend: callback pilotato a mano
+    engine.load_sound('kick', np.full(600, 0.5, dtype=np.float32))
+    
+    engine.play('kick', 1.0)
+    outdata = np.zeros((256, 2), dtype=np.float32)
+    
+    # Il campione da 600 frame deve suonare per tre blocchi
+    blocks = []
+    for _ in range(3):
+        engine._audio_callback(outdata, 256)
+        blocks.append(outdata.copy())
+    
+    assert np.all(blocks[0] > 0) and np.all(blocks[1] > 0)
+    assert np.all(blocks[2][:88] > 0) and np.all(blocks[2][88:] == 0)
+    assert engine.voices.active_count == 0
+    print("✓ Campione suonato per intero su più blocchi")
+    
+    # Pool pieno: la voce più vecchia viene rubata
+    engine.set_voice_limit('kick', 8)  # Solo il limite globale del pool
+    for _ in range(6):
+        engine.play('kick', 0.5)
+    engine._audio_callback(outdata, 256)
+    assert engine.voices.active_count == 4
+    assert engine.voices.stolen_count == 2
+    print("✓ Voice stealing con pool limitato")
+    print()
+
+def test_preallocated_mix():
+    """Test del mix senza allocazioni nel callback"""
+    print("Test Mix Preallocato...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    import tracemalloc
+    
+    sample = np.linspace(-1.0, 1.0, 20000, dtype=np.float32)
+    block_bytes = 256 * 2 * 4  # Un blocco stereo float32
+    outputs = {}
+    growth = {}
+    for mode in ['legacy', 'preallocated']:
+        engine = LowLatencyAudioEngine(AudioConfig(mix_mode=mode, sample_accurate=False))
+        engine.running = True
+        engine.load_sound('snare', sample)
+        for velocity in [1.0, 0.8, 0.6]:
+            engine.play('snare', velocity)
+        
+        outdata = np.zeros((256, 2), dtype=np.float32)
+        blocks = []
+        for _ in range(10):  # Riscaldamento (voci avviate, statistiche create)
+            engine._audio_callback(outdata, 256)
+            blocks.append(outdata.copy())
+        
+        # Picco di memoria durante N callback: un array grande quanto un
+        # blocco allocato anche una sola volta lo supera
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(30):
+            engine._audio_callback(outdata, 256)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        growth[mode] = peak - start
+        outputs[mode] = np.concatenate(blocks)
+    
+    assert np.allclose(outputs['legacy'], outputs['preallocated'], atol=1e-6)
+    assert growth['legacy'] >= block_bytes
+    assert growth['preallocated'] < block_bytes
+    print(f"✓ Stesso output del mix legacy, picco di memoria nel callback "
+          f"{growth['preallocated']} B (legacy {growth['legacy']} B)")
+    
+    # Stesso controllo con una catena di effetti attiva su un pad
+    from src.effect_chain import FilterStage
+    if FilterStage.allocation_free:
+        engine = LowLatencyAudioEngine(AudioConfig(mix_mode='preallocated', sample_accurate=False))
+        engine.running = True
+        engine.load_sound('snare', sample)
+        engine.set_effect_parameter('snare', 'lowpass_freq', 3000)
+        engine.set_effect_parameter('snare', 'highpass_freq', 200)
+        assert engine.effects['snare'].lowpass.active and engine.effects['snare'].highpass.active
+        for velocity in [1.0, 0.8, 0.6]:
+            engine.play('snare', velocity)
+        
+        for _ in range(10):
+            engine._audio_callback(outdata, 256)
+        
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(30):
+            engine._audio_callback(outdata, 256)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert np.abs(outdata).max() > 0
+        assert peak - start < block_bytes
+        print(f"✓ Con passa-basso/passa-alto sul pad: picco {peak - start} B")
+    print()
+
+def test_trigger_ring():
+    """Test del ring buffer SPSC dei trigger"""
+    print("Test Trigger Ring Buffer...")
+    from src.trigger_ring import TriggerRingBuffer
+    
+    ring = TriggerRingBuffer(capacity=8)
+    out = ring.make_drain_buffer()
+    
+    # Riempie oltre la capacità: gli eventi in eccesso vengono scartati
+    for i in range(10):
+        ring.push(i, 0.5, float(i))
+    assert len(ring) == 8 and ring.dropped == 2
+    
+    n = ring.drain(out)
+    assert n == 8 and list(out['drum_id'][:n]) == list(range(8))
+    assert ring.drain(out) == 0
+    print("✓ Buffer pieno gestito senza bloccare")
+    
+    # Wrap-around: gli eventi restano in ordine
+    for i in range(5):
+        ring.push(100 + i, 1.0)
+    n = ring.drain(out)
+    assert list(out['drum_id'][:n]) == [100, 101, 102, 103, 104]
+    print("✓ Ordine preservato dopo il wrap-around")
+    print()
+
+def test_sample_accurate_scheduling():
+    """Test dello scheduling dei trigger al frame esatto"""
+    print("Test Scheduling Sample-Accurate...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    config = AudioConfig(buffer_size=256, lookahead_ms=0.0)
+    engine = LowLatencyAudioEngine(config)
+    engine.running = True
+    engine.load_sound('hihat', np.ones(64, dtype=np.float32))
+    
+    # Trigger a un frame assoluto: attacco nel secondo blocco, offset 44
+    engine.play_at_frame('hihat', 1.0, 300)
+    outdata = np.zeros((256, 2), dtype=np.float32)
+    engine._audio_callback(outdata, 256)
+    assert np.all(outdata == 0)
+    engine._audio_callback(outdata, 256)
+    assert np.all(outdata[:44] == 0) and np.all(outdata[44:108] > 0)
+    assert np.all(outdata[108:] == 0)
+    print("✓ Attacco al frame programmato")
+    
+    # Timestamp -> offset: latenza fissa di un blocco dal timestamp
+    engine._block_dac_time = 100.0
+    block = 256 / config.sample_rate
+    assert engine._trigger_offset(100.0 - block + 50 / config.sample_rate, -1) == 50
+    assert engine._trigger_offset(100.0 - 2 * block, -1) == 0
+    assert engine.late_triggers == 1
+    print("✓ Timestamp convertiti in offset nel blocco")
+    print()
+
+def test_velocity_layers():
+    """Test dei velocity layer con round-robin"""
+    print("Test Velocity Layers...")
+    from src.low_latency_audio import VelocityLayerSet
+    import numpy as np
+    
+    # 3 layer: il secondo ha due campioni alternativi
+    soft = np.zeros(10)
+    medium_a, medium_b = np.ones(10), np.ones(10) * 2
+    hard = np.ones(10) * 3
+    layer_set = VelocityLayerSet([[soft], [medium_a, medium_b], [hard]], [40, 90, 127])
+    
+    assert layer_set.layer_index(0.0) == 0
+    assert layer_set.layer_index(40 / 127) == 0
+    assert layer_set.layer_index(0.5) == 1
+    assert layer_set.layer_index(1.0) == 2
+    print("✓ Layer scelto dalla tabella velocity")
+    
+    picks = [layer_set.get_buffer(0.6) for _ in range(4)]
+    assert picks[0] is medium_a and picks[1] is medium_b and picks[2] is medium_a
+    assert layer_set.get_buffer(1.0) is hard
+    print("✓ Round-robin tra i campioni alternativi")
+    print()
+
+def test_effect_chain():
+    """Test della catena di effetti in streaming"""
+    print("Test Effect Chain...")
+    from src.effect_chain import EffectChain
+    from scipy import signal
+    import numpy as np
+    
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal((2048, 2)).astype(np.float32)
+    
+    # Filtraggio a blocchi == filtraggio dell'intero buffer
+    chain = EffectChain(sample_rate=44100, channels=2)
+    chain.set_parameter('lowpass_freq', 2000)
+    streamed = chain.process_buffer(audio, block_size=256)
+    sos = signal.butter(4, 2000, 'lowpass', fs=44100, output='sos')
+    reference = signal.sosfilt(sos, audio, axis=0)
+    assert np.allclose(streamed, reference, atol=1e-4)
+    print("✓ Stato del filtro mantenuto tra i blocchi")
+    
+    # Bus per pad nel motore: il pad filtrato perde le alte frequenze
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    config = AudioConfig(buffer_size=256, sample_accurate=False)
+    engine = LowLatencyAudioEngine(config)
+    engine.load_sound("noise", audio[:, 0])
+    engine.set_effect_parameter("noise", "lowpass_freq", 500)
+    engine.play("noise", 1.0)
+    outdata = np.zeros((256, 2), dtype=np.float32)
+    engine._audio_callback(outdata, 256)
+    dry = np.clip(audio[:256], -1, 1) * config.master_gain
+    assert np.std(np.diff(outdata[:, 0])) < np.std(np.diff(dry[:, 0])) * 0.5
+    print("✓ Effetti applicati sul bus del pad")
+    print()
+
+def test_sound_cache():
+    """Test della cache dei pygame.mixer.Sound per fascia di velocity"""
+    print("Test Sound Cache...")
+    from src.drum_machine import DrumMachine
+    import numpy as np
+    import pygame
+    
+    drum = DrumMachine()
+    drum.cooldown_time = 0.0
+    
+    def peak(sound):
+        return int(np.abs(pygame.sndarray.array(sound)).max())
+    
+    # Colpi ripetuti riusano gli stessi Sound (nessuna conversione per colpo)
+    buckets = list(drum._sound_cache['snare'][1])
+    assert len(buckets) == drum.velocity_buckets
+    for velocity in (1.0, 0.5, 1.0, 0.2):
+        assert drum.play_sound('snare', velocity)
+    assert drum._sound_cache['snare'][1] == buckets
+    assert all(a is b for a, b in zip(drum._sound_cache['snare'][1], buckets))
+    played = [sound for _, sound in drum._drum_channels['snare']]
+    assert played and all(any(sound is bucket for bucket in buckets) for sound in played)
+    print(f"✓ {len(played)} colpi con {drum.velocity_buckets} Sound in cache")
+    
+    # set_volume ricostruisce solo il componente, riscalato
+    kick = drum._sound_cache['kick'][1]
+    loud = peak(buckets[-1])
+    drum.set_volume('snare', drum.volumes['snare'] * 0.5)
+    rebuilt = drum._sound_cache['snare'][1]
+    assert all(a is not b for a, b in zip(rebuilt, buckets))
+    assert abs(peak(rebuilt[-1]) - loud * 0.5) <= loud * 0.02 + 1
+    assert drum._sound_cache['kick'][1] is kick
+    
+    # set_master_volume ricostruisce tutti i componenti
+    kick_loud = peak(kick[-1])
+    drum.set_master_volume(drum.master_volume * 0.5)
+    assert drum._sound_cache['kick'][1] is not kick
+    assert abs(peak(drum._sound_cache['kick'][1][-1]) - kick_loud * 0.5) <= kick_loud * 0.02 + 1
+    drum.stop_all()
+    print("✓ set_volume e set_master_volume ricostruiscono la cache riscalata")
+    print()
+
+def test_processed_audio_cache():
+    """Test della cache dell'audio processato di SoundSample"""
+    print("Test Processed Audio Cache...")
+    from src.sound_library import SoundSample
+    import numpy as np
+    
+    audio = np.sin(np.linspace(0, 200, 4000))
+    sample = SoundSample('test', audio_data=audio, sample_rate=44100)
+    
+    # Stesso oggetto finché i parametri non cambiano, non modificabile
+    first = sample.get_processed_audio()
+    assert sample.get_processed_audio() is first
+    assert sample.apply_modifications() is sample.get_processed_audio()
+    cached = sample.get_processed_audio()
+    assert not cached.flags.writeable and not sample.modified_audio.flags.writeable
+    try:
+        cached[0] = 1.0
+        assert False, "La cache non deve essere modificabile"
+    except ValueError:
+        pass
+    print("✓ Stesso array read-only a ogni chiamata")
+    
+    # set_parameter e reset_parameters producono un nuovo render
+    sample.set_parameter('volume', 0.5)
+    louder = sample.get_processed_audio()
+    assert louder is not cached and np.allclose(louder, cached * 0.5)
+    sample.reset_parameters()
+    reset = sample.get_processed_audio()
+    assert reset is not louder and np.allclose(reset, cached)
+    
+    # Nuova sorgente: nuovo render anche con gli stessi parametri
+    sample.original_audio = audio * 0.25
+    assert np.allclose(sample.get_processed_audio(), audio * 0.25)
+    print("✓ Nuovo render dopo set_parameter, reset_parameters e nuova sorgente")
+    print()
+
+def test_convolution_reverb():
+    """Test del riverbero a convoluzione FFT partizionata"""
+    print("Test Convolution Reverb...")
+    from src.convolution_reverb import ConvolutionReverb, generate_impulse_response, get_default_reverb
+    from src.sound_library import SoundSample
+    import numpy as np
+    
+    rng = np.random.default_rng(0)
+    ir = generate_impulse_response(22050, duration=0.3)
+    reverb = ConvolutionReverb(ir, ir_sample_rate=22050, block_size=512)
+    
+    # Mono: uguale alla convoluzione diretta (più partizioni e blocchi)
+    mono = rng.standard_normal(3000)
+    assert np.allclose(reverb.convolve(mono, 22050), np.convolve(mono, ir), atol=1e-9)
+    
+    # Stereo: ogni canale convoluto indipendentemente
+    stereo = rng.standard_normal((1500, 2))
+    wet = reverb.convolve(stereo, 22050)
+    assert wet.shape == (1500 + len(ir) - 1, 2)
+    for channel in range(2):
+        assert np.allclose(wet[:, channel], np.convolve(stereo[:, channel], ir), atol=1e-9)
+    print("✓ convolve uguale a np.convolve (mono e stereo)")
+    
+    # IR ricampionata al sample rate dell'audio (interpolazione lineare)
+    length = reverb.ir_length(44100)
+    resampled = np.interp(np.linspace(0, len(ir) - 1, length), np.arange(len(ir)), ir)
+    assert np.allclose(reverb.convolve(mono, 44100), np.convolve(mono, resampled), atol=1e-9)
+    print(f"✓ IR ricampionata 22050 -> 44100 Hz ({len(ir)} -> {length} campioni)")
+    
+    # Il riverbero allunga il campione della coda dell'IR
+    audio = np.zeros(2000)
+    audio[0] = 1.0
+    sample = SoundSample('test', audio_data=audio, sample_rate=44100)
+    sample.set_parameter('reverb', 0.3)
+    expected = len(audio) + get_default_reverb().ir_length(44100) - 1
+    assert len(sample.get_processed_audio()) == expected
+    sample.set_parameter('reverb', 0.0)
+    assert len(sample.get_processed_audio()) == len(audio)
+    print(f"✓ Campione con riverbero: {len(audio)} -> {expected} campioni (coda inclusa)")
+    print()
+
+def test_metronome():
+    """Test del metronomo sample-accurate nel motore"""
+    print("Test Metronome...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    engine = LowLatencyAudioEngine(AudioConfig(buffer_size=256))
+    engine.set_metronome(True, bpm=120, beats_per_bar=4)
+    
+    blocks = []
+    for _ in range(200):
+        outdata = np.zeros((256, 2), dtype=np.float32)
+        engine._audio_callback(outdata, 256)
+        blocks.append(outdata[:, 0].copy())
+    audio = np.concatenate(blocks)
+    
+    # 120 BPM a 44100 Hz: un battito ogni 22050 frame, anche a metà blocco
+    beat = 22050
+    assert audio[beat - 1] == 0 and audio[beat + 1] != 0
+    assert audio[2 * beat - 1] == 0 and audio[2 * beat + 1] != 0
+    print("✓ Click su frame esatti")
+    
+    assert np.max(np.abs(audio[:2000])) > np.max(np.abs(audio[beat:beat + 2000]))
+    print("✓ Primo battito accentato")
+    
+    engine.set_metronome(False)
+    assert engine.metronome.schedule(engine.voices, 0, 256) == 0
+    print("✓ Metronomo disattivabile")
+    print()
+
+def test_drum_machine_metronome():
+    """Test del metronomo della drum machine (canale riservato di pygame)"""
+    print("Test Metronomo Drum Machine...")
+    from src.drum_machine import DrumMachine
+    import time
+    
+    drum = DrumMachine()
+    channel = drum._metronome_channel
+    drum.set_metronome(True, bpm=480)  # Battuta di 0.5 s
+    first = drum._metronome_sound
+    assert channel.get_busy() and channel.get_queue() is first
+    
+    # stop_all ferma i suoni ma non il metronomo acceso nell'UI
+    drum.play_sound('snare')
+    drum.stop_all()
+    assert drum.metronome_enabled and channel.get_busy()
+    print("✓ stop_all lascia suonare il metronomo")
+    
+    # Cambio di BPM: la battuta in corso continua, la nuova è in coda
+    drum.set_metronome(True, bpm=600)
+    second = drum._metronome_sound
+    assert second is not first
+    assert channel.get_sound() is first and channel.get_queue() is second
+    
+    # Finita la battuta in corso suona la nuova, e resta sempre una in coda
+    time.sleep(0.7)
+    assert channel.get_sound() is second and channel.get_queue() is second
+    print("✓ Nuovo tempo accodato alla fine della battuta in corso")
+    
+    drum.set_metronome(False)
+    assert not channel.get_busy() and drum._metronome_thread is None
+    print("✓ Metronomo spento")
+    print()
+
+def test_pattern_sequencer():
+    """Test del sequencer con lookahead"""
+    print("Test Pattern Sequencer...")
+    from src.sequencer import PatternSequencer
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    engine = LowLatencyAudioEngine(AudioConfig())
+    engine.load_sound("kick", np.ones(100))
+    seq = PatternSequencer([0.25, 0.0], ["kick", "kick"], [1.0, 0.5],
+                           length=0.5, loop=True, engine=engine)
+    
+    # Loop sample-accurate: eventi ogni 0.25 s a partire dal frame 1000
+    seq._cursor_frame = 1000.0
+    frames = [frame for frame, _ in seq._collect(1000 + 44100)]
+    assert frames == [1000, 12025, 23050, 34075]
+    assert seq.loop_count == 2
+    print("✓ Eventi programmati su frame esatti tra i loop")
+    
+    # Tempo doppio dalla finestra successiva
+    seq.set_tempo(240)
+    frames = [frame for frame, _ in seq._collect(1000 + 44100 + 22050)]
+    assert frames == [45100, 50612, 56125, 61638]
+    print("✓ Cambio di tempo senza salti")
+    
+    # Senza motore: trigger chiamato dal thread, nessun busy loop
+    played = []
+    seq = PatternSequencer([0.0, 0.01, 0.02], ["kick", "snare", "hihat"], [1, 1, 1],
+                           trigger=lambda drum, velocity: played.append(drum),
+                           lookahead=0.01)
+    seq.start()
+    assert seq.wait(timeout=2.0)
+    assert played == ["kick", "snare", "hihat"]
+    print("✓ Riproduzione via trigger e stop automatico")
+    
+    # Stop con eventi ancora nel ring: il callback li legge prima della rimozione
+    import time
+    engine = LowLatencyAudioEngine(AudioConfig(backend="null", null_realtime=True))
+    engine.initialize()
+    engine.load_sound("kick", np.ones(44100, dtype=np.float32))
+    seq = PatternSequencer([0.0, 0.01], ["kick", "kick"], [1.0, 1.0],
+                           engine=engine, lookahead=0.2)
+    seq.start()
+    deadline = time.perf_counter() + 1.0
+    while seq.scheduled_events < 2 and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    seq.stop()
+    assert engine.voices.active_count == 2
+    assert len(engine._trigger_sources) == 1  # Solo il ring principale
+    engine.stop()
+    print("✓ Gli eventi già programmati suonano anche dopo stop()")
+    print()
+
+def test_offline_renderer():
+    """Test del render offline"""
+    print("Test Offline Renderer...")
+    from src.offline_renderer import OfflineRenderer
+    from src.drum_generator import DrumEvent
+    import numpy as np
+    import os
+    import tempfile
+    import wave
+    
+    kick = np.linspace(1, 0, 1000).astype(np.float32)
+    renderer = OfflineRenderer({"kick": kick, "hihat": kick * 0.5}, gain=1.0)
+    
+    events = [DrumEvent(0.0, "kick", 0.5), DrumEvent(0.01, "kick", 0.25),
+              DrumEvent(0.5, "hihat_closed", 1.0), DrumEvent(0.6, "cowbell")]
+    audio = renderer.render(events)
+    
+    # Overlap-add: il secondo colpo si somma alla coda del primo
+    onset = 441
+    assert audio.shape == (int(0.5 * 44100) + 1000, 2)
+    assert np.isclose(audio[onset, 0], 0.5 * kick[onset] + 0.25 * kick[0])
+    assert np.isclose(audio[22050, 0], 0.5)  # hihat_closed -> hihat
+    assert renderer.missing_events == 1
+    print("✓ Mix overlap-add con sostituti")
+    
+    # Render a blocchi su disco identico al render in memoria
+    path = os.path.join(tempfile.mkdtemp(), "render.wav")
+    frames = renderer.render_to_file(events, path, chunk_seconds=0.003)
+    assert frames == len(audio)
+    assert os.path.exists(path)
+    with wave.open(path) as f:
+        data = np.frombuffer(f.readframes(f.getnframes()), "<i2").reshape(-1, 2)
+    assert np.allclose(data / 32767, audio, atol=1e-3)
+    print("✓ Render in streaming su WAV")
+    
+    # Campioni della libreria a un'altra frequenza: ricampionati, non stonati
+    from src.sound_library import SoundLibrary, SoundSample
+    library = SoundLibrary(tempfile.mkdtemp())
+    t = np.arange(2205) / 22050
+    library.samples["kick"] = SoundSample("kick", audio_data=np.sin(2 * np.pi * 100 * t),
+                                          sample_rate=22050)
+    renderer = OfflineRenderer.from_sound_library(library, sample_rate=44100)
+    kick = renderer.sounds["kick"][:, 0]
+    assert len(kick) == 4410  # Stessa durata (0.1 s)
+    spectrum = np.abs(np.fft.rfft(kick))
+    assert abs(np.argmax(spectrum) * 44100 / len(kick) - 100) < 15  # Stessa altezza
+    print("✓ Campioni della libreria ricampionati al sample rate del render")
+    print()
+
+def test_note_off_scheduler():
+    """Test dello scheduler dei noteoff di FluidSynth"""
+    print("Test Note-Off Scheduler...")
+    from src.fluidsynth_engine import FluidSynthEngine
+    import time
+    
+    class RecordingSynth:
+        def __init__(self):
+            self.calls = []
+        def noteon(self, channel, note, velocity):
+            self.calls.append(("on", note, time.perf_counter()))
+        def noteoff(self, channel, note):
+            self.calls.append(("off", note, time.perf_counter()))
+    
+    engine = FluidSynthEngine()
+    engine.synth = RecordingSynth()
+    engine.running = True
+    
+    drums = ["kick", "snare", "hihat", "crash", "tom1", "tom2", "kick", "hihat"]
+    for drum in drums:
+        engine.play(drum, 0.8)
+    
+    start = time.perf_counter()
+    engine.process_events(start)
+    elapsed = time.perf_counter() - start
+    
+    assert len(engine.synth.calls) == 8
+    assert all(call[0] == "on" for call in engine.synth.calls)
+    assert elapsed < 0.001
+    print(f"✓ 8 noteon in {elapsed * 1000:.3f}ms")
+    
+    # Kick e hihat ricolpiti: un solo noteoff per nota, alla scadenza
+    engine.process_events(start + 0.05)
+    assert len(engine.synth.calls) == 8
+    engine.process_events(start + engine.config.note_length)
+    offs = [call[1] for call in engine.synth.calls if call[0] == "off"]
+    assert sorted(offs) == sorted(set(engine.drum_notes.values()))
+    assert engine.next_note_off_delay() is None
+    print("✓ Noteoff inviati alla scadenza senza sleep")
+    print()
+
+def test_shared_memory_triggers():
+    """Test dei trigger verso il processo FluidSynth via memoria condivisa"""
+    print("Test Shared Memory Triggers...")
+    from src.fluidsynth_engine import FluidSynthAudioProcess, FluidSynthConfig
+    import time
+    
+    process = FluidSynthAudioProcess(FluidSynthConfig())
+    process.start()
+    try:
+        for drum in ["kick", "snare", "hihat", "kick"]:
+            process.play(drum, 0.8)
+        
+        # Il processo audio svuota il ring condiviso
+        deadline = time.perf_counter() + 5.0
+        while len(process.triggers) and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        assert len(process.triggers) == 0
+        print("✓ Trigger consumati dal processo audio")
+    finally:
+        process.stop()
+    assert process.triggers is None
+    print()
+
+def test_sample_bank():
+    """Test del sample bank memory-mapped"""
+    print("Test Sample Bank...")
+    from src.sample_bank import write_sample_bank, SampleBank
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    import os
+    import tempfile
+    
+    soft, hard_a, hard_b = np.zeros(100), np.ones(200) * 0.5, np.ones(150) * 0.7
+    path = os.path.join(tempfile.mkdtemp(), "kit.bank")
+    write_sample_bank(path, {"snare": [[soft], [hard_a, hard_b]], "kick": [[hard_a]]},
+                      thresholds={"snare": [40, 127]})
+    
+    bank = SampleBank(path)
+    assert sorted(bank.names()) == ["kick", "snare"]
+    assert bank.get("snare", 1, 1).shape == (150, 2)
+    assert np.allclose(bank.get("snare", 1, 1), 0.7)
+    assert isinstance(bank.get("kick").base, np.memmap)
+    print("✓ Campioni come viste sul file")
+    
+    engine = LowLatencyAudioEngine(AudioConfig())
+    assert engine.load_bank(bank) == bank.names()
+    layer_set = engine.sounds["snare"].layer_set
+    assert layer_set.thresholds == [40, 127]
+    assert np.shares_memory(layer_set.layers[1][0], bank.get("snare", 1, 0))
+    print("✓ Caricamento nel motore senza copie")
+    print()
+
+def test_disk_streaming():
+    """Test delle voci in streaming da disco"""
+    print("Test Disk Streaming...")
+    from src.sample_bank import write_sample_bank
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    from src.disk_streaming import StreamingSample, FREE
+    import numpy as np
+    import os
+    import tempfile
+    
+    crash = (np.sin(np.arange(44100 * 2) * 0.01) * 0.5).astype(np.float32)
+    path = os.path.join(tempfile.mkdtemp(), "cymbals.bank")
+    write_sample_bank(path, {"crash": [[crash]]})
+    
+    config = AudioConfig(stream_threshold=1.0, sample_accurate=False, master_gain=1.0)
+    engine = LowLatencyAudioEngine(config)
+    engine.load_bank(path)
+    engine.streamer.stop()  # Prefetch manuale: test deterministico
+    
+    sample = engine.sounds["crash"].buffer
+    assert isinstance(sample, StreamingSample)
+    assert len(sample.head) == int(config.stream_head * config.sample_rate)
+    print("✓ In RAM solo la testa del campione")
+    
+    engine.running = True
+    engine.play("crash", 1.0)
+    blocks = []
+    for _ in range(len(crash) // 256 + 2):
+        engine.streamer.fill()
+        outdata = np.zeros((256, 2), dtype=np.float32)
+        engine._audio_callback(outdata, 256)
+        blocks.append(outdata[:, 0].copy())
+    audio = np.concatenate(blocks)
+    
+    assert np.allclose(audio[:len(crash)], crash)
+    assert engine.streamer.underruns == 0
+    engine.streamer.fill()
+    assert engine.voices.active_count == 0
+    assert engine.streamer.slots[0].state == FREE
+    print("✓ Coda letta in anticipo e slot restituito")
+    print()
+
+def test_latency_stats():
+    """Test degli istogrammi di latenza"""
+    print("Test Latency Stats...")
+    from src.latency_stats import LatencyHistogram
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    histogram = LatencyHistogram()
+    values = np.random.default_rng(0).uniform(0.001, 0.021, 10000)
+    for value in values:
+        histogram.record(float(value))
+    for p in (50, 95, 99):
+        assert abs(histogram.percentile(p) - np.percentile(values, p)) / np.percentile(values, p) < 0.1
+    print("✓ Percentili dai bucket logaritmici")
+    
+    class Status:
+        output_underflow = True
+        output_overflow = False
+        def __bool__(self):
+            return True
+    
+    engine = LowLatencyAudioEngine(AudioConfig())
+    engine.load_sound("kick", np.ones(100))
+    engine.running = True
+    engine.play("kick", 1.0)
+    outdata = np.zeros((256, 2), dtype=np.float32)
+    engine._audio_callback(outdata, 256, None, Status())
+    engine._audio_callback(outdata, 256)
+    
+    stats = engine.get_latency_stats()
+    assert stats["xruns"] == 1 and stats["underflows"] == 1
+    assert stats["callbacks"] == 2
+    assert stats["stages"]["enqueue_to_callback"]["count"] == 1
+    assert stats["stages"]["callback_to_dac"]["count"] == 1
+    assert 0 < stats["callback"]["load_mean"]
+    print("✓ Xrun, stadi e carico del callback nel motore")
+    print()
+
+def test_null_backend():
+    """Test del backend null con clock virtuale"""
+    print("Test Null Backend...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    import os
+    import tempfile
+    import wave
+    
+    path = os.path.join(tempfile.mkdtemp(), "capture.wav")
+    config = AudioConfig(backend="null", master_gain=1.0, capture_seconds=0.1, capture_path=path)
+    engine = LowLatencyAudioEngine(config)
+    assert engine.initialize() and engine.null_backend is not None
+    
+    sample = np.linspace(0.1, 0.5, 300).astype(np.float32)
+    engine.load_sound("kick", sample)
+    engine.play_at_frame("kick", 1.0, 1000)
+    blocks_per_second = engine.null_backend.run(seconds=0.1)
+    engine.stop()
+    
+    captured = engine.null_backend.captured()
+    assert len(captured) == 4410 and blocks_per_second > 0
+    assert np.allclose(captured[1000:1300, 0], sample) and not captured[:1000].any()
+    assert engine.null_backend.time >= 0.1
+    with wave.open(path, "rb") as f:
+        assert f.getnframes() == engine.null_backend.frames and f.getnchannels() == 2
+    print(f"✓ Uscita deterministica su buffer e WAV ({blocks_per_second:.0f} blocchi/s)")
+    
+    import time
+    engine = LowLatencyAudioEngine(AudioConfig(backend="null", null_realtime=True))
+    engine.initialize()
+    time.sleep(0.2)
+    engine.stop()
+    blocks = engine.null_backend.blocks
+    expected = 0.2 * 44100 / 256
+    assert 0.5 * expected < blocks < 1.5 * expected
+    print(f"✓ Modalità tempo reale cadenzata ({blocks} blocchi in 0.2s)")
+    print()
+
+def test_voice_limits():
+    """Test di limiti di polifonia, choke e budget adattivo"""
+    print("Test Voice Limits...")
+    from src.low_latency_audio import LowLatencyAudioEngine, AudioConfig
+    import numpy as np
+    
+    config = AudioConfig(backend="null", master_gain=1.0, fade_ms=2.0, target_load=0.0)
+    engine = LowLatencyAudioEngine(config)
+    engine.initialize()
+    backend = engine.null_backend
+    for name in ("hihat_open", "hihat_closed", "crash", "snare"):
+        engine.load_sound(name, np.full(44100, 0.1, dtype=np.float32))
+    
+    # L'hi-hat chiuso smorza l'aperto con un fade, non di colpo
+    engine.play_at_frame("hihat_open", 1.0, 0)
+    engine.play_at_frame("hihat_closed", 1.0, 1000)
+    backend.run(blocks=8)
+    open_voice = [v for v in engine.voices.voices if v.drum == "hihat_open"][0]
+    assert not open_voice.active and engine.voices.choked_count == 1
+    assert engine.voices.active_count == 1
+    print("✓ Choke hi-hat aperto/chiuso")
+    
+    # Limite per suono: 3 voci di crash, la più vecchia sfuma
+    for i in range(5):
+        engine.play_at_frame("crash", 1.0, engine.frame_position + i)
+    backend.run(blocks=2)
+    crashes = [v for v in engine.voices.voices if v.active and v.drum == "crash"]
+    assert len(crashes) == 3 and engine.voices.stolen_count == 2
+    
+    # Presa del crash: tutte le voci sfumano
+    engine.choke("crash")
+    backend.run(blocks=2)
+    assert not any(v.active and v.drum == "crash" for v in engine.voices.voices)
+    print("✓ Limite di voci per suono e presa del crash")
+    
+    # Budget adattivo: sotto carico cala fino al minimo sfumando le voci in eccesso
+    engine.config.target_load = 0.7
+    engine.set_voice_limit("snare", 32)
+    for i in range(20):
+        engine.play_at_frame("snare", 0.5 + i / 40, engine.frame_position + i)
+    backend.run(blocks=1)
+    for _ in range(40):
+        engine._adapt_voice_budget(2.0)
+    backend.run(blocks=2)
+    assert engine.voices.budget == engine.config.min_voices
+    assert engine.voices.active_count <= engine.config.min_voices + 1
+    for _ in range(80):
+        engine._adapt_voice_budget(0.0)
+    assert engine.voices.budget == engine.config.max_voices
+    print(f"✓ Budget adattivo al carico (minimo {engine.config.min_voices} voci)")
+    
+    # Stealing della voce più debole
+    engine.voices.stop_all()
+    engine.voices.stealing = "quietest"
+    engine.set_voice_limit("snare", 2)
+    engine.play_at_frame("snare", 1.0, engine.frame_position)
+    engine.play_at_frame("snare", 0.2, engine.frame_position + 1)
+    engine.play_at_frame("snare", 0.8, engine.frame_position + 2)
+    backend.run(blocks=2)
+    gains = sorted(round(v.gain, 1) for v in engine.voices.voices if v.active)
+    assert gains == [0.8, 1.0]
+    print("✓ Stealing della voce più debole")
+    engine.stop()
+    print()
+
+def test_synthesis_cache():
+    """Test della cache su disco dei suoni sintetizzati"""
+    print("Test Synthesis Cache...")
+    from src.low_latency_audio import PrecomputedDrumPool
+    from src.synthesis_cache import SynthesisCache
+    import numpy as np
+    import tempfile
+    
+    cache_dir = tempfile.mkdtemp()
+    pool = PrecomputedDrumPool(44100, cache_dir=cache_dir)
+    pool.generate_all()
+    assert pool.cache.misses == 3 and pool.cache.hits == 0
+    
+    cached = PrecomputedDrumPool(44100, cache_dir=cache_dir)
+    cached.generate_all()
+    assert cached.cache.hits == 3
+    assert isinstance(cached.sounds["kick"], np.memmap)
+    assert np.array_equal(cached.sounds["snare"], pool.sounds["snare"])
+    print("✓ Secondo avvio caricato da disco in memory-map")
+    
+    cache = SynthesisCache(cache_dir)
+    assert cache.key("kick", 44100) != cache.key("kick", 48000)
+    assert cache.key("kick", 44100, {"pitch": 60}) != cache.key("kick", 44100, {"pitch": 70})
+    assert cache.key("kick", 44100, {}, pool.generate_kick) != cache.key("kick", 44100, {}, pool.generate_snare)
+    print("✓ Chiave da sample rate, parametri e generatore")
+    
+    variants = pool.generate_kick_variants(np.array([50, 60, 70])[:, None], np.array([8.0, 12.0])[None, :])
+    assert variants.shape == (6, 13230, 2)
+    assert np.allclose(variants[2], pool.generate_kick_variants([60], [8.0])[0])
+    print(f"✓ Varianti batch vettorializzate: {variants.shape[0]}")
+    
+    # La cartella predefinita non dipende dalla cartella corrente
+    import os
+    from src.synthesis_cache import DEFAULT_CACHE_DIR
+    project = os.path.dirname(os.path.abspath(__file__))
+    assert DEFAULT_CACHE_DIR == os.path.join(project, "sounds", "cache")
+    assert SynthesisCache().cache_dir == DEFAULT_CACHE_DIR
+    assert PrecomputedDrumPool(44100).cache.cache_dir == DEFAULT_CACHE_DIR
+    print("✓ Cache predefinita in sounds/cache nel progetto")
+    print()
+
+def test_frame_capture():
+    """Test della cattura video in thread con slot dell'ultimo frame"""
+    print("Test Frame Capture...")
+    from src.frame_capture import ThreadedCapture
+    import numpy as np
+    import time
+    
+    class FakeCamera:
+        """Videocamera finta a ~500 fps: il frame contiene il suo indice"""
+        def __init__(self):
+            self.count = 0
+        def grab(self):
+            time.sleep(0.002)
+            self.count += 1
+            return True
+        def retrieve(self):
+            return True, np.full((4, 4, 3), self.count, dtype=np.uint8)
+    
+    capture = ThreadedCapture(FakeCamera(), transform=lambda f: f[:, ::-1])
+    capture.start()
+    
+    first = capture.read(timeout=1.0)
+    assert first is not None
+    time.sleep(0.05)  # Consumer lento: i frame intermedi vanno scartati
+    frame, timestamp, sequence = capture.read(timeout=1.0)
+    assert sequence > first[2] + 5
+    assert capture.slot.dropped > 0
+    assert timestamp <= time.perf_counter() and timestamp > first[1]
+    
+    # Nessun frame già consegnato viene restituito due volte
+    sequences = [capture.read(timeout=1.0)[2] for _ in range(5)]
+    assert sequences == sorted(set(sequences)) and sequences[0] > sequence
+    capture.stop()
+    assert not capture.running
+    print(f"✓ Sempre il frame più recente ({capture.slot.dropped} scartati)")
+    print()
+
+def test_pipeline():
+    """Test della pipeline a stadi con code limitate"""
+    print("Test Pipeline...")
+    from src.pipeline import Pipeline, PipelineStage
+    import queue
+    import time
+    
+    counter = iter(range(1, 10**9))
+    def source():
+        time.sleep(0.001)
+        return {"n": next(counter), "timestamp": time.perf_counter()}
+    
+    hits = []
+    def detect(item):
+        hits.append(item["n"])
+        return item
+    
+    pose_queue = queue.Queue(maxsize=2)
+    render_queue = queue.Queue(maxsize=1)
+    pipeline = Pipeline()
+    pipeline.add_stage(PipelineStage("pose", lambda item: item, source=source,
+                                     output_queue=pose_queue, drop_oldest=False))
+    pipeline.add_stage(PipelineStage("hits", detect, input_queue=pose_queue, output_queue=render_queue,
+                                     timestamp=lambda item: item["timestamp"]))
+    pipeline.start()
+    
+    # Rendering lento: i colpi non lo aspettano e non perdono elementi
+    rendered = []
+    for _ in range(5):
+        rendered.append(render_queue.get(timeout=1.0)["n"])
+        time.sleep(0.03)
+    
+    pipeline.pause()
+    paused_at = len(hits)
+    time.sleep(0.05)
+    assert len(hits) <= paused_at + 1
+    pipeline.resume()
+    time.sleep(0.02)
+    pipeline.stop()
+    
+    assert hits == list(range(1, len(hits) + 1))
+    assert len(hits) > 3 * len(rendered)
+    stats = pipeline.get_stats()
+    assert stats["hits"]["dropped"] > 0 and stats["hits"]["age"]["count"] == len(hits)
+    assert stats["pose"]["processed"] >= len(hits)
+    print(f"✓ Colpi elaborati {len(hits)}, rendering {len(rendered)} ({pipeline.summary()})")
+    print()
+
+def test_keypoints():
+    """Test dei keypoint in forma di array e della media mobile"""
+    print("Test Keypoints...")
+    from src.keypoints import JOINTS, KeypointFrame, KeypointHistory, as_keypoint_array
+    from src.zone_detector import ZoneDetector
+    import numpy as np
+    
+    rng = np.random.default_rng(0)
+    frames = rng.random((50, len(JOINTS), 3)).astype(np.float32)
+    history = KeypointHistory(size=5)
+    history.RESYNC_INTERVAL = 16
+    means = [history.push(frame) for frame in frames]
+    
+    for i in (0, 3, 4, 20, 49):
+        expected = frames[max(0, i - 4) : i + 1].mean(axis=0)
+        assert np.allclose(means[i], expected, atol=1e-6)
+    assert means[-1] is not means[-2]  # Ogni media è un array nuovo
+    print("✓ Media mobile uguale a np.mean sugli ultimi 5 frame")
+    
+    # Accesso per nome come il vecchio dizionario, senza copie
+    frame = KeypointFrame(means[-1])
+    assert np.shares_memory(frame['nose'], means[-1])
+    assert 'left_wrist' in frame and 'elbow' not in frame
+    assert list(frame) == list(JOINTS)
+    
+    # Dizionario -> array (NaN per le articolazioni mancanti)
+    array = as_keypoint_array({'left_wrist': np.array([0.5, 0.5, 0.0]), 'elbow': np.zeros(3)})
+    assert array.shape == (len(JOINTS), 3)
+    assert np.allclose(array[0], [0.5, 0.5, 0.0]) and np.isnan(array[1:]).all()
+    assert as_keypoint_array(frame) is means[-1]
+    print("✓ KeypointFrame e conversione da dizionario")
+    
+    # Il zone detector accetta direttamente l'array
+    key_points = np.full((len(JOINTS), 3), 0.0, dtype=np.float32)
+    key_points[0] = [0.5, 0.5, 0.0]  # Centro snare
+    key_points[1] = [0.3, 0.4, 0.0]  # Hi-hat
+    velocities = {'left_wrist': 0.5, 'right_wrist': 0.4}
+    as_dict = {name: key_points[i] for i, name in enumerate(JOINTS)}
+    assert ZoneDetector().detect_hits(key_points, velocities) == ZoneDetector().detect_hits(as_dict, velocities)
+    print("✓ ZoneDetector con array e dizionario")
+    print()
+
+def test_keypoint_filters():
+    """Test dei filtri adattivi dei keypoint"""
+    print("Test Keypoint Filters...")
+    from src.keypoint_filter import create_keypoint_filter, FILTER_MODES
+    import numpy as np
+    
+    # 30 FPS: polso fermo con rumore, poi colpo verso il basso a 3 unità/s
+    dt = 1.0 / 30
+    times = np.arange(60) * dt
+    heights = np.where(times < 1.0, 0.3, np.minimum(0.3 + 3.0 * (times - 1.0), 0.75))
+    
+    results = {}
+    for mode in FILTER_MODES:
+        rng = np.random.default_rng(0)
+        keypoint_filter = create_keypoint_filter(mode)
+        positions, speeds = [], []
+        for t, y in zip(times, heights):
+            frame = np.full((7, 3), 0.5)
+            frame[:, 1] = y
+            frame += rng.normal(0, 0.003, frame.shape)
+            positions.append(keypoint_filter.update(frame, t)[0, 1])
+            speeds.append(keypoint_filter.velocity[0, 1])
+        positions = np.array(positions)
+        results[mode] = {
+            'lag': np.abs(positions - heights)[31:35].mean(),  # Durante il colpo
+            'jitter': np.std(positions[10:29]),  # Da fermo
+            'peak': max(speeds),
+        }
+        print(f"✓ {mode}: errore nel colpo {results[mode]['lag']:.3f}, "
+              f"jitter {results[mode]['jitter']:.4f}, velocità max {results[mode]['peak']:.2f}")
+    
+    # I filtri adattivi seguono il colpo meglio della media mobile
+    assert results['one_euro']['lag'] < results['average']['lag'] * 0.6
+    assert results['kalman']['lag'] < results['average']['lag'] * 0.6
+    assert results['one_euro']['jitter'] < 0.003
+    for mode in ('one_euro', 'kalman'):
+        assert 2.5 < results[mode]['peak'] < 4.0
+    
+    # Dopo una pausa lunga (posa persa) il filtro riparte dalla misura
+    keypoint_filter = create_keypoint_filter('one_euro')
+    keypoint_filter.update(np.zeros((7, 3)), 0.0)
+    keypoint_filter.update(np.ones((7, 3)), 1.0)
+    assert np.allclose(keypoint_filter.position, 1.0) and not keypoint_filter.velocity.any()
+    
+    # La base è astratta: ogni filtro deve implementare _filter()
+    from src.keypoint_filter import KeypointFilter
+    try:
+        KeypointFilter()
+        assert False, "KeypointFilter non deve essere istanziabile"
+    except TypeError:
+        pass
+    print()
+
+def test_strike_predictor():
+    """Test del rilevamento predittivo dei colpi"""
+    print("Test Strike Predictor...")
+    from src.keypoint_filter import create_keypoint_filter
+    from src.keypoints import JOINT_INDEX
+    from src.strike_predictor import StrikePredictor
+    from src.zone_detector import ZoneDetector
+    import numpy as np
+    
+    def stroke(stop_y=0.5):
+        """Polso destro che scende sullo snare a 3 unità/s (30 FPS, 30 ms di pipeline)"""
+        rng = np.random.default_rng(0)
+        keypoint_filter = create_keypoint_filter('one_euro')
+        detector = ZoneDetector()
+        predictor = StrikePredictor(detector)
+        hits, cancelled, first_inside = [], [], None
+        for i in range(60):
+            t = i / 30
+            frame = np.full((7, 3), 0.9)
+            frame[JOINT_INDEX['right_wrist']] = [0.75, min(0.1 + 3.0 * max(t - 1.0, 0.0), stop_y), 0.0]
+            frame[JOINT_INDEX['left_wrist']] = [0.5, 0.2, 0.0]
+            frame += rng.normal(0, 0.003, frame.shape)
+            
+            positions = keypoint_filter.update(frame, t)
+            if first_inside is None and detector.is_point_in_zone(positions[JOINT_INDEX['right_wrist']], detector.drum_zones['snare']):
+                first_inside = t
+            strikes, zones = predictor.update(positions, keypoint_filter.velocity,
+                                              keypoint_filter.acceleration, t, now=t + 0.03)
+            hits += [(t, strike) for strike in strikes]
+            cancelled += [(t, zone) for zone in zones]
+        return hits, cancelled, first_inside, predictor.get_stats()
+    
+    # Colpo vero: un solo trigger, anticipato e confermato
+    hits, cancelled, first_inside, stats = stroke()
+    assert len(hits) == 1 and not cancelled
+    t, strike = hits[0]
+    assert strike.zone == 'snare' and strike.limb == 'right_wrist' and strike.lead > 0
+    assert t < first_inside
+    assert stats['predicted'] == 1 and stats['confirmed'] == 1
+    print(f"✓ Colpo anticipato di {(first_inside - t) * 1000:.0f} ms rispetto al pad raggiunto")
+    
+    # La mano si ferma appena sopra il pad: predizione annullata dopo la finestra
+    hits, cancelled, first_inside, stats = stroke(stop_y=0.30)
+    assert first_inside is None and len(hits) == 1
+    assert cancelled == [(cancelled[0][0], 'snare')]
+    assert cancelled[0][0] - hits[0][0] <= 0.1 + 1 / 30
+    assert stats['cancelled'] == 1 and stats['precision'] == 0.0
+    print("✓ Predizione falsa annullata entro la finestra di conferma")
+    print()
+
+def test_concurrent_play():
+    """Test di play_sound da più thread (pipeline, sequencer, thread principale)"""
+    print("Test Concurrent Play...")
+    from src.drum_machine import DrumMachine
+    import threading
+    
+    drum = DrumMachine()
+    drum.cooldown_time = 0.0
+    errors = []
+    
+    def hammer(names):
+        try:
+            for i in range(300):
+                name = names[i % len(names)]
+                drum.play_sound(name, 0.2 + (i % 5) * 0.2)
+                if i % 7 == 0:
+                    drum.choke(name)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=hammer, args=(names,))
+               for names in (['snare', 'kick'], ['hihat', 'snare'], ['kick', 'crash'])]
+    for thread in threads:
+        thread.start()
+    for _ in range(5):
+        drum.set_master_volume(0.6)  # Ricostruisce la cache mentre si suona
+    for thread in threads:
+        thread.join()
+    
+    assert not errors, errors
+    for name, playing in drum._drum_channels.items():
+        assert len(playing) <= drum.voice_limits.get(name, drum.voices_per_drum)
+    drum.stop_all()
+    print("✓ Nessun errore e limiti di voci rispettati con 3 thread")
+    print()
+
 def main():
     """Esegue tutti i test"""
     print("=" * 50)
@@ -99,6 +1185,33 @@ def main():
         test_drum_machine()
         test_virtual_environment()
         test_zone_detector()
+        test_voice_pool()
+        test_preallocated_mix()
+        test_trigger_ring()
+        test_sample_accurate_scheduling()
+        test_velocity_layers()
+        test_effect_chain()
+        test_sound_cache()
+        test_processed_audio_cache()
+        test_convolution_reverb()
+        test_metronome()
+        test_drum_machine_metronome()
+        test_pattern_sequencer()
+        test_offline_renderer()
+        test_note_off_scheduler()
+        test_shared_memory_triggers()
+        test_sample_bank()
+        test_disk_streaming()
+        test_latency_stats()
+        test_null_backend()
+        test_voice_limits()
+        test_synthesis_cache()
+        test_frame_capture()
+        test_pipeline()
+        test_concurrent_play()
+        test_keypoints()
+        test_keypoint_filters()
+        test_strike_predictor()
         
         # Test motion tracker solo se richiesto (richiede camera)
         response = input("Vuoi testare il Motion Tracker? (richiede videocamera) [s/N]: ")